@@ -0,0 +1,110 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Protocol
+
+default_animation_duration = 5.0
+
+
+@dataclass
+class FrameStats:
+    rendered: int = 0
+    dropped: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def fps(self) -> float:
+        return self.rendered / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.fps:.1f} fps, {self.dropped} dropped"
+
+
+class FrameClock:
+    """turns wall clock time into frame indices, so a sweep over n_frames takes about `duration` seconds no matter how
+    long a single frame takes to draw. Frames that are already late when the next tick comes are skipped."""
+
+    def __init__(self, n_frames: int, duration: float = default_animation_duration,
+                 on_finished: Callable[[FrameStats], None] | None = None,
+                 timer: Callable[[], float] = time.perf_counter) -> None:
+        self.n_frames = n_frames
+        self.duration = duration
+        self.on_finished = on_finished
+        self.timer = timer
+        self.stats = FrameStats()
+
+    @property
+    def interval_ms(self) -> int:
+        # timer period that would show every frame if drawing took no time at all
+        return max(round(1000 * self.duration / max(self.n_frames, 1)), 1)
+
+    def frame_at(self, elapsed: float) -> int:
+        if self.duration <= 0:
+            return self.n_frames - 1
+        return min(int(elapsed / self.duration * (self.n_frames - 1)), self.n_frames - 1)
+
+    def frames(self) -> Iterator[int]:
+        """generator of frame indices (to be used as frames= of FuncAnimation or by a driver), always ends with the
+        last frame so the final plot is drawn"""
+        self.stats = FrameStats()
+        start = self.timer()
+        last = -1
+        while last < self.n_frames - 1:
+            # the frame belongs to the current time: if previous frames took too long the ones in between are
+            # skipped, if the tick came early the current frame is simply shown again
+            frame = max(self.frame_at(self.timer() - start), last)
+            self.stats.dropped += max(frame - last - 1, 0)
+            self.stats.rendered += 1
+            last = frame
+            yield frame
+        self.stats.elapsed = self.timer() - start
+        if self.on_finished:
+            self.on_finished(self.stats)
+
+
+class Scheduler(Protocol):
+    # tkinter widgets (the App) provide exactly this
+    def after(self, ms: int, func: Callable) -> str:
+        ...
+
+    def after_cancel(self, id: str) -> None:
+        ...
+
+
+class AnimationDriver:
+    """one timer for all animated plots. Every tick takes the next frame index, updates every plot with it and asks
+    each canvas for a single redraw, instead of every figure running its own FuncAnimation timer"""
+
+    def __init__(self, scheduler: Scheduler, frames: Iterable[int], interval_ms: int,
+                 updates: list[Callable[[int], Any]], canvases: list) -> None:
+        self.scheduler = scheduler
+        self.interval_ms = interval_ms
+        self.updates = updates
+        self.canvases = canvases
+        self._frames = iter(frames)
+        self._job = None
+
+    @property
+    def running(self) -> bool:
+        return self._job is not None
+
+    def start(self) -> None:
+        self._job = self.scheduler.after(0, self._tick)
+
+    def stop(self) -> None:
+        if self._job is not None:
+            self.scheduler.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self) -> None:
+        tick_start = time.perf_counter()
+        frame = next(self._frames, None)
+        if frame is None:
+            self._job = None
+            return
+        for update in self.updates:
+            update(frame)
+        for canvas in self.canvases:
+            canvas.draw_idle()
+        # the time spent updating is taken off the interval, so the tick rate does not depend on the plot count
+        spent_ms = int(1000 * (time.perf_counter() - tick_start))
+        self._job = self.scheduler.after(max(self.interval_ms - spent_ms, 1), self._tick)
@@ -0,0 +1,252 @@
+"""Persistent archive of evaluated filters, shared by every session and process that uses the same directory.
+
+Results are archived in three parts, because the model computes (and changes) them separately: the polynomials
+num/denom, the frequency response on a grid and the time response. Every part is stored under a canonical key, the
+model type, the evaluated roots with their multiplicities and whatever else the part depends on (grid, sampling time,
+kind of time response). The index file maps the hash of a key to the full key, which is compared on every hit, and
+to the layout of the part's data file. The data file holds the arrays one after the other, they are memory-mapped
+when read, so a hit costs neither a copy nor parsing.
+
+Readers never lock: the index and the data files are written under temporary names and then renamed, so a reader
+sees either the old or the new file, never half of one. A reader that finds an entry whose file is already evicted
+simply misses. Writers add their entry under a lock on the index and evict the least recently used entries (by the
+modification time of their data file, which every hit touches) until the archive fits into max_bytes.
+
+The archive is off until open_archive is called (main.py --archive, export.py --archive), Model then looks results up
+before computing them:
+
+    archive.open_archive("result_archive")
+"""
+import contextlib
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+from numpy.typing import NDArray
+
+default_archive_dir = "result_archive"
+default_max_bytes = 256 * 2 ** 20
+index_file = "index.json"
+lock_file = "index.lock"
+# array offsets in the data files
+alignment = 64
+
+try:
+    import fcntl
+
+    def _lock(file) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(file) -> None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+except ImportError:
+    import msvcrt
+
+    def _lock(file) -> None:
+        # blocks (retrying for about 10 s at a time) until the first byte of the lock file is ours
+        file.seek(0)
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                ...
+
+    def _unlock(file) -> None:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def get_canonical_roots(roots: dict[complex, int]) -> list[list[float]]:
+    # [real, imaginary, multiplicity] sorted, two dicts with the same roots in another order give the same key
+    return sorted([float(np.real(root)), float(np.imag(root)), int(fach)] for root, fach in roots.items() if fach)
+
+
+def get_model_key(model, part: str) -> dict:
+    """canonical key of one archived part ("tf", "freq" or "time") of the model, json serializable"""
+    poles, zeros = model.get_evaluated_roots()
+    key = {"part": part,
+           "type": model.type.name,
+           "poles": get_canonical_roots(poles),
+           "zeros": get_canonical_roots(zeros),
+           "gain": float(model.get_evaluated_gain())}
+    digital = model.type.name == "DIGITAL"
+    if part == "freq":
+        key["grid"] = dataclasses.asdict(model.get_grid_spec())
+    elif part == "time":
+        key.update(time_resp=model.time_resp.name,
+                   sampling_time=float(model.sampling_time) if digital else None,
+                   from_spectrum=bool(model.time_resp_from_spectrum) if digital else False)
+    return key
+
+
+def get_key_hash(key: dict) -> str:
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:32]
+
+
+def _write_replace(path: str, write) -> None:
+    # written under a temporary name first, so a crash never leaves half a file behind and readers never see one. The
+    # name is unique per process and thread, writers of the same key must not share it
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as file:
+        write(file)
+    os.replace(temp_path, path)
+
+
+class ResultArchive:
+    def __init__(self, archive_dir: str = default_archive_dir, max_bytes: int = default_max_bytes) -> None:
+        self.archive_dir = archive_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # parsed index and the modification time it was read at, read again only when the file changed
+        self._index: dict[str, dict] = {}
+        self._index_mtime = None
+        os.makedirs(archive_dir, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.archive_dir, name)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with open(self._path(lock_file), "a+b") as file:
+            _lock(file)
+            try:
+                yield
+            finally:
+                _unlock(file)
+
+    def _read_index(self) -> dict[str, dict]:
+        try:
+            mtime = os.stat(self._path(index_file)).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime != self._index_mtime:
+            try:
+                with open(self._path(index_file), "r") as file:
+                    self._index = json.load(file)
+            except (OSError, ValueError):
+                return {}
+            self._index_mtime = mtime
+        return self._index
+
+    def _write_index(self, index: dict[str, dict]) -> None:
+        _write_replace(self._path(index_file), lambda file: file.write(json.dumps(index).encode()))
+        self._index, self._index_mtime = index, os.stat(self._path(index_file)).st_mtime_ns
+
+    @property
+    def nbytes(self) -> int:
+        return sum(entry["nbytes"] for entry in self._read_index().values())
+
+    def __len__(self) -> int:
+        return len(self._read_index())
+
+    def get(self, key: dict) -> dict[str, NDArray] | None:
+        """the archived arrays of key (read only, memory-mapped) or None"""
+        key_hash = get_key_hash(key)
+        entry = self._read_index().get(key_hash)
+        # a (very unlikely) hash collision must not return another filter
+        if entry is None or entry["key"] != json.loads(json.dumps(key)):
+            self.misses += 1
+            return None
+        path = self._path(f"{key_hash}.bin")
+        try:
+            if os.path.getsize(path) != entry["nbytes"]:
+                raise FileNotFoundError(path)
+            arrays = {}
+            for name, (offset, dtype, shape) in entry["arrays"].items():
+                if np.prod(shape, dtype=int) == 0:
+                    # empty arrays can not be mapped
+                    arrays[name] = np.empty(shape, dtype=dtype)
+                else:
+                    arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=tuple(shape))
+            # marks the entry as recently used for the eviction
+            os.utime(path)
+        except OSError:
+            # evicted by another process since the index was read
+            self.misses += 1
+            return None
+        self.hits += 1
+        return arrays
+
+    def put(self, key: dict, arrays: dict[str, NDArray]) -> None:
+        key_hash = get_key_hash(key)
+        layout, offset = {}, 0
+        arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+        for name, array in arrays.items():
+            layout[name] = [offset, array.dtype.str, list(array.shape)]
+            offset += -(-array.nbytes // alignment) * alignment
+
+        def write(file) -> None:
+            for name, array in arrays.items():
+                file.seek(layout[name][0])
+                file.write(array.tobytes())
+            file.truncate(offset)
+        _write_replace(self._path(f"{key_hash}.bin"), write)
+        with self._locked():
+            # other processes may have changed the index since it was read, it is read again under the lock
+            self._index_mtime = None
+            index = dict(self._read_index())
+            index[key_hash] = {"key": json.loads(json.dumps(key)), "arrays": layout, "nbytes": offset}
+            self._write_index(self.evict(index, keep=key_hash))
+
+    def evict(self, index: dict[str, dict], keep: str | None = None) -> dict[str, dict]:
+        """index without its least recently used entries (whose files are removed) so it fits into max_bytes"""
+        def last_used(key_hash: str) -> float:
+            try:
+                return os.path.getmtime(self._path(f"{key_hash}.bin"))
+            except OSError:
+                return 0.
+        total = sum(entry["nbytes"] for entry in index.values())
+        for key_hash in sorted(index, key=last_used):
+            if total <= self.max_bytes:
+                break
+            if key_hash == keep:
+                continue
+            total -= index.pop(key_hash)["nbytes"]
+            try:
+                os.remove(self._path(f"{key_hash}.bin"))
+            except OSError:
+                # mapped by a reader on windows, the file is left behind until it can be removed
+                ...
+        return index
+
+    def clear(self) -> None:
+        with self._locked():
+            for key_hash in self._read_index():
+                with contextlib.suppress(OSError):
+                    os.remove(self._path(f"{key_hash}.bin"))
+            self._write_index({})
+
+
+# None until open_archive is called, Model only consults the archive when there is one
+result_archive: ResultArchive | None = None
+
+
+def open_archive(archive_dir: str = default_archive_dir, max_bytes: int = default_max_bytes) -> ResultArchive:
+    global result_archive
+    result_archive = ResultArchive(archive_dir, max_bytes)
+    return result_archive
+
+
+def close_archive() -> None:
+    global result_archive
+    result_archive = None
+
+
+def lookup(model, part: str) -> dict[str, NDArray] | None:
+    if result_archive is None:
+        return None
+    return result_archive.get(get_model_key(model, part))
+
+
+def store(model, part: str, **arrays: NDArray) -> None:
+    if result_archive is None:
+        return
+    try:
+        result_archive.put(get_model_key(model, part), arrays)
+    except OSError:
+        # a full or read only disk only costs the archiving, the results are there anyway
+        ...
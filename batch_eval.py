@@ -0,0 +1,164 @@
+"""Evaluation of many root sets at once.
+
+Root sets are stacked into 2-D arrays (one row per filter, NaN marks an unused slot when the orders differ), and all
+responses are computed with numpy broadcasting over the rows instead of calling zpk2tf/freqz/dimpulse per filter.
+Like Model.update_num_denom, the gain of every filter is 1 unless gains are given explicitly.
+"""
+from collections import defaultdict
+import numpy as np
+from numpy.typing import NDArray
+from scipy.linalg import expm
+
+digital_time_samples = 30
+
+
+def stack_root_sets(root_sets: list[list[complex]]) -> NDArray:
+    width = max((len(roots) for roots in root_sets), default=0)
+    stacked = np.full((len(root_sets), width), np.nan, dtype=complex)
+    for row, roots in enumerate(root_sets):
+        stacked[row, :len(roots)] = roots
+    return stacked
+
+
+def get_orders(roots: NDArray) -> NDArray:
+    return np.sum(~np.isnan(roots), axis=1)
+
+
+def get_digital_points(freqs: NDArray, sampling_time: float) -> NDArray:
+    # points on the unit circle that belong to the frequencies in Hz returned by freqz(..., fs=1/sampling_time)
+    return np.exp(2j * np.pi * np.asarray(freqs) * sampling_time)
+
+
+def get_analog_points(freqs: NDArray) -> NDArray:
+    return 1j * np.asarray(freqs)
+
+
+def batch_freq_resp(zeros: NDArray, poles: NDArray, points: NDArray, gains: NDArray | None = None) -> NDArray:
+    """H(x) = gain * prod(x - zero) / prod(x - pole) for every row, evaluated at all points -> shape (rows, points).
+    points is either shared by all rows or has one row of points per filter (e.g. analog and digital filters on a
+    common frequency axis). The loop runs over root slots only, each step is one vectorized operation on a
+    (rows, points) array."""
+    points = np.asarray(points)
+    points = points if points.ndim == 2 else points[None, :]
+    resp = np.ones((zeros.shape[0], points.shape[1]), dtype=complex)
+    for column in range(zeros.shape[1]):
+        root = zeros[:, column, None]
+        resp *= np.where(np.isnan(root), 1, points - root)
+    for column in range(poles.shape[1]):
+        root = poles[:, column, None]
+        resp /= np.where(np.isnan(root), 1, points - root)
+    if gains is not None:
+        resp *= np.asarray(gains)[:, None]
+    return resp
+
+
+def get_freqz_factor(zeros: NDArray, poles: NDArray, points: NDArray) -> NDArray:
+    """x^(poles - zeros) of every row. freqz evaluates b(z^-1)/a(z^-1) of the polynomials of zpk2tf, on the unit circle
+    that differs from the root product of batch_freq_resp by this factor (magnitude 1, so only the phase changes)"""
+    points = np.asarray(points)
+    points = points if points.ndim == 2 else points[None, :]
+    return points ** (get_orders(poles) - get_orders(zeros))[:, None]
+
+
+def batch_poly(roots: NDArray) -> NDArray:
+    """coefficients (descending powers) of the monic polynomials of rows that all have the same number of roots"""
+    coeffs = np.ones((roots.shape[0], 1), dtype=complex)
+    for column in range(roots.shape[1]):
+        shifted = np.pad(coeffs, ((0, 0), (1, 0)))
+        coeffs = np.pad(coeffs, ((0, 0), (0, 1))) - roots[:, column, None] * shifted
+    # like np.poly, conjugate root pairs give real polynomials
+    if np.allclose(coeffs.imag, 0):
+        return coeffs.real
+    return coeffs
+
+
+def group_rows_by_order(zeros: NDArray, poles: NDArray) -> dict[tuple[int, int], NDArray]:
+    """rows with the same number of zeros and poles can be handled as one dense batch"""
+    groups = defaultdict(list)
+    for row, key in enumerate(zip(get_orders(zeros), get_orders(poles))):
+        groups[(int(key[0]), int(key[1]))].append(row)
+    return {key: np.asarray(rows) for key, rows in groups.items()}
+
+
+def _dense_roots(roots: NDArray, rows: NDArray, order: int) -> NDArray:
+    # NaN slots can sit anywhere in a row, keep only the used ones (in their order)
+    selected = roots[rows]
+    return selected[~np.isnan(selected)].reshape(len(rows), order)
+
+
+def _digital_impulse(num: NDArray, denom: NDArray, n_samples: int) -> NDArray:
+    # difference equation of b(z^-1)/a(z^-1), run for all rows at once. num is aligned to the denominator degree,
+    # which delays the response by (poles - zeros) samples just like scipy's dimpulse
+    rows, order = denom.shape[0], denom.shape[1] - 1
+    b = np.pad(num, ((0, 0), (order + 1 - num.shape[1], 0)))
+    a = denom
+    x_hist = np.zeros((rows, order + 1), dtype=num.dtype)
+    y_hist = np.zeros((rows, order + 1), dtype=np.result_type(num, denom))
+    out = np.zeros((rows, n_samples), dtype=y_hist.dtype)
+    for n in range(n_samples):
+        x_hist = np.roll(x_hist, 1, axis=1)
+        x_hist[:, 0] = 1 if n == 0 else 0
+        y_hist = np.roll(y_hist, 1, axis=1)
+        y_hist[:, 0] = (np.sum(b * x_hist, axis=1) - np.sum(a[:, 1:] * y_hist[:, 1:], axis=1)) / a[:, 0]
+        out[:, n] = y_hist[:, 0]
+    return out
+
+
+def _analog_impulse(num: NDArray, denom: NDArray, time: NDArray) -> NDArray:
+    # controllable canonical state space of every row, e^(A dt) is computed batched and applied step by step.
+    # The time grid has to be uniform (as the ones produced by scipy's impulse/step)
+    rows, order = denom.shape[0], denom.shape[1] - 1
+    b = np.pad(num, ((0, 0), (order + 1 - num.shape[1], 0))) / denom[:, :1]
+    a = denom / denom[:, :1]
+    c = b[:, 1:] - b[:, :1] * a[:, 1:]
+    state_matrix = np.zeros((rows, order, order), dtype=a.dtype)
+    state_matrix[:, 0, :] = -a[:, 1:]
+    state_matrix[:, 1:, :-1] = np.eye(order - 1)
+    dt = time[1] - time[0] if len(time) > 1 else 0
+    step_matrix = expm(state_matrix * dt)
+    state = np.zeros((rows, order, 1), dtype=step_matrix.dtype)
+    state[:, 0, 0] = 1
+    out = np.zeros((rows, len(time)), dtype=np.result_type(c, step_matrix))
+    for k in range(len(time)):
+        out[:, k] = np.sum(c * state[:, :, 0], axis=1)
+        state = step_matrix @ state
+    return out
+
+
+def batch_time_resp(zeros: NDArray, poles: NDArray, analog: bool, step: bool, time: NDArray | None = None,
+                    gains: NDArray | None = None) -> tuple[NDArray, NDArray]:
+    """impulse or step response of every row -> (time, values) with values of shape (rows, len(time)).
+    Analog responses need a uniform time grid, digital ones compute one sample per entry of time
+    (digital_time_samples samples if no grid is given)."""
+    if analog:
+        assert time is not None, "analog time responses need a time grid"
+    time = np.asarray(time) if time is not None else np.arange(digital_time_samples)
+    values = np.zeros((zeros.shape[0], len(time)))
+    for (n_zeros, n_poles), rows in group_rows_by_order(zeros, poles).items():
+        if n_zeros > n_poles:
+            raise ValueError("time responses need at least as many poles as zeros")
+        num = batch_poly(_dense_roots(zeros, rows, n_zeros))
+        denom = batch_poly(_dense_roots(poles, rows, n_poles))
+        if analog:
+            if step:
+                # the step response is the impulse response of H(s)/s
+                denom = np.pad(denom, ((0, 0), (0, 1)))
+            if denom.shape[1] == 1:
+                raise ValueError("analog time responses need at least one pole")
+            group_values = _analog_impulse(num, denom, time)
+        else:
+            group_values = _digital_impulse(num, denom, len(time))
+            if step:
+                group_values = np.cumsum(group_values, axis=1)
+        values[rows] = np.real(group_values)
+    if gains is not None:
+        values *= np.asarray(gains)[:, None]
+    return time, values
+
+
+def normalize_magnitudes(complex_f_resp: NDArray) -> NDArray:
+    # same normalization as Model.update_freq_resp, row by row
+    abs_resp = np.abs(complex_f_resp)
+    max_abs_resp = np.max(abs_resp, axis=1, keepdims=True)
+    # rows that are zero everywhere (e.g. a gain of 0) stay zero instead of turning into NaN
+    return abs_resp / np.where(max_abs_resp > 0, max_abs_resp, 1)
@@ -0,0 +1,265 @@
+"""Frame time and refresh latency of the plots, measured against the filter order.
+
+Compute benchmarks miss most of where the time goes when the GUI updates: building the figures, drawing them and, in
+the GUI, putting them on a FigureCanvasTkAgg. This suite drives the same code offscreen:
+
+- figure:<panel>   one create_*_plot of utilities.PLOT_PANELS, drawn on its Agg canvas
+- refresh          all four panels through HeadlessApp.refresh_plots and drawn, what every edit costs
+- frame:<plot>     one animation frame (the *_animation_func update plus the redraw the AnimationDriver asks for)
+- tk:canvas        FigureCanvasTkAgg construction and drawing like view.display_canvas_plot
+- tk:refresh       all four panels like view.refresh_visual_filter_frame
+
+The tk cases need a display. Without one, an Xvfb server is started as a virtual display if it is installed, otherwise
+they are skipped. Filters of every order get random stable roots from a fixed seed, so runs are comparable.
+
+Results (min/p50/p95 in ms per case and order) are written as json. Given a baseline file of an earlier run, cases
+whose minimum got slower by more than the threshold are flagged as regressions, and the exit code is 1. The minimum is
+compared because it hardly moves between runs, the percentiles pick up whatever else the machine was doing.
+
+usage: python benchmark.py -o bench.json [--baseline old.json] [--orders 2 8 32 128] [--no-tk]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from typing import Callable
+import numpy as np
+import matplotlib
+import utilities
+from headless import HeadlessApp
+from model import Model, ModelType, FilterType, TimeResponse
+
+default_orders = (2, 8, 32, 128)
+default_repeats = 20
+default_frames = 100
+# a minimum slower by more than this fraction (and by at least min_regression_ms) counts as regression
+default_threshold = 0.25
+min_regression_ms = 0.5
+virtual_display = ":87"
+
+
+def get_benchmark_model(type: ModelType, order: int, seed: int = 0) -> Model:
+    """order poles (and half as many zeros) in conjugate pairs, all stable"""
+    rng = np.random.default_rng(seed + order)
+
+    def get_roots(n: int, stable: bool) -> dict[complex, int]:
+        if type == ModelType.DIGITAL:
+            roots = rng.uniform(0.3, 0.95 if stable else 1.2, n) * np.exp(1j * rng.uniform(0, np.pi, n))
+        else:
+            roots = rng.uniform(-3, -0.1 if stable else 3, n) + 1j * rng.uniform(0, 3, n)
+        # conjugate pairs, the entry panels and config.json store roots the same way
+        roots = {complex(root): 1 for root in roots}
+        return {**roots, **{root.conjugate(): 1 for root in roots}}
+
+    model = Model()
+    model.init_default_model(type, FilterType.TP, TimeResponse.IMPULSE)
+    model.init_model_from_roots(FilterType.MANUAL, get_roots(max(order // 2, 1), True),
+                                get_roots(max(order // 4, 1), False))
+    return model
+
+
+def get_stats(times: list[float]) -> dict:
+    times_ms = 1000 * np.asarray(times)
+    return {"min": float(np.min(times_ms)),
+            "p50": float(np.percentile(times_ms, 50)),
+            "p95": float(np.percentile(times_ms, 95)),
+            "mean": float(np.mean(times_ms)),
+            "n": len(times_ms)}
+
+
+def time_calls(func: Callable, repeats: int) -> list[float]:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_figures(model: Model, repeats: int) -> dict:
+    results = {}
+    for panel, create_plot in utilities.PLOT_PANELS.items():
+        results[f"figure:{panel}"] = get_stats(time_calls(lambda: create_plot(model)[0].canvas.draw(), repeats))
+
+    app = HeadlessApp()
+    app.presenter = type("BenchPresenter", (), {"model": model})
+
+    def refresh() -> None:
+        app.refresh_plots()
+        for fig in app.figures.values():
+            fig.canvas.draw()
+    results["refresh"] = get_stats(time_calls(refresh, repeats))
+    return results
+
+
+def get_frame_indices(model: Model, n_frames: int) -> np.ndarray:
+    # the last frame builds a new figure instead of updating, it is left out
+    return np.linspace(0, len(model.freqs) - 2, min(n_frames, len(model.freqs) - 1)).astype(int)
+
+
+def time_frames(update: Callable[[int], object], canvas, frames: np.ndarray) -> list[float]:
+    times = []
+    for frame in frames:
+        start = time.perf_counter()
+        update(int(frame))
+        canvas.draw()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_animation_frames(model: Model, n_frames: int) -> dict:
+    frames = get_frame_indices(model, n_frames)
+    if model.type == ModelType.DIGITAL:
+        get_pole_zero_lines, pole_zero_func = (utilities.get_digital_pole_zero_line_objects,
+                                               utilities.digital_pole_zero_animation_func)
+    else:
+        get_pole_zero_lines, pole_zero_func = (utilities.get_analog_pole_zero_line_objects,
+                                               utilities.analog_pole_zero_animation_func)
+    results = {}
+    line_obj_dict = get_pole_zero_lines(model)
+    canvas = line_obj_dict["fig"].canvas
+    results["frame:pole_zero"] = get_stats(time_frames(
+        lambda frame: pole_zero_func(frame, line_obj_dict=line_obj_dict, canvas=canvas, model=model), canvas, frames))
+    for name, get_line_objects, animation_func in [
+            ("frame:response", utilities.get_response_line_objects, utilities.response_animation_func),
+            ("frame:phase", utilities.get_phase_line_objects, utilities.phase_animation_func)]:
+        fig, ax, line_2d_objects = get_line_objects(model)
+        results[name] = get_stats(time_frames(
+            lambda frame: animation_func(frame, line_2d_objects=line_2d_objects, ax=ax, canvas=fig.canvas,
+                                         model=model), fig.canvas, frames))
+    return results
+
+
+@contextlib.contextmanager
+def display_for_tk():
+    """yields a Tk root, on a virtual display if there is no real one. Yields None when Tk can not run at all"""
+    import tkinter as tk
+    server = None
+    if not os.environ.get("DISPLAY") and sys.platform.startswith("linux") and shutil.which("Xvfb"):
+        server = subprocess.Popen(["Xvfb", virtual_display, "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.environ["DISPLAY"] = virtual_display
+        # the server needs a moment before it accepts connections
+        time.sleep(0.5)
+    try:
+        try:
+            root = tk.Tk()
+        except tk.TclError:
+            root = None
+        try:
+            yield root
+        finally:
+            if root is not None:
+                root.destroy()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+            del os.environ["DISPLAY"]
+
+
+def bench_tk(model: Model, root, repeats: int) -> dict:
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    canvases = {}
+
+    def display(panel: str, create_plot: Callable) -> None:
+        # like view.display_canvas_plot: the old widget goes, a new canvas is put on the new figure
+        if panel in canvases:
+            canvases[panel].get_tk_widget().destroy()
+        canvases[panel] = FigureCanvasTkAgg(create_plot(model)[0], root)
+        canvases[panel].get_tk_widget().grid(sticky="nsew")
+        canvases[panel].draw()
+
+    def refresh() -> None:
+        for panel, create_plot in utilities.PLOT_PANELS.items():
+            display(panel, create_plot)
+        root.update_idletasks()
+
+    results = {"tk:canvas": get_stats(time_calls(lambda: display("magnitude", utilities.create_freq_resp_plot),
+                                                 repeats)),
+               "tk:refresh": get_stats(time_calls(refresh, repeats))}
+    for canvas in canvases.values():
+        canvas.get_tk_widget().destroy()
+    return results
+
+
+def run_benchmarks(orders: tuple[int, ...] = default_orders, repeats: int = default_repeats,
+                   n_frames: int = default_frames, use_tk: bool = True) -> dict:
+    results, skipped = {}, []
+    with display_for_tk() if use_tk else contextlib.nullcontext() as root:
+        if use_tk and root is None:
+            skipped.append("tk (no display and no Xvfb)")
+        for type in ModelType:
+            for order in orders:
+                model = get_benchmark_model(type, order)
+                cases = {**bench_figures(model, repeats), **bench_animation_frames(model, n_frames)}
+                if root is not None:
+                    cases.update(bench_tk(model, root, repeats))
+                for case, stats in cases.items():
+                    results[f"{type.name.lower()}/order={order}/{case}"] = stats
+    return {"meta": {"python": platform.python_version(),
+                     "matplotlib": matplotlib.__version__,
+                     "backend": "agg",
+                     "machine": platform.machine(),
+                     "orders": list(orders),
+                     "repeats": repeats,
+                     "frames": n_frames,
+                     "skipped": skipped},
+            "results": results}
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float = default_threshold) -> list[str]:
+    regressions = []
+    for case, stats in results["results"].items():
+        old = baseline["results"].get(case)
+        if old is None:
+            continue
+        # baselines written before the minimum was recorded are compared by their p50
+        statistic = "min" if "min" in old else "p50"
+        new_ms, old_ms = stats[statistic], old[statistic]
+        if new_ms > old_ms * (1 + threshold) and new_ms - old_ms > min_regression_ms:
+            regressions.append(f"{case}: {statistic} {old_ms:.2f} -> {new_ms:.2f} ms")
+    return regressions
+
+
+def format_table(results: dict) -> str:
+    lines = [f"{'case':<48} {'min ms':>9} {'p50 ms':>9} {'p95 ms':>9}"]
+    for case, stats in results["results"].items():
+        lines.append(f"{case:<48} {stats['min']:>9.2f} {stats['p50']:>9.2f} {stats['p95']:>9.2f}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="frame time and refresh latency of the plots versus filter order")
+    parser.add_argument("-o", "--out", default=None, help="write the results to this json file")
+    parser.add_argument("--baseline", default=None, help="results of an earlier run to check for regressions")
+    parser.add_argument("--threshold", type=float, default=default_threshold)
+    parser.add_argument("--orders", type=int, nargs="+", default=list(default_orders))
+    parser.add_argument("--repeats", type=int, default=default_repeats)
+    parser.add_argument("--frames", type=int, default=default_frames)
+    parser.add_argument("--no-tk", action="store_true", help="skip the cases that need Tk")
+    args = parser.parse_args()
+
+    results = run_benchmarks(tuple(args.orders), args.repeats, args.frames, use_tk=not args.no_tk)
+    print(format_table(results))
+    for skipped in results["meta"]["skipped"]:
+        print(f"skipped: {skipped}")
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = find_regressions(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
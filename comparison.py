@@ -0,0 +1,101 @@
+"""A set of filters that is drawn behind the current model for comparison.
+
+All filters of the set are evaluated together with batch_eval (one call for the frequency responses, one for the time
+responses) on the grids of the current model. The result is kept until the set or the grids change, so redrawing the
+plots does not evaluate anything again.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping
+import numpy as np
+from numpy.typing import NDArray
+import batch_eval
+import sweep
+from model import Model, ModelType, TimeResponse
+from utilities import build_repeated_item_list_from_dict
+
+
+@dataclass(frozen=True)
+class ComparisonEntry:
+    label: str
+    type: ModelType
+    poles: Mapping[complex, int]
+    zeros: Mapping[complex, int]
+
+
+@dataclass
+class ComparisonResult:
+    """responses of all entries that fit the current model, one row per entry. time_values is None when not every
+    entry has a time response (more zeros than poles)"""
+    labels: list[str]
+    freqs: NDArray = field(repr=False)
+    complex_f_resp: NDArray = field(repr=False)
+    normalized_abs_f_resp: NDArray = field(repr=False)
+    time: NDArray = field(repr=False)
+    time_values: NDArray | None = field(repr=False)
+
+
+def get_array_hash(array) -> str:
+    # grids of the same length and end can still differ (the analog grid follows the roots), the contents count
+    array = np.ascontiguousarray(array)
+    return hashlib.blake2b(array.tobytes(), digest_size=16).hexdigest() + array.dtype.str + str(array.shape)
+
+
+class ComparisonSet:
+    def __init__(self) -> None:
+        self.entries: list[ComparisonEntry] = []
+        self._result: ComparisonResult | None = None
+        self._result_key = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, label: str, type: ModelType, poles: dict[complex, int], zeros: dict[complex, int]) -> None:
+        # the entry gets its own read only copy, later changes of the model do not leak into the set
+        self.entries.append(ComparisonEntry(label, type, MappingProxyType(dict(poles)), MappingProxyType(dict(zeros))))
+        self._result = None
+
+    def add_model(self, model: Model, label: str | None = None) -> None:
+        label = label if label is not None else f"{model.filter.name.lower()} {len(self.entries) + 1}"
+        self.add(label, model.type, model.poles, model.zeros)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self._result = None
+
+    def get_entries(self, model: Model) -> list[ComparisonEntry]:
+        # roots of analog and digital filters mean different things, only entries of the model's type are compared
+        return [entry for entry in self.entries if entry.type == model.type]
+
+    def evaluate(self, model: Model) -> ComparisonResult | None:
+        entries = self.get_entries(model)
+        if not entries:
+            return None
+        key = (len(self.entries), model.type, model.sampling_time, model.time_resp, get_array_hash(model.freqs),
+               get_array_hash(model.time))
+        if self._result is not None and self._result_key == key:
+            return self._result
+
+        zeros = batch_eval.stack_root_sets([build_repeated_item_list_from_dict(entry.zeros) for entry in entries])
+        poles = batch_eval.stack_root_sets([build_repeated_item_list_from_dict(entry.poles) for entry in entries])
+        points = sweep.get_model_points(model)
+        complex_f_resp = batch_eval.batch_freq_resp(zeros, poles, points)
+        if model.type == ModelType.DIGITAL:
+            # same phase as the model's own (freqz) line they are drawn with
+            complex_f_resp *= batch_eval.get_freqz_factor(zeros, poles, points)
+        try:
+            time, time_values = batch_eval.batch_time_resp(zeros, poles,
+                                                           analog=model.type == ModelType.ANALOG,
+                                                           step=model.time_resp == TimeResponse.STEP,
+                                                           time=model.time)
+        except ValueError:
+            time, time_values = np.asarray(model.time), None
+        self._result = ComparisonResult(labels=[entry.label for entry in entries],
+                                        freqs=np.asarray(model.freqs),
+                                        complex_f_resp=complex_f_resp,
+                                        normalized_abs_f_resp=batch_eval.normalize_magnitudes(complex_f_resp),
+                                        time=time,
+                                        time_values=time_values)
+        self._result_key = key
+        return self._result
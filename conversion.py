@@ -0,0 +1,90 @@
+"""Analog to digital conversion of the roots of an analog model.
+
+The bilinear transform (optionally prewarped) and the matched z-transform map every root on its own, so both are plain
+elementwise numpy operations on the root arrays. The analog filter and both conversions are then evaluated together on
+one frequency axis in Hz (0 to fs/2) with a single batched call.
+"""
+from dataclasses import dataclass, field
+from enum import Enum, auto
+import numpy as np
+from numpy.typing import NDArray
+import batch_eval
+from model import Model, ModelType
+from utilities import build_repeated_item_list_from_dict
+
+comparison_points = 512
+
+
+class Conversion(Enum):
+    BILINEAR = auto()
+    MATCHED_Z = auto()
+
+
+def get_bilinear_constant(sampling_time: float, prewarp_freq: float | None = None) -> float:
+    # s = c*(z - 1)/(z + 1) with c = 2/T. With prewarping c is chosen so that prewarp_freq (Hz) lands exactly on the
+    # same frequency of the digital filter
+    if prewarp_freq is None:
+        return 2 / sampling_time
+    if not 0 < prewarp_freq < 1 / (2 * sampling_time):
+        raise ValueError("the prewarp frequency has to lie between 0 and fs/2")
+    omega = 2 * np.pi * prewarp_freq
+    return omega / np.tan(omega * sampling_time / 2)
+
+
+def map_roots(roots: NDArray, conversion: Conversion, sampling_time: float,
+              prewarp_freq: float | None = None) -> NDArray:
+    """digital roots of analog roots (any shape, NaN slots stay NaN). Both mappings keep conjugate pairs exact"""
+    roots = np.asarray(roots, dtype=complex)
+    if conversion == Conversion.BILINEAR:
+        c = get_bilinear_constant(sampling_time, prewarp_freq)
+        return (c + roots) / (c - roots)
+    return np.exp(roots * sampling_time)
+
+
+def get_digital_roots(zeros: NDArray, poles: NDArray, conversion: Conversion, sampling_time: float,
+                      prewarp_freq: float | None = None) -> tuple[NDArray, NDArray]:
+    # zeros at infinity (one per pole in excess of the zeros) are put at z = -1 by both mappings
+    n_infinite = max(len(poles) - len(zeros), 0)
+    digital_zeros = np.concatenate([map_roots(zeros, conversion, sampling_time, prewarp_freq), -np.ones(n_infinite)])
+    return digital_zeros, map_roots(poles, conversion, sampling_time, prewarp_freq)
+
+
+@dataclass
+class ConversionComparison:
+    """the analog filter and its conversions on a common frequency axis, one row per filter"""
+    sampling_time: float
+    prewarp_freq: float | None
+    labels: list[str]
+    freqs: NDArray = field(repr=False)
+    zeros: NDArray = field(repr=False)
+    poles: NDArray = field(repr=False)
+    complex_f_resp: NDArray = field(repr=False)
+    normalized_abs_f_resp: NDArray = field(repr=False)
+
+
+def compare_conversions(model: Model, sampling_time: float, prewarp_freq: float | None = None,
+                        n_points: int = comparison_points) -> ConversionComparison:
+    assert model.type == ModelType.ANALOG, "only analog models can be converted"
+    freqs = np.linspace(0, 1 / (2 * sampling_time), n_points)
+    analog_zeros = np.asarray(build_repeated_item_list_from_dict(model.zeros), dtype=complex)
+    analog_poles = np.asarray(build_repeated_item_list_from_dict(model.poles), dtype=complex)
+    root_sets = [(analog_zeros, analog_poles)] + [get_digital_roots(analog_zeros, analog_poles, conversion,
+                                                                    sampling_time, prewarp_freq)
+                                                  for conversion in Conversion]
+    zeros = batch_eval.stack_root_sets([zeros for zeros, _ in root_sets])
+    poles = batch_eval.stack_root_sets([poles for _, poles in root_sets])
+    # the analog row is evaluated at s = j*2*pi*f, the digital rows on the unit circle at the same frequencies
+    digital_points = batch_eval.get_digital_points(freqs, sampling_time)
+    points = np.stack([batch_eval.get_analog_points(2 * np.pi * freqs)] + [digital_points] * len(Conversion))
+    complex_f_resp = batch_eval.batch_freq_resp(zeros, poles, points)
+    # the digital rows get the phase freqz would give them, like the model's own digital lines
+    complex_f_resp[1:] *= batch_eval.get_freqz_factor(zeros[1:], poles[1:], digital_points)
+    bilinear_label = "bilinear" if prewarp_freq is None else f"bilinear (prewarped at {prewarp_freq:g} Hz)"
+    return ConversionComparison(sampling_time=sampling_time,
+                                prewarp_freq=prewarp_freq,
+                                labels=["analog", bilinear_label, "matched z"],
+                                freqs=freqs,
+                                zeros=zeros,
+                                poles=poles,
+                                complex_f_resp=complex_f_resp,
+                                normalized_abs_f_resp=batch_eval.normalize_magnitudes(complex_f_resp))
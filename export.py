@@ -0,0 +1,312 @@
+"""Headless export of the four plots and the complete model state.
+
+Rendering happens on plain Agg figures, so no Tk window (or display) is needed. Many configurations are exported in
+parallel through a process pool, every worker keeps a single report figure that is cleared and redrawn per configuration.
+
+The frequency sweep animation can be exported the same way: frames are rendered by the pool from per frame data that
+is computed once and shared with the workers through shared memory, then put together in order as GIF, MP4 (needs
+ffmpeg) or a PNG sequence.
+
+usage: python export.py states.json -o exports --formats png pdf svg --workers 8 [--animation gif]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+from numpy.typing import NDArray
+from PIL import Image
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from model import Model
+import utilities
+import shared_results
+import archive
+
+EXPORT_FORMATS = ("png", "pdf", "svg")
+report_fig_size = (10, 10)
+animation_dpi = 80
+frame_file_pattern = "frame_%05d.png"
+
+# panel name -> (row, column, draw function), same arrangement as the FilterVisualFrame in the GUI
+REPORT_PANELS = {
+    "pole_zero": (0, 0, utilities.draw_freq_domain),
+    "time": (1, 0, utilities.draw_time_response),
+    "magnitude": (0, 1, utilities.draw_freq_resp),
+    "phase": (1, 1, utilities.draw_phase_resp),
+}
+
+
+class ReportTemplate:
+    """a 2x2 Agg figure whose axes are cleared and refilled for every model instead of building new figures"""
+
+    def __init__(self) -> None:
+        self.fig = Figure(figsize=report_fig_size)
+        FigureCanvasAgg(self.fig)
+        axes = self.fig.subplots(2, 2)
+        self.panels = {name: axes[row, column] for name, (row, column, _) in REPORT_PANELS.items()}
+
+    def render(self, model: Model) -> None:
+        for name, ax in self.panels.items():
+            ax.clear()
+            REPORT_PANELS[name][2](ax, model)
+        self.fig.tight_layout()
+
+    def save(self, path_stem: str, formats: tuple[str, ...], separate_panels: bool = False) -> list[str]:
+        written = []
+        for fmt in formats:
+            path = f"{path_stem}.{fmt}"
+            self.fig.savefig(path, format=fmt)
+            written.append(path)
+        if separate_panels:
+            renderer = self.fig.canvas.get_renderer()
+            for name, ax in self.panels.items():
+                bbox = ax.get_tightbbox(renderer).transformed(self.fig.dpi_scale_trans.inverted())
+                for fmt in formats:
+                    path = f"{path_stem}_{name}.{fmt}"
+                    self.fig.savefig(path, format=fmt, bbox_inches=bbox)
+                    written.append(path)
+        return written
+
+
+def save_state_file(model: Model, path: str) -> str:
+    with open(path, "w") as file:
+        json.dump(model.get_state_dict(), file, indent=2)
+    return path
+
+
+def export_model(model: Model, out_dir: str, name: str, formats: tuple[str, ...] = EXPORT_FORMATS,
+                 separate_panels: bool = False, template: ReportTemplate | None = None) -> list[str]:
+    template = template if template else ReportTemplate()
+    os.makedirs(out_dir, exist_ok=True)
+    path_stem = os.path.join(out_dir, name)
+    template.render(model)
+    written = template.save(path_stem, formats, separate_panels)
+    written.append(save_state_file(model, f"{path_stem}.json"))
+    return written
+
+
+# each worker process creates its template once in the pool initializer and reuses it for all of its jobs
+_worker_template: ReportTemplate | None = None
+
+
+def _init_worker(archive_dir: str | None = None) -> None:
+    global _worker_template
+    _worker_template = ReportTemplate()
+    # every worker opens the archive itself, the directory is shared between them (and with later runs)
+    if archive_dir is not None:
+        archive.open_archive(archive_dir)
+
+
+def _export_job(job: tuple[dict, str, str, tuple[str, ...], bool]) -> list[str]:
+    state, out_dir, name, formats, separate_panels = job
+    model = Model()
+    model.load_state_dict(state)
+    return export_model(model, out_dir, name, formats, separate_panels, template=_worker_template)
+
+
+def export_configurations(states: list[dict], out_dir: str, formats: tuple[str, ...] = EXPORT_FORMATS,
+                          workers: int | None = None, separate_panels: bool = False,
+                          archive_dir: str | None = None) -> list[list[str]]:
+    """exports every state (as produced by Model.get_state_dict, optionally with a "name") in a process pool and
+    returns the written files per configuration, in the order of the given states. With an archive_dir, results
+    evaluated by earlier runs are read from the archive there instead of being computed again"""
+    for fmt in formats:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"unsupported export format {fmt}, choose from {EXPORT_FORMATS}")
+    jobs = [(state, out_dir, state.get("name", f"config_{i:04d}"), tuple(formats), separate_panels)
+            for i, state in enumerate(states)]
+    if not jobs:
+        return []
+    workers = workers if workers else os.cpu_count()
+    chunksize = max(len(jobs) // (4 * workers), 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(archive_dir,)) as pool:
+        return list(pool.map(_export_job, jobs, chunksize=chunksize))
+
+
+@dataclass
+class SweepFrameData:
+    """everything the sweep animation shows per frame, computed for all frames at once"""
+    freqs: NDArray
+    pointers: NDArray
+    pole_dist: NDArray
+    zero_dist: NDArray
+    gain: NDArray
+    phase: NDArray
+
+
+def get_sweep_frame_data(model: Model) -> SweepFrameData:
+    freqs = np.asarray(model.freqs)
+    if model.type.name == "DIGITAL":
+        pointers = np.exp(2j * np.pi * freqs / model.sampling_frequency)
+    else:
+        pointers = 1j * freqs
+    # like the live animation, every pole/zero location contributes one distance (its vector on the map)
+    pole_dist = np.prod(np.abs(pointers[:, None] - np.asarray(list(model.poles.keys()), dtype=complex)), axis=1)
+    zero_dist = np.prod(np.abs(pointers[:, None] - np.asarray(list(model.zeros.keys()), dtype=complex)), axis=1)
+    return SweepFrameData(freqs=freqs,
+                          pointers=pointers,
+                          pole_dist=pole_dist,
+                          zero_dist=zero_dist,
+                          gain=np.asarray(model.normalized_abs_f_resp),
+                          phase=utilities.get_normalized_phase_resp(model))
+
+
+class SweepAnimationTemplate:
+    """the animation figure of one model. The static plots are rendered once, every frame only blits the vectors,
+    pointers and labels on top of that background"""
+
+    def __init__(self, model: Model, include_phase: bool = True, dpi: int = animation_dpi) -> None:
+        n_axes = 3 if include_phase else 2
+        self.fig = Figure(figsize=(5 * n_axes, 5), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        axes = self.fig.subplots(1, n_axes)
+        utilities.draw_freq_domain(axes[0], model)
+        utilities.draw_freq_resp(axes[1], model)
+        if include_phase:
+            utilities.draw_phase_resp(axes[2], model)
+        self.fig.tight_layout()
+        for ax in axes:
+            # the animated artists must not change the limits of the static background
+            ax.set_autoscale_on(False)
+
+        self.is_digital = model.type.name == "DIGITAL"
+        self.roots = [(pole, "r") for pole in model.poles.keys()] + [(zero, "g") for zero in model.zeros.keys()]
+        self.root_lines = [axes[0].plot([0, np.real(root)], [0, np.imag(root)], color=color, animated=True)[0]
+                           for root, color in self.roots]
+        self.pointers = [axes[0].scatter([0], [0], marker="o", color="b", s=50, animated=True),
+                         axes[1].scatter([0], [0], marker="o", color="b", s=100, animated=True)]
+        self.labels = [axes[0].text(0.02, 0.98, "", transform=axes[0].transAxes, va="top", animated=True),
+                       axes[1].text(0.02, 0.98, "", transform=axes[1].transAxes, va="top", animated=True)]
+        if include_phase:
+            self.pointers.append(axes[2].scatter([0], [0], marker="o", color="b", s=100, animated=True))
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def render(self, frame: int, data: SweepFrameData) -> NDArray:
+        pointer = data.pointers[frame]
+        for line, (root, _) in zip(self.root_lines, self.roots):
+            line.set_data([np.real(pointer), np.real(root)], [np.imag(pointer), np.imag(root)])
+        self.pointers[0].set_offsets([np.real(pointer), np.imag(pointer)])
+        self.pointers[1].set_offsets([data.freqs[frame], data.gain[frame]])
+        if len(self.pointers) > 2:
+            self.pointers[2].set_offsets([data.freqs[frame], data.phase[frame]])
+        self.labels[0].set_text(f"pole distance {data.pole_dist[frame]:.3f}\n"
+                                f"zero distance {data.zero_dist[frame]:.3f}")
+        unit = "Hz" if self.is_digital else "rad/s"
+        self.labels[1].set_text(f"gain {data.gain[frame]:.3f}, f = {data.freqs[frame]:.2f} {unit}")
+
+        self.canvas.restore_region(self.background)
+        for artist in self.root_lines + self.pointers + self.labels:
+            self.fig.draw_artist(artist)
+        return np.asarray(self.canvas.buffer_rgba())
+
+
+def _render_frames_job(job: tuple[dict, list[tuple[int, int]], str, bool]) -> int:
+    state, numbered_frames, frame_dir, include_phase = job
+    model = Model()
+    model.load_state_dict(state)
+    # the per frame data was computed once by the main process and is read from shared memory
+    data = SweepFrameData(**shared_results.get_worker_arrays())
+    template = SweepAnimationTemplate(model, include_phase)
+    for number, frame in numbered_frames:
+        Image.fromarray(template.render(frame, data)).convert("RGB").save(
+            os.path.join(frame_dir, frame_file_pattern % number))
+    return len(numbered_frames)
+
+
+def render_sweep_frames(model: Model, frame_dir: str, workers: int | None = None, frame_step: int = 1,
+                        include_phase: bool = True) -> list[str]:
+    """renders the frames of the sweep animation as PNG files numbered 0, 1, 2, ... without gaps (whatever the
+    frame_step, ffmpeg stops at the first missing number), contiguous blocks of frames are spread over a process pool
+    (each worker sets up its figure once per block)"""
+    os.makedirs(frame_dir, exist_ok=True)
+    frames = list(range(0, len(model.freqs), frame_step))
+    if not frames:
+        return []
+    workers = workers if workers else os.cpu_count()
+    n_blocks = min(4 * workers, len(frames))
+    blocks = [block.tolist() for block in np.array_split(np.array(list(enumerate(frames))), n_blocks)]
+    state = model.get_state_dict()
+    with shared_results.SharedResultStore() as store:
+        for key, array in vars(get_sweep_frame_data(model)).items():
+            store.put(key, array)
+        with ProcessPoolExecutor(max_workers=workers, initializer=shared_results.init_worker,
+                                 initargs=(store.specs,)) as pool:
+            list(pool.map(_render_frames_job, [(state, block, frame_dir, include_phase) for block in blocks]))
+    return [os.path.join(frame_dir, frame_file_pattern % number) for number in range(len(frames))]
+
+
+def get_ffmpeg_path() -> str:
+    ffmpeg_path = shutil.which(matplotlib.rcParams["animation.ffmpeg_path"]) or shutil.which("ffmpeg")
+    if not ffmpeg_path:
+        raise RuntimeError("ffmpeg is needed to write mp4 files, export a gif or png sequence instead")
+    return ffmpeg_path
+
+
+def export_sweep_animation(model: Model, path: str, fps: int = 30, workers: int | None = None,
+                           frame_step: int = 1, include_phase: bool = True) -> str:
+    """writes the frequency sweep animation without a display. path ending in .gif or .mp4 gives a single file,
+    any other path is used as directory for the PNG sequence"""
+    fmt = os.path.splitext(path)[1].lower()
+    if fmt not in (".gif", ".mp4"):
+        render_sweep_frames(model, path, workers, frame_step, include_phase)
+        return path
+
+    with tempfile.TemporaryDirectory() as frame_dir:
+        frame_paths = render_sweep_frames(model, frame_dir, workers, frame_step, include_phase)
+        if not frame_paths:
+            raise ValueError("the model has no frequency response to animate")
+        if fmt == ".gif":
+            # the PNG files are opened lazily, but Pillow keeps every frame until the gif is written. Long
+            # animations are better exported as mp4 (streamed by ffmpeg) or as png sequence
+            first, *rest = frame_paths
+            with Image.open(first) as first_image:
+                first_image.save(path, save_all=True, append_images=(Image.open(p) for p in rest),
+                                 duration=int(1000 / fps), loop=0)
+        else:
+            subprocess.run([get_ffmpeg_path(), "-y", "-loglevel", "error",
+                            "-framerate", str(fps), "-start_number", "0", "-i", os.path.join(frame_dir, frame_file_pattern),
+                            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", path], check=True)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="export plots and state files for many filter configurations")
+    parser.add_argument("states", help="json file with one state or a list of states")
+    parser.add_argument("-o", "--out-dir", default="exports")
+    parser.add_argument("--formats", nargs="+", default=list(EXPORT_FORMATS), choices=EXPORT_FORMATS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--panels", action="store_true", help="additionally save every plot as its own file")
+    parser.add_argument("--animation", choices=["gif", "mp4", "png"],
+                        help="also export the frequency sweep animation of every configuration")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--archive", nargs="?", const=archive.default_archive_dir, default=None, metavar="DIR",
+                        help="reuse results of earlier runs from a persistent archive (default: %(const)s)")
+    args = parser.parse_args()
+    if args.archive:
+        archive.open_archive(args.archive)
+
+    with open(args.states, "r") as file:
+        states = json.load(file)
+    states = states if isinstance(states, list) else [states]
+    results = export_configurations(states, args.out_dir, tuple(args.formats), args.workers, args.panels,
+                                    archive_dir=args.archive)
+    print(f"exported {len(results)} configurations to {args.out_dir}")
+    if args.animation:
+        for i, state in enumerate(states):
+            model = Model()
+            model.load_state_dict(state)
+            name = state.get("name", f"config_{i:04d}")
+            suffix = "" if args.animation == "png" else f".{args.animation}"
+            export_sweep_animation(model, os.path.join(args.out_dir, f"{name}_sweep{suffix}"), args.fps, args.workers)
+        print(f"exported {len(states)} sweep animations to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
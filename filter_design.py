@@ -0,0 +1,149 @@
+"""Filter presets designed from a specification instead of the fixed root sets in config.json.
+
+Butterworth, Chebyshev (type I and II) and elliptic prototypes are designed with scipy directly as poles and zeros
+(never as polynomials, which lose precision at high orders) and loaded into the Model as roots. Every design is kept
+in an on-disk cache keyed by its specification, so designing the same filter again (also in a later session) only
+reads a small json file.
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass, asdict
+from scipy.signal import iirfilter
+from model import FilterType, ModelType, get_list_from_roots_dict, get_roots_dict_from_list
+import root_import
+
+design_cache_dir = "design_cache"
+
+STRING_2_PROTOTYPE = {"butter": "butter", "butterworth": "butter",
+                      "cheby1": "cheby1", "chebyshev1": "cheby1",
+                      "cheby2": "cheby2", "chebyshev2": "cheby2",
+                      "ellip": "ellip", "elliptic": "ellip"}
+
+FILTERTYPE_2_BTYPE = {FilterType.TP: "lowpass",
+                      FilterType.HP: "highpass",
+                      FilterType.BP: "bandpass",
+                      FilterType.BS: "bandstop"}
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """cutoffs are in Hz for digital filters (together with the sampling frequency fs) and in rad/s for analog ones,
+    the same units as the frequency axis of the model. rp is the passband ripple and rs the stopband attenuation in
+    dB, they are only used by the prototypes that need them"""
+    prototype: str
+    filter: str
+    order: int
+    cutoffs: tuple[float, ...]
+    analog: bool
+    fs: float | None = None
+    rp: float | None = None
+    rs: float | None = None
+
+    def cache_key(self) -> str:
+        return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode()).hexdigest()[:32]
+
+
+def get_filter_spec(model_type: ModelType, filter: FilterType, prototype: str, order: int, cutoffs: list[float],
+                    rp: float | None = None, rs: float | None = None,
+                    sampling_frequency: float | None = None) -> FilterSpec:
+    if filter not in FILTERTYPE_2_BTYPE:
+        raise ValueError(f"{filter.name} filters can not be designed from a specification")
+    if prototype.lower() not in STRING_2_PROTOTYPE:
+        raise ValueError(f"unknown prototype {prototype}, use one of {', '.join(STRING_2_PROTOTYPE)}")
+    prototype = STRING_2_PROTOTYPE[prototype.lower()]
+    n_cutoffs = 2 if filter in (FilterType.BP, FilterType.BS) else 1
+    if len(cutoffs) != n_cutoffs:
+        raise ValueError(f"{filter.name} filters need {n_cutoffs} cutoff frequencies")
+    if order < 1:
+        raise ValueError("the order has to be at least 1")
+    if prototype in ("cheby1", "ellip") and rp is None:
+        raise ValueError(f"{prototype} filters need a passband ripple")
+    if prototype in ("cheby2", "ellip") and rs is None:
+        raise ValueError(f"{prototype} filters need a stopband attenuation")
+    analog = model_type == ModelType.ANALOG
+    return FilterSpec(prototype=prototype,
+                      filter=filter.name,
+                      order=int(order),
+                      cutoffs=tuple(float(cutoff) for cutoff in cutoffs),
+                      analog=analog,
+                      fs=None if analog else float(sampling_frequency),
+                      rp=rp if prototype in ("cheby1", "ellip") else None,
+                      rs=rs if prototype in ("cheby2", "ellip") else None)
+
+
+def design_roots(spec: FilterSpec) -> tuple[dict[complex, int], dict[complex, int]]:
+    """poles and zeros dicts of the designed filter, the gain is dropped like for every model"""
+    cutoffs = spec.cutoffs[0] if len(spec.cutoffs) == 1 else list(spec.cutoffs)
+    z, p, k = iirfilter(spec.order, cutoffs, rp=spec.rp, rs=spec.rs, btype=FILTERTYPE_2_BTYPE[FilterType[spec.filter]],
+                        analog=spec.analog, ftype=spec.prototype, output="zpk", fs=spec.fs)
+    # roots of high order designs are only conjugate to rounding precision, they are paired and merged here
+    return root_import.get_roots_dicts_from_zpk(z, p, k)
+
+
+class DesignCache:
+    """designs by specification, kept in memory and as one json file per design in cache_dir"""
+
+    def __init__(self, cache_dir: str = design_cache_dir) -> None:
+        self.cache_dir = cache_dir
+        self._designs: dict[FilterSpec, tuple[dict[complex, int], dict[complex, int]]] = {}
+
+    def _path(self, spec: FilterSpec) -> str:
+        return os.path.join(self.cache_dir, f"{spec.cache_key()}.json")
+
+    def _read(self, spec: FilterSpec) -> tuple[dict[complex, int], dict[complex, int]] | None:
+        try:
+            with open(self._path(spec), "r") as file:
+                content = json.load(file)
+        except (OSError, ValueError):
+            return None
+        # a (very unlikely) hash collision must not load another filter
+        if content.get("spec") != json.loads(json.dumps(asdict(spec))):
+            return None
+        return get_roots_dict_from_list(content["poles"]), get_roots_dict_from_list(content["zeros"])
+
+    def _write(self, spec: FilterSpec, poles: dict[complex, int], zeros: dict[complex, int]) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(spec)
+        # written under a temporary name first, so a crash never leaves half a file behind
+        with open(f"{path}.tmp", "w") as file:
+            json.dump({"spec": asdict(spec),
+                       "poles": get_list_from_roots_dict(poles),
+                       "zeros": get_list_from_roots_dict(zeros)}, file)
+        os.replace(f"{path}.tmp", path)
+
+    def get(self, spec: FilterSpec) -> tuple[dict[complex, int], dict[complex, int]]:
+        if spec not in self._designs:
+            design = self._read(spec)
+            if design is None:
+                design = design_roots(spec)
+                try:
+                    self._write(spec, *design)
+                except OSError:
+                    ...
+            self._designs[spec] = design
+        poles, zeros = self._designs[spec]
+        # the model changes its root dicts in place (manual entries), the cached ones have to stay untouched
+        return dict(poles), dict(zeros)
+
+
+design_cache = DesignCache()
+
+
+def parse_design_text(text: str) -> tuple[str, FilterType, int, list[float], float | None, float | None]:
+    """prototype, filter, order, cutoffs, rp and rs of a dialog text like
+        "butter TP 8 1000", "cheby1 BP 6 500 1500 rp=1" or "ellip BS 8 300 900 rp=0.5 rs=60" """
+    words = text.split()
+    if len(words) < 4:
+        raise ValueError("a design needs a prototype, filter type, order and cutoff frequencies")
+    prototype, filter_str, order = words[0], words[1].upper(), int(words[2])
+    if filter_str not in FilterType.__members__:
+        raise ValueError(f"unknown filter type {words[1]}, use TP, HP, BP or BS")
+    cutoffs, options = [], {}
+    for word in words[3:]:
+        if "=" in word:
+            name, value = word.split("=", 1)
+            options[name.lower()] = float(value)
+        else:
+            cutoffs.append(float(word))
+    return prototype, FilterType[filter_str], order, cutoffs, options.get("rp"), options.get("rs")
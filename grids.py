@@ -0,0 +1,161 @@
+"""Frequency grids and the tables that only depend on them, shared by all models and evaluations.
+
+A grid is fully described by a small GridSpec: the number of points plus fs for digital grids (freqz with whole=True)
+or the decades of the logarithmic grid that scipy's freqs picks for analog filters. For every spec the cache keeps the
+frequencies, the evaluation points (e^{-jw} for digital, jw for analog) and the powers of the points up to the highest
+order evaluated so far. Evaluating a filter on a cached grid is then only the product of its coefficients with the
+power table. The least recently used grids are evicted when there are too many or they take too much memory.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import numpy as np
+from numpy.typing import NDArray
+
+# the defaults of freqz and freqs
+digital_grid_points = 512
+analog_grid_points = 200
+max_grids = 32
+max_grid_bytes = 64 * 2 ** 20
+
+
+@dataclass(frozen=True)
+class GridSpec:
+    analog: bool
+    n_points: int
+    # digital grids
+    fs: float | None = None
+    # analog grids, 10**low_decade ... 10**high_decade
+    low_decade: int | None = None
+    high_decade: int | None = None
+
+
+def get_digital_spec(fs: float, n_points: int = digital_grid_points) -> GridSpec:
+    return GridSpec(analog=False, n_points=n_points, fs=float(fs))
+
+
+def get_digital_freqs(fs: float, n_points: int = digital_grid_points) -> NDArray:
+    # frequencies of the digital grid, the normalized points e^{-jw} are the same for every fs
+    return np.arange(n_points) * (fs / n_points)
+
+
+def get_analog_spec(zeros, poles, n_points: int = analog_grid_points) -> GridSpec:
+    """the grid freqs would pick for a filter with these roots. Same decades as scipy's findfreqs(..., kind="zp"),
+    computed directly from the roots instead of through findfreqs, which takes longer than the evaluation itself"""
+    zeros, poles = np.atleast_1d(np.asarray(zeros, dtype=complex)), np.atleast_1d(np.asarray(poles, dtype=complex))
+    if len(poles) == 0:
+        poles = np.array([-1000], dtype=complex)
+    roots = np.concatenate([poles[poles.imag >= 0], zeros[(np.abs(zeros) < 1e5) & (zeros.imag >= 0)]])
+    at_origin = np.abs(roots) < 1e-10
+    high = np.round(np.log10(np.max(3 * np.abs(roots.real + at_origin) + 1.5 * roots.imag)) + 0.5)
+    low = np.round(np.log10(0.1 * np.min(np.abs((roots + at_origin).real) + 2 * roots.imag)) - 0.5)
+    return GridSpec(analog=True, n_points=n_points, low_decade=int(low), high_decade=int(high))
+
+
+def _read_only(array: NDArray) -> NDArray:
+    # the tables are shared by every model on the grid, nobody may change them in place
+    array.flags.writeable = False
+    return array
+
+
+@dataclass
+class GridTables:
+    spec: GridSpec
+    freqs: NDArray = field(repr=False)
+    points: NDArray = field(repr=False)
+    powers: NDArray = field(repr=False)
+
+    @classmethod
+    def build(cls, spec: GridSpec) -> "GridTables":
+        if spec.analog:
+            freqs = np.logspace(spec.low_decade, spec.high_decade, spec.n_points)
+            # polynomials in s: num[-1] + num[-2]*s + ...
+            points = 1j * freqs
+        else:
+            freqs = get_digital_freqs(spec.fs, spec.n_points)
+            # polynomials in z^-1: num[0] + num[1]*z^-1 + ...
+            points = np.exp(-2j * np.pi * np.arange(spec.n_points) / spec.n_points)
+        return cls(spec, _read_only(freqs), _read_only(points), _read_only(np.ones((1, spec.n_points), complex)))
+
+    @property
+    def nbytes(self) -> int:
+        return self.freqs.nbytes + self.points.nbytes + self.powers.nbytes
+
+    @property
+    def order(self) -> int:
+        return len(self.powers) - 1
+
+    def get_powers(self, order: int) -> NDArray:
+        """points**0 ... points**order, one row per power"""
+        if order > self.order:
+            # grown to at least twice the size, so raising the order one by one does not rebuild the table every time
+            exponents = np.arange(max(order, 2 * self.order) + 1)[:, None]
+            if self.spec.analog:
+                powers = self.points ** exponents
+            else:
+                # exact angles instead of repeated products, the error would grow with the order otherwise
+                powers = np.exp(-2j * np.pi * ((exponents * np.arange(self.spec.n_points)) % self.spec.n_points)
+                                / self.spec.n_points)
+            self.powers = _read_only(powers)
+        return self.powers[:order + 1]
+
+    def evaluate(self, num, denom) -> NDArray:
+        """num/denom on the grid, same result as freqz(num, denom, whole=True, fs=fs) or freqs(num, denom) on it"""
+        num, denom = np.atleast_1d(num), np.atleast_1d(denom)
+        powers = self.get_powers(max(len(num), len(denom)) - 1)
+        if self.spec.analog:
+            # highest power first in scipy's coefficient order
+            num, denom = num[::-1], denom[::-1]
+        return (num @ powers[:len(num)]) / (denom @ powers[:len(denom)])
+
+
+class GridCache:
+    def __init__(self, max_grids: int = max_grids, max_bytes: int = max_grid_bytes) -> None:
+        self.max_grids = max_grids
+        self.max_bytes = max_bytes
+        self._tables: OrderedDict[GridSpec, GridTables] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # the GUI and the evaluation service (from its executor thread) share the cache. The evaluation itself runs
+        # unlocked: a grown power table replaces the old array, which other threads may still read
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._tables)
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(tables.nbytes for tables in self._tables.values())
+
+    def get(self, spec: GridSpec) -> GridTables:
+        with self._lock:
+            tables = self._tables.get(spec)
+            if tables is not None:
+                self.hits += 1
+                self._tables.move_to_end(spec)
+                return tables
+            self.misses += 1
+            tables = self._tables[spec] = GridTables.build(spec)
+            self.evict()
+            return tables
+
+    def evaluate(self, spec: GridSpec, num, denom) -> tuple[NDArray, NDArray]:
+        tables = self.get(spec)
+        response = tables.evaluate(num, denom)
+        # power tables grow with the order, the memory limit is checked again afterwards
+        self.evict()
+        return tables.freqs, response
+
+    def evict(self) -> None:
+        # the most recently used grid always stays
+        with self._lock:
+            while len(self._tables) > 1 and (len(self._tables) > self.max_grids or self.nbytes > self.max_bytes):
+                self._tables.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+
+
+grid_cache = GridCache()
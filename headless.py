@@ -0,0 +1,193 @@
+"""A frontend for the presenter that needs no display.
+
+HeadlessApp has the surface of view.App the presenter uses (see presenter.Frontend), but keeps the plots as plain Agg
+figures and answers dialogs from a dict filled beforehand. Neither Tk, customtkinter nor pyplot are imported, so
+scripts, benchmarks and servers can drive the complete presenter pipeline without any GUI or figure manager overhead.
+
+    app = HeadlessApp()
+    presenter = Presenter(model=Model(), app=app)
+    presenter.run()
+    app.side_frame.answers["sweep"] = "radius 0.5 0.99 200"
+    presenter.run_sweep()
+    app.save_plots("plots")
+"""
+import os
+from typing import Any, Callable
+import numpy as np
+import utilities
+from model import STRING_2_MODELTYPE, STRING_2_FILTERTYPE, STRING_2_TIMERESPONSE
+
+# same values the option menus of the GUI start with (view.get_initial_ui_values)
+initial_ui_values = ("Analog", "Band stop", "Impulse response")
+
+
+class Selection:
+    """stands in for an option menu or a switch, get() returns what was set last"""
+
+    def __init__(self, value: Any = None) -> None:
+        self.value = value
+
+    def get(self) -> Any:
+        return self.value
+
+    def set(self, value: Any) -> None:
+        self.value = value
+
+
+class HeadlessSideFrame:
+    def __init__(self) -> None:
+        self.optionmenu_model = Selection(initial_ui_values[0])
+        self.optionmenu_filter = Selection(initial_ui_values[1])
+        self.optionmenu_response = Selection(initial_ui_values[2])
+        self.surface_switch = Selection(0)
+        self.timed_animation_switch = Selection(1)
+        self.high_resolution_switch = Selection(0)
+        self.spectral_time_switch = Selection(0)
+        self.reduction_switch = Selection(0)
+        # log10(fs) like the slider of the GUI
+        self.fs_slider = Selection(2)
+        self.fs_button_enabled = False
+        self.status_text = ""
+        # dialog name -> answer of the next dialog of that name, a dialog without an answer is cancelled (None)
+        self.answers: dict[str, Any] = {}
+
+    def get_answer(self, dialog: str) -> Any:
+        return self.answers.pop(dialog, None)
+
+    def open_fs_input_dialog_event(self) -> float | None:
+        return self.get_answer("fs")
+
+    def open_sweep_input_dialog_event(self) -> str | None:
+        return self.get_answer("sweep")
+
+    def open_design_input_dialog_event(self) -> str | None:
+        return self.get_answer("design")
+
+    def open_conversion_input_dialog_event(self) -> str | None:
+        return self.get_answer("conversion")
+
+    def open_save_directory_dialog_event(self) -> str | None:
+        return self.get_answer("save_directory")
+
+    def open_import_file_dialog_event(self) -> str | None:
+        return self.get_answer("import_file")
+
+    def disable_fs_button(self) -> None:
+        self.fs_button_enabled = False
+
+    def enable_fs_button(self) -> None:
+        self.fs_button_enabled = True
+
+    def show_animation_stats(self, stats) -> None:
+        self.status_text = str(stats)
+
+    def show_memory_report(self, report) -> None:
+        self.status_text = str(report)
+
+    def show_reduction_report(self, report) -> None:
+        self.status_text = "no reduction" if report is None else str(report)
+
+    def show_time_resp_error(self, error: float | None) -> None:
+        self.status_text = "time response simulated" if error is None else f"time response error <= {error:.1e}"
+
+    def show_error(self, title: str, message: str) -> None:
+        self.status_text = f"{title}: {message}"
+
+    def show_model_settings(self, model) -> None:
+        for selection, string_2_value, value in [(self.optionmenu_model, STRING_2_MODELTYPE, model.type),
+                                                 (self.optionmenu_filter, STRING_2_FILTERTYPE, model.filter),
+                                                 (self.optionmenu_response, STRING_2_TIMERESPONSE, model.time_resp)]:
+            for string, candidate in string_2_value.items():
+                if candidate == value:
+                    selection.set(string)
+        for switch, on in [(self.surface_switch, model.show_magnitude_surface),
+                           (self.high_resolution_switch, model.high_resolution_points is not None),
+                           (self.spectral_time_switch, model.time_resp_from_spectrum),
+                           (self.reduction_switch, model.reduction_tolerance is not None)]:
+            switch.set(int(on))
+        if model.type.name == "DIGITAL":
+            self.fs_slider.set(float(np.log10(model.sampling_frequency)))
+
+
+class HeadlessRootFrame:
+    """the manual pole/zero panels, without any rows nothing is ever typed in"""
+
+    def __init__(self) -> None:
+        self.zeros_2_display = []
+        self.poles_2_display = []
+
+    def collect_entry_values(self) -> None:
+        ...
+
+    def grid_manual_pole_entries(self) -> None:
+        ...
+
+    def grid_manual_zero_entries(self) -> None:
+        ...
+
+    def wipe_manual_pole_entries(self) -> None:
+        ...
+
+    def wipe_manual_zero_entries(self) -> None:
+        ...
+
+
+class HeadlessApp:
+    def __init__(self) -> None:
+        self.presenter = None
+        self.side_frame = HeadlessSideFrame()
+        self.pole_number_frame = HeadlessRootFrame()
+        self.zero_number_frame = HeadlessRootFrame()
+        # panel name (utilities.PLOT_PANELS) -> figure currently shown there
+        self.figures = {}
+        self._jobs: dict[str, Callable] = {}
+        self._next_job = 0
+
+    def init_ui(self, presenter) -> None:
+        self.presenter = presenter
+        self.refresh_plots()
+
+    def get_initial_ui_values(self) -> tuple[str, str, str]:
+        return initial_ui_values
+
+    def show_plot(self, panel: str, plotting_func: Callable) -> None:
+        fig, ax = plotting_func()
+        self.figures[panel] = fig
+
+    def refresh_plots(self) -> None:
+        for panel, create_plot in utilities.PLOT_PANELS.items():
+            self.figures[panel] = create_plot(self.presenter.model)[0]
+
+    def attach_figure(self, panel: str, fig):
+        self.figures[panel] = fig
+        return fig.canvas
+
+    def update_plots(self, update: Callable) -> None:
+        for panel, fig in self.figures.items():
+            update(panel, fig)
+
+    # animation_clock.Scheduler, jobs run one after the other in mainloop without waiting for their delay
+
+    def after(self, ms: int, func: Callable) -> str:
+        self._next_job += 1
+        job = f"after#{self._next_job}"
+        self._jobs[job] = func
+        return job
+
+    def after_cancel(self, id: str) -> None:
+        self._jobs.pop(id, None)
+
+    def mainloop(self) -> None:
+        while self._jobs:
+            job = next(iter(self._jobs))
+            self._jobs.pop(job)()
+
+    def save_plots(self, out_dir: str, formats: tuple[str, ...] = ("png",)) -> list[str]:
+        os.makedirs(out_dir, exist_ok=True)
+        written = []
+        for panel, fig in self.figures.items():
+            for fmt in formats:
+                path = os.path.join(out_dir, f"{panel}.{fmt}")
+                fig.savefig(path, format=fmt)
+                written.append(path)
+        return written
@@ -0,0 +1,187 @@
+"""High resolution frequency grids (10^6 to 10^7 points) for filters with very narrow notches or peaks.
+
+The grid is never evaluated as a whole: it is walked in chunks whose size follows from a memory budget, and every chunk
+only leaves behind what the plots need. That is the magnitude and phase (optionally, as float32) and a pixel level
+summary (minimum and maximum per screen column) that is drawn instead of millions of points. The grid itself is
+described by its first frequency and step, frequencies are only generated per chunk.
+"""
+import tracemalloc
+from dataclasses import dataclass, field
+import numpy as np
+from numpy.typing import NDArray
+import batch_eval
+
+default_high_resolution_points = 10 ** 6
+default_max_bytes = 128 * 2 ** 20
+summary_buckets = 2048
+# working set of one grid point while a chunk is evaluated: frequency, evaluation point, response, the two temporaries
+# of every root factor in batch_eval.batch_freq_resp, magnitude, phase and bucket indices come to about 100 bytes
+# (measured with tracemalloc), the rest is margin
+chunk_bytes_per_point = 128
+min_chunk_points = 2 ** 12
+
+
+@dataclass
+class MemoryReport:
+    stored_bytes: int
+    chunk_points: int
+    peak_bytes: int
+    measured_peak_bytes: int | None = None
+
+    def __str__(self) -> str:
+        text = f"stored {self.stored_bytes / 2 ** 20:.1f} MiB, peak <= {self.peak_bytes / 2 ** 20:.1f} MiB"
+        if self.measured_peak_bytes is not None:
+            text += f" (measured {self.measured_peak_bytes / 2 ** 20:.1f} MiB)"
+        return text
+
+
+class PixelSummary:
+    """minimum and maximum of every bucket of a curve that arrives chunk by chunk"""
+
+    def __init__(self, n_points: int, n_buckets: int) -> None:
+        self.n_points = n_points
+        self.n_buckets = max(min(n_buckets, n_points), 1)
+        self.mins = np.full(self.n_buckets, np.inf)
+        self.maxs = np.full(self.n_buckets, -np.inf)
+
+    def add(self, start: int, values: NDArray) -> None:
+        # values are the points start, start + 1, ... of the curve, the chunk may begin or end inside a bucket
+        buckets = (np.arange(start, start + len(values)) * self.n_buckets) // self.n_points
+        firsts = np.flatnonzero(np.diff(buckets, prepend=-1))
+        chunk_buckets = buckets[firsts]
+        self.mins[chunk_buckets] = np.minimum(self.mins[chunk_buckets], np.minimum.reduceat(values, firsts))
+        self.maxs[chunk_buckets] = np.maximum(self.maxs[chunk_buckets], np.maximum.reduceat(values, firsts))
+
+    def get_curve(self, x_first: float, x_step: float) -> tuple[NDArray, NDArray]:
+        # every bucket becomes a vertical stroke from its minimum to its maximum at the bucket center
+        centers = x_first + x_step * (np.arange(self.n_buckets) + 0.5) * self.n_points / self.n_buckets
+        return np.repeat(centers, 2), np.column_stack([self.mins, self.maxs]).ravel()
+
+
+@dataclass
+class HighResResponse:
+    """magnitude (normalized like Model.normalized_abs_f_resp) and phase on the grid f_first + f_step * k,
+    k < n_points. abs_resp and phase are None when they are not stored, only the summaries are kept then"""
+    f_first: float
+    f_step: float
+    n_points: int
+    max_abs_resp: float
+    max_phase: float
+    memory: MemoryReport
+    abs_resp: NDArray | None = field(repr=False)
+    phase: NDArray | None = field(repr=False)
+    summary_freqs: NDArray = field(repr=False)
+    summary_abs: NDArray = field(repr=False)
+    summary_phase: NDArray = field(repr=False)
+
+    @property
+    def f_last(self) -> float:
+        return self.f_first + self.f_step * (self.n_points - 1)
+
+    def arrays(self) -> list[NDArray]:
+        stored = [array for array in (self.abs_resp, self.phase) if array is not None]
+        return stored + [self.summary_freqs, self.summary_abs, self.summary_phase]
+
+    def get_index_range(self, f_low: float, f_high: float) -> tuple[int, int]:
+        start = int(np.clip(np.floor((f_low - self.f_first) / self.f_step), 0, self.n_points))
+        stop = int(np.clip(np.ceil((f_high - self.f_first) / self.f_step) + 1, start, self.n_points))
+        return start, stop
+
+
+def get_chunk_points(max_bytes: int, stored_bytes: int) -> int:
+    return max((max_bytes - stored_bytes) // chunk_bytes_per_point, min_chunk_points)
+
+
+def iter_resp_chunks(model, f_first: float, f_step: float, start: int, stop: int,
+                     chunk_points: int):
+    """(chunk start, complex response) of the grid points start..stop, chunk_points at a time. The response is
+    evaluated from the roots (with the gain of Model.update_num_denom), which stays accurate at orders where the
+    polynomials of zpk2tf do not"""
+    model_poles, model_zeros = model.get_evaluated_roots()
+    zeros = batch_eval.stack_root_sets([np.repeat(list(model_zeros.keys()), list(model_zeros.values()))])
+    poles = batch_eval.stack_root_sets([np.repeat(list(model_poles.keys()), list(model_poles.values()))])
+    gains = np.array([model.get_evaluated_gain()])
+    for chunk_start in range(start, stop, chunk_points):
+        freqs = f_first + f_step * np.arange(chunk_start, min(chunk_start + chunk_points, stop))
+        if model.type.name == "DIGITAL":
+            points = batch_eval.get_digital_points(freqs, model.sampling_time)
+            # phase as freqz gives it for the normal grid
+            yield chunk_start, (batch_eval.batch_freq_resp(zeros, poles, points, gains)
+                                * batch_eval.get_freqz_factor(zeros, poles, points))[0]
+        else:
+            points = batch_eval.get_analog_points(freqs)
+            yield chunk_start, batch_eval.batch_freq_resp(zeros, poles, points, gains)[0]
+
+
+def evaluate_highres(model, n_points: int = default_high_resolution_points, store_arrays: bool = True,
+                     dtype=np.float32, max_bytes: int = default_max_bytes, n_buckets: int = summary_buckets,
+                     measure_memory: bool = False) -> HighResResponse:
+    """evaluates n_points over the frequency range of model.freqs in chunks. Peak memory stays below max_bytes (plus
+    the small summaries), if storing magnitude and phase would not fit the budget only the summaries are kept"""
+    freqs = np.asarray(model.freqs)
+    f_first, f_step = float(freqs[0]), float(freqs[-1] - freqs[0]) / (n_points - 1)
+    itemsize = np.dtype(dtype).itemsize
+    store_arrays = store_arrays and 2 * n_points * itemsize + min_chunk_points * chunk_bytes_per_point <= max_bytes
+    stored_bytes = 2 * n_points * itemsize if store_arrays else 0
+    chunk_points = get_chunk_points(max_bytes, stored_bytes)
+
+    if measure_memory:
+        tracemalloc.start()
+    abs_resp = np.empty(n_points, dtype=dtype) if store_arrays else None
+    phase = np.empty(n_points, dtype=dtype) if store_arrays else None
+    abs_summary, phase_summary = PixelSummary(n_points, n_buckets), PixelSummary(n_points, n_buckets)
+    max_abs_resp, max_phase = 0.0, -np.inf
+    for chunk_start, complex_resp in iter_resp_chunks(model, f_first, f_step, 0, n_points, chunk_points):
+        chunk_abs, chunk_phase = np.abs(complex_resp), np.angle(complex_resp)
+        max_abs_resp = max(max_abs_resp, float(np.max(chunk_abs)))
+        max_phase = max(max_phase, float(np.max(chunk_phase)))
+        abs_summary.add(chunk_start, chunk_abs)
+        phase_summary.add(chunk_start, chunk_phase)
+        if store_arrays:
+            abs_resp[chunk_start:chunk_start + len(chunk_abs)] = chunk_abs
+            phase[chunk_start:chunk_start + len(chunk_phase)] = chunk_phase
+    # normalized in place, like Model.update_freq_resp but without a second full size array
+    if store_arrays and max_abs_resp > 0:
+        abs_resp /= max_abs_resp
+    measured_peak_bytes = None
+    if measure_memory:
+        measured_peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    summary_freqs, summary_abs = abs_summary.get_curve(f_first, f_step)
+    return HighResResponse(f_first=f_first,
+                           f_step=f_step,
+                           n_points=n_points,
+                           max_abs_resp=max_abs_resp,
+                           max_phase=max_phase,
+                           memory=MemoryReport(stored_bytes=stored_bytes,
+                                               chunk_points=chunk_points,
+                                               peak_bytes=stored_bytes + chunk_points * chunk_bytes_per_point,
+                                               measured_peak_bytes=measured_peak_bytes),
+                           abs_resp=abs_resp,
+                           phase=phase,
+                           summary_freqs=summary_freqs,
+                           summary_abs=summary_abs / (max_abs_resp if max_abs_resp > 0 else 1),
+                           summary_phase=phase_summary.get_curve(f_first, f_step)[1])
+
+
+def summarize_band(model, highres: HighResResponse, f_low: float, f_high: float,
+                   n_buckets: int) -> tuple[NDArray, NDArray, NDArray]:
+    """pixel summary of the grid points between f_low and f_high -> (freqs, normalized magnitude, phase). Stored arrays
+    are summarized chunk by chunk, otherwise the points of the band are evaluated again (also in chunks)"""
+    start, stop = highres.get_index_range(f_low, f_high)
+    abs_summary, phase_summary = PixelSummary(stop - start, n_buckets), PixelSummary(stop - start, n_buckets)
+    if highres.abs_resp is not None:
+        chunk_points = get_chunk_points(default_max_bytes, 0)
+        for chunk_start in range(start, stop, chunk_points):
+            chunk_stop = min(chunk_start + chunk_points, stop)
+            abs_summary.add(chunk_start - start, highres.abs_resp[chunk_start:chunk_stop])
+            phase_summary.add(chunk_start - start, highres.phase[chunk_start:chunk_stop])
+    else:
+        for chunk_start, complex_resp in iter_resp_chunks(model, highres.f_first, highres.f_step, start, stop,
+                                                          highres.memory.chunk_points):
+            abs_summary.add(chunk_start - start, np.abs(complex_resp) / (highres.max_abs_resp or 1))
+            phase_summary.add(chunk_start - start, np.angle(complex_resp))
+    band_first = highres.f_first + start * highres.f_step
+    freqs, band_abs = abs_summary.get_curve(band_first, highres.f_step)
+    return freqs, band_abs, phase_summary.get_curve(band_first, highres.f_step)[1]
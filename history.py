@@ -0,0 +1,155 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping
+import numpy as np
+from numpy.typing import NDArray
+from model import Model, ModelType, FilterType, TimeResponse
+from highres import HighResResponse
+from reduction import ReductionReport
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    """an immutable copy of the model together with everything that was already computed for it.
+    Root sets and result arrays are shared with the previous snapshot whenever they did not change."""
+    type: ModelType
+    filter: FilterType
+    time_resp: TimeResponse
+    sampling_time: float
+    poles: Mapping[complex, int]
+    zeros: Mapping[complex, int]
+    num: NDArray = field(repr=False)
+    denom: NDArray = field(repr=False)
+    freqs: NDArray = field(repr=False)
+    complex_f_resp: NDArray = field(repr=False)
+    normalized_abs_f_resp: NDArray = field(repr=False)
+    max_abs_resp: float = field(repr=False)
+    time: NDArray = field(repr=False)
+    time_values: NDArray = field(repr=False)
+    highres: HighResResponse | None = field(repr=False, default=None)
+    time_resp_from_spectrum: bool = False
+    time_resp_error: float | None = field(repr=False, default=None)
+    reduction_tolerance: float | None = None
+    reduction: ReductionReport | None = field(repr=False, default=None)
+
+    def arrays(self) -> list[NDArray]:
+        arrays = [self.num, self.denom, self.freqs, self.complex_f_resp, self.normalized_abs_f_resp,
+                  self.time, self.time_values]
+        return arrays + (self.highres.arrays() if self.highres is not None else [])
+
+
+def _share_roots(roots: dict[complex, int], previous: Mapping[complex, int] | None) -> Mapping[complex, int]:
+    if previous is not None and previous == roots:
+        return previous
+    return MappingProxyType(dict(roots))
+
+
+def _share_array(array, previous: NDArray | None) -> NDArray:
+    array = np.asarray(array)
+    if previous is not None and (array is previous or np.array_equal(array, previous)):
+        return previous
+    return array
+
+
+def take_snapshot(model: Model, previous: ModelSnapshot | None = None) -> ModelSnapshot:
+    return ModelSnapshot(
+        type=model.type,
+        filter=model.filter,
+        time_resp=model.time_resp,
+        sampling_time=model.sampling_time,
+        poles=_share_roots(model.poles, previous.poles if previous else None),
+        zeros=_share_roots(model.zeros, previous.zeros if previous else None),
+        num=_share_array(model.num, previous.num if previous else None),
+        denom=_share_array(model.denom, previous.denom if previous else None),
+        freqs=_share_array(model.freqs, previous.freqs if previous else None),
+        complex_f_resp=_share_array(model.complex_f_resp, previous.complex_f_resp if previous else None),
+        normalized_abs_f_resp=_share_array(model.normalized_abs_f_resp,
+                                           previous.normalized_abs_f_resp if previous else None),
+        max_abs_resp=model.max_abs_resp,
+        time=_share_array(model.time, previous.time if previous else None),
+        time_values=_share_array(model.time_values, previous.time_values if previous else None),
+        # never modified after evaluation, so snapshots simply share it
+        highres=model.highres,
+        time_resp_from_spectrum=model.time_resp_from_spectrum,
+        time_resp_error=model.time_resp_error,
+        reduction_tolerance=model.reduction_tolerance,
+        # a new report is made for every evaluation, so snapshots can share it as well
+        reduction=model.reduction,
+    )
+
+
+def restore_snapshot(model: Model, snapshot: ModelSnapshot) -> None:
+    # nothing is recomputed, the cached results are put back as they are. Root dicts are copied because the model
+    # edits them in place, the arrays are never modified so they can be handed over directly
+    model.type = snapshot.type
+    model.filter = snapshot.filter
+    model.time_resp = snapshot.time_resp
+    model.sampling_time = snapshot.sampling_time
+    model.poles = dict(snapshot.poles)
+    model.zeros = dict(snapshot.zeros)
+    model.num = snapshot.num
+    model.denom = snapshot.denom
+    model.freqs = snapshot.freqs
+    model.complex_f_resp = snapshot.complex_f_resp
+    model.normalized_abs_f_resp = snapshot.normalized_abs_f_resp
+    model.max_abs_resp = snapshot.max_abs_resp
+    model.time = snapshot.time
+    model.time_values = snapshot.time_values
+    model.time_resp_error = snapshot.time_resp_error
+    model.time_resp_from_spectrum = snapshot.time_resp_from_spectrum
+    model.reduction_tolerance = snapshot.reduction_tolerance
+    model.reduction = snapshot.reduction
+    model.highres = snapshot.highres
+    model.high_resolution_points = snapshot.highres.n_points if snapshot.highres is not None else None
+
+
+class ModelHistory:
+    """undo/redo stacks of model snapshots. The top of the undo stack is always the current state.
+    Once the (shared) arrays of all snapshots exceed max_bytes, the oldest snapshots are dropped."""
+
+    def __init__(self, max_bytes: int = 64 * 2 ** 20) -> None:
+        self.max_bytes = max_bytes
+        self._undo_stack: list[ModelSnapshot] = []
+        self._redo_stack: list[ModelSnapshot] = []
+
+    @property
+    def current(self) -> ModelSnapshot | None:
+        return self._undo_stack[-1] if self._undo_stack else None
+
+    @property
+    def can_undo(self) -> bool:
+        return len(self._undo_stack) > 1
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo_stack)
+
+    @property
+    def nbytes(self) -> int:
+        # arrays shared between snapshots are only counted once
+        unique_arrays = {id(array): array for snapshot in self._undo_stack + self._redo_stack
+                         for array in snapshot.arrays()}
+        return sum(array.nbytes for array in unique_arrays.values())
+
+    def record(self, model: Model) -> ModelSnapshot:
+        snapshot = take_snapshot(model, previous=self.current)
+        self._undo_stack.append(snapshot)
+        self._redo_stack.clear()
+        self._enforce_memory_cap()
+        return snapshot
+
+    def undo(self) -> ModelSnapshot | None:
+        if not self.can_undo:
+            return None
+        self._redo_stack.append(self._undo_stack.pop())
+        return self.current
+
+    def redo(self) -> ModelSnapshot | None:
+        if not self.can_redo:
+            return None
+        self._undo_stack.append(self._redo_stack.pop())
+        return self.current
+
+    def _enforce_memory_cap(self) -> None:
+        while self.nbytes > self.max_bytes and len(self._undo_stack) > 1:
+            self._undo_stack.pop(0)
@@ -1,13 +1,35 @@
+import argparse
 from view import App
 from model import Model
 from presenter import Presenter
+import stall_watchdog
+import archive
 
 
 def main():
+    parser = argparse.ArgumentParser(description="pole zero demo")
+    parser.add_argument("--watchdog", nargs="?", const=stall_watchdog.default_log_path, default=None, metavar="LOG",
+                        help="log stalls of the event loop with stack samples (default log: %(const)s)")
+    parser.add_argument("--stall-threshold", type=float, default=stall_watchdog.default_threshold_ms,
+                        help="ms without a heartbeat that count as a stall")
+    parser.add_argument("--archive", nargs="?", const=archive.default_archive_dir, default=None, metavar="DIR",
+                        help="keep evaluated results across restarts in a persistent archive (default: %(const)s)")
+    args = parser.parse_args()
+    if args.archive:
+        archive.open_archive(args.archive)
+
     model = Model()
     app = App()
     presenter = Presenter(model=model, app=app)
-    presenter.run()
+    if args.watchdog is None:
+        presenter.run()
+        return
+    watchdog = stall_watchdog.StallWatchdog(app, threshold_ms=args.stall_threshold, log_path=args.watchdog)
+    watchdog.start()
+    try:
+        presenter.run()
+    finally:
+        watchdog.stop()
 
 
 if __name__ == "__main__":
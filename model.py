@@ -1,11 +1,20 @@
 from enum import Enum, auto
 from dataclasses import dataclass, field
 import json
+import dataclasses
 import numpy as np
 from numpy.typing import NDArray
-from scipy.signal import freqz, freqs, zpk2tf, TransferFunction
+from scipy.signal import freqz, freqs, zpk2tf, TransferFunction, dimpulse, dstep, impulse, step
 from collections import defaultdict
 from utilities import build_repeated_item_list_from_dict,get_complex_number_from_list
+import highres
+import grids
+import batch_eval
+import spectral_time
+import reduction
+import archive
+from reduction import ReductionReport
+from highres import HighResResponse
 
 class TimeResponse(Enum):
     IMPULSE = auto()
@@ -39,6 +48,18 @@ class Model:
     max_abs_resp: float = field(init=False,repr=False)
     num: list = field(init=False, repr=False, default_factory=list)
     denom: list = field(init=False, repr=False, default_factory=list)
+    time: NDArray = field(init=False, repr=False)
+    time_values: NDArray = field(init=False, repr=False)
+    show_magnitude_surface: bool = field(init=False, default=False)
+    # number of points of the additional high resolution grid, None switches it off
+    high_resolution_points: int | None = field(init=False, default=None)
+    highres: HighResResponse | None = field(init=False, repr=False, default=None)
+    # digital time responses from the inverse FFT of complex_f_resp instead of dimpulse/dstep, with the estimated error
+    time_resp_from_spectrum: bool = field(init=False, default=False)
+    time_resp_error: float | None = field(init=False, repr=False, default=None)
+    # cancels near pole/zero pairs (and far analog roots) before evaluation, None switches the reduction off
+    reduction_tolerance: float | None = field(init=False, default=None)
+    reduction: ReductionReport | None = field(init=False, repr=False, default=None)
     # I can use the below attributes to cache results for making it a bit faster
     digital_sampling_time: None| float = field(init=False)
     transfer_function:TransferFunction = field(init=False,repr=False)
@@ -58,22 +79,162 @@ class Model:
         )
         self.update_num_denom()
         self.update_freq_resp()
+        self.update_time_resp()
+
+    def init_model_from_roots(self, filter: FilterType, poles: dict[complex,int], zeros: dict[complex,int]) -> None:
+        # imported or designed roots instead of the defaults of config.json, type and time response stay as they are
+        self.filter = filter
+        self.poles, self.zeros = poles, zeros
+        self.update_num_denom()
+        self.update_freq_resp()
+        self.update_time_resp()
+
+    def get_evaluated_roots(self) -> tuple[dict[complex,int], dict[complex,int]]:
+        # the roots all responses are computed from, (poles, zeros) as entered or after the reduction
+        if self.reduction is not None:
+            return self.reduction.poles, self.reduction.zeros
+        return self.poles, self.zeros
+
+    def get_evaluated_gain(self) -> float:
+        # 1 like for every model, unless far roots were dropped by the reduction
+        return self.reduction.gain if self.reduction is not None else 1.
 
     def update_num_denom(self) -> None:
-        repeated_zeros_list = build_repeated_item_list_from_dict(self.zeros)
-        repeated_poles_list = build_repeated_item_list_from_dict(self.poles)
-        self.num, self.denom = zpk2tf(repeated_zeros_list, repeated_poles_list, 1)
+        self.reduction = None
+        if self.reduction_tolerance is not None:
+            self.reduction = reduction.reduce_model(self, self.reduction_tolerance)
+        archived = archive.lookup(self, "tf")
+        if archived is not None:
+            self.num, self.denom = archived["num"], archived["denom"]
+            return
+        poles, zeros = self.get_evaluated_roots()
+        repeated_zeros_list = build_repeated_item_list_from_dict(zeros)
+        repeated_poles_list = build_repeated_item_list_from_dict(poles)
+        self.num, self.denom = zpk2tf(repeated_zeros_list, repeated_poles_list, self.get_evaluated_gain())
+        archive.store(self, "tf", num=self.num, denom=self.denom)
+
+    def get_grid_spec(self) -> grids.GridSpec:
+        # same grids as freqz(num, denom, fs=fs, whole=True) and freqs(num, denom)
+        if self.type == ModelType.DIGITAL:
+            return grids.get_digital_spec(self.sampling_frequency)
+        poles, zeros = self.get_evaluated_roots()
+        return grids.get_analog_spec(build_repeated_item_list_from_dict(zeros),
+                                     build_repeated_item_list_from_dict(poles))
 
     def update_freq_resp(self) -> None:
         # worN = 1000
-        if self.type == ModelType.DIGITAL:
-            self.freqs, self.complex_f_resp = freqz(self.num, self.denom,fs=self.sampling_frequency,whole=True)
-        elif self.type == ModelType.ANALOG:
-            self.freqs, self.complex_f_resp = freqs(self.num, self.denom)
+        # the grid tables are cached, and whole responses in the archive when there is one
+        archived = archive.lookup(self, "freq")
+        if archived is not None:
+            self.freqs, self.complex_f_resp = archived["freqs"], archived["complex_f_resp"]
+        else:
+            self.freqs, self.complex_f_resp = grids.grid_cache.evaluate(self.get_grid_spec(), self.num, self.denom)
+            archive.store(self, "freq", freqs=self.freqs, complex_f_resp=self.complex_f_resp)
 
+        if self.reduction is not None:
+            points = batch_eval.get_digital_points(self.freqs, self.sampling_time) if self.type == ModelType.DIGITAL \
+                else batch_eval.get_analog_points(self.freqs)
+            self.reduction.max_error = reduction.measure_error(self.reduction, points, self.complex_f_resp) \
+                if self.reduction.changed else 0.
         abs_resp = np.abs(self.complex_f_resp)
         self.max_abs_resp = np.max(abs_resp)
         self.normalized_abs_f_resp = abs_resp / self.max_abs_resp
+        # the plots draw the high resolution grid when there is one, everything else keeps using the normal grid
+        self.highres = None
+        if self.high_resolution_points:
+            self.highres = highres.evaluate_highres(self, self.high_resolution_points)
+
+    def update_time_resp(self) -> None:
+        archived = archive.lookup(self, "time")
+        if archived is not None:
+            self.time, self.time_values = archived["time"], archived["time_values"]
+            # nan stands for no error estimate (simulated responses)
+            error = float(archived["error"][0])
+            self.time_resp_error = None if np.isnan(error) else error
+            return
+        self.compute_time_resp()
+        archive.store(self, "time", time=self.time, time_values=self.time_values,
+                      error=np.array([np.nan if self.time_resp_error is None else self.time_resp_error]))
+
+    def compute_time_resp(self) -> None:
+        self.time_resp_error = None
+        if self.type == ModelType.DIGITAL and self.time_resp_from_spectrum:
+            if self.time_resp not in (TimeResponse.IMPULSE, TimeResponse.STEP):
+                raise ValueError("Either Impulse or Step time response")
+            result = spectral_time.get_spectral_time_resp(self.num, self.denom,
+                                                          build_repeated_item_list_from_dict(
+                                                              self.get_evaluated_roots()[0]),
+                                                          self.sampling_time, n_samples=30,
+                                                          step=self.time_resp == TimeResponse.STEP,
+                                                          spectrum=self.complex_f_resp)
+            # unstable or improper filters have no spectrum to invert, they are simulated as usual
+            if result is not None:
+                self.time, self.time_values, self.time_resp_error = result.time, result.values, result.error_bound
+                return
+        if self.type == ModelType.DIGITAL:
+            sys3 = TransferFunction(self.num, self.denom, dt=self.sampling_time)
+            if self.time_resp == TimeResponse.IMPULSE:
+                t, y = dimpulse(sys3, n=30)
+            elif self.time_resp == TimeResponse.STEP:
+                t, y = dstep(sys3, n=30)
+            else:
+                raise ValueError("Either Impulse or Step time response")
+        elif self.type == ModelType.ANALOG:
+            sys3 = TransferFunction(self.num, self.denom)
+            if self.time_resp == TimeResponse.IMPULSE:
+                t, y = impulse(sys3)
+            elif self.time_resp == TimeResponse.STEP:
+                t, y = step(sys3)
+            else:
+                raise ValueError("Either Impulse or Step time response")
+        self.time, self.time_values = t, np.squeeze(y)
+
+    def rescale_sampling_time(self, sampling_time: float) -> None:
+        """new sampling time for the same z-plane roots without evaluating anything again. The response on the
+        normalized grid, the time response values and the reduction do not depend on fs, only the frequency and time
+        axes are scaled"""
+        assert self.type == ModelType.DIGITAL, "sampling time is only meaningful for Digital filters"
+        ratio = self.sampling_time / sampling_time
+        self.sampling_time = sampling_time
+        self.freqs = grids.get_digital_freqs(self.sampling_frequency, len(self.freqs))
+        if self.highres is not None:
+            self.highres = dataclasses.replace(self.highres,
+                                               f_first=self.highres.f_first * ratio,
+                                               f_step=self.highres.f_step * ratio,
+                                               summary_freqs=self.highres.summary_freqs * ratio)
+        # dimpulse's time grid can be a sample shorter or longer for another sampling time, see spectral_time
+        time = spectral_time.get_digital_time(sampling_time, n_samples=30)
+        if len(time) != len(self.time_values):
+            self.update_time_resp()
+        else:
+            self.time = time
+
+    def evaluate_freq_band(self, f_low:float, f_high:float, n_points:int) -> tuple[NDArray,NDArray]:
+        # used when zooming, only the visible band is evaluated again at a resolution that matches the screen
+        band = np.linspace(f_low, f_high, n_points)
+        if self.type == ModelType.DIGITAL:
+            return freqz(self.num, self.denom, worN=band, fs=self.sampling_frequency)
+        return freqs(self.num, self.denom, worN=band)
+
+    def get_state_dict(self) -> dict:
+        # everything needed to rebuild the model, only json serializable types (see note on .name below)
+        return {"type": self.type.name,
+                "filter": self.filter.name,
+                "time_resp": self.time_resp.name,
+                "sampling_time": self.sampling_time,
+                "poles": get_list_from_roots_dict(self.poles),
+                "zeros": get_list_from_roots_dict(self.zeros)}
+
+    def load_state_dict(self, state:dict) -> None:
+        self.type = ModelType[state["type"]]
+        self.filter = FilterType[state.get("filter", FilterType.MANUAL.name)]
+        self.time_resp = TimeResponse[state.get("time_resp", TimeResponse.IMPULSE.name)]
+        self.sampling_time = state.get("sampling_time", self.sampling_time)
+        self.poles = get_roots_dict_from_list(state["poles"])
+        self.zeros = get_roots_dict_from_list(state["zeros"])
+        self.update_num_denom()
+        self.update_freq_resp()
+        self.update_time_resp()
 
     def remove_poles(self,pole_keys:list[complex]) -> None:
         for key in pole_keys:
@@ -128,6 +289,18 @@ def get_default_poles_zeros(type_str: str, filter_str: str):
     return complex_poles_dict, complex_zeros_dict
 
 
+def get_list_from_roots_dict(roots:dict[complex,int]) -> list[list[float]]:
+    # unlike config.json, state files list every root explicitly (conjugates included) together with its fach
+    return [[float(np.real(root)), float(np.imag(root)), int(fach)] for root, fach in roots.items()]
+
+
+def get_roots_dict_from_list(roots_list:list[list[float]]) -> dict[complex,int]:
+    roots = defaultdict(int)
+    for real, imaginary, fach in roots_list:
+        roots[complex(real, imaginary)] += int(fach)
+    return roots
+
+
 # Here I assume 2 poles or zeros would be a 2*2 list
 # conjugates are not accounted for in the list, they will be generated automatically
 # so a real system with 4 conjugate poles would be saved in config file as a  2*2 list of float
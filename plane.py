@@ -0,0 +1,98 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+from numpy.typing import NDArray
+
+tile_resolution = 64
+# every log distance field of one root on one tile costs tile_resolution**2 float32 values (16 KiB for 64). The fields
+# of the mosaic that is shown are always kept, even when there are more of them
+max_cached_fields = 2048
+
+
+@dataclass(frozen=True)
+class Tile:
+    """square part of the s or z plane, aligned to a grid whose spacing depends on the zoom level"""
+    ix: int
+    iy: int
+    size: float
+
+    @property
+    def extent(self) -> tuple[float, float, float, float]:
+        return self.ix * self.size, (self.ix + 1) * self.size, self.iy * self.size, (self.iy + 1) * self.size
+
+    def points(self) -> NDArray:
+        # centers of the tile_resolution x tile_resolution cells, rows are the imaginary axis (imshow origin="lower")
+        offsets = (np.arange(tile_resolution) + 0.5) * self.size / tile_resolution
+        real, imag = np.meshgrid(self.ix * self.size + offsets, self.iy * self.size + offsets)
+        return real + 1j * imag
+
+
+def get_tile_size(x_span: float, y_span: float) -> float:
+    # power of two spacing giving roughly 4 to 8 tiles along the longer axis, so panning reuses tiles and zooming
+    # switches to a finer level once the tiles would get too coarse for the screen
+    span = max(x_span, y_span)
+    return 2.0 ** np.floor(np.log2(span / 4))
+
+
+def get_visible_tiles(xlim: tuple[float, float], ylim: tuple[float, float]) -> list[list[Tile]]:
+    size = get_tile_size(xlim[1] - xlim[0], ylim[1] - ylim[0])
+    ix_range = range(int(np.floor(xlim[0] / size)), int(np.floor(xlim[1] / size)) + 1)
+    iy_range = range(int(np.floor(ylim[0] / size)), int(np.floor(ylim[1] / size)) + 1)
+    return [[Tile(ix, iy, size) for ix in ix_range] for iy in iy_range]
+
+
+class PlaneEvaluator:
+    """evaluates log|H| over the complex plane as
+        sum over zeros of fach*log|x - zero|  -  sum over poles of fach*log|x - pole|
+    Every per root field is cached per tile (least recently used ones are evicted once a whole mosaic is assembled), so
+    moving one root only computes the field of its new location, all other roots are taken from the cache."""
+
+    def __init__(self, max_fields: int = max_cached_fields) -> None:
+        self.max_fields = max_fields
+        self._fields: OrderedDict[tuple[Tile, complex], NDArray] = OrderedDict()
+
+    def _get_fields(self, tile: Tile, roots: list[complex]) -> list[NDArray]:
+        missing = [root for root in roots if (tile, root) not in self._fields]
+        if missing:
+            # all missing roots of a tile are computed in one broadcast operation
+            distances = np.abs(tile.points()[None, :, :] - np.asarray(missing)[:, None, None])
+            new_fields = np.log(np.maximum(distances, np.finfo(np.float32).tiny)).astype(np.float32)
+            for root, root_field in zip(missing, new_fields):
+                self._fields[(tile, root)] = root_field
+        fields = []
+        for root in roots:
+            self._fields.move_to_end((tile, root))
+            fields.append(self._fields[(tile, root)])
+        return fields
+
+    def _evict(self, n_in_use: int) -> None:
+        # the n_in_use most recently used fields belong to what is shown right now, they stay whatever max_fields is
+        while len(self._fields) > max(self.max_fields, n_in_use):
+            self._fields.popitem(last=False)
+
+    def log_magnitude(self, tile: Tile, poles: dict[complex, int], zeros: dict[complex, int]) -> NDArray:
+        total = self._log_magnitude(tile, poles, zeros)
+        self._evict(len(poles) + len(zeros))
+        return total
+
+    def _log_magnitude(self, tile: Tile, poles: dict[complex, int], zeros: dict[complex, int]) -> NDArray:
+        total = np.zeros((tile_resolution, tile_resolution), dtype=np.float32)
+        for fach, root_field in zip(zeros.values(), self._get_fields(tile, list(zeros.keys()))):
+            total += fach * root_field
+        for fach, root_field in zip(poles.values(), self._get_fields(tile, list(poles.keys()))):
+            total -= fach * root_field
+        return total
+
+    def log_magnitude_mosaic(self, xlim: tuple[float, float], ylim: tuple[float, float], poles: dict[complex, int],
+                             zeros: dict[complex, int]) -> tuple[NDArray, tuple[float, float, float, float]]:
+        """log|H| of all tiles covering the visible limits stitched into one image, together with its extent"""
+        tile_rows = get_visible_tiles(xlim, ylim)
+        mosaic = np.block([[self._log_magnitude(tile, poles, zeros) for tile in row] for row in tile_rows])
+        self._evict(sum(len(row) for row in tile_rows) * (len(poles) + len(zeros)))
+        extent = (tile_rows[0][0].extent[0], tile_rows[0][-1].extent[1],
+                  tile_rows[0][0].extent[2], tile_rows[-1][0].extent[3])
+        return mosaic, extent
+
+
+# one evaluator for the whole program, its cache outlives the figures that are rebuilt after every model change
+plane_evaluator = PlaneEvaluator()
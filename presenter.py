@@ -1,15 +1,19 @@
-import matplotlib.pyplot as plt
 import numpy as np
 import utilities
-import view
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib import animation
+import export
+import history
+import sweep
+import animation_clock
+import root_import
+import filter_design
+import conversion
+import comparison
+import highres
+import reduction
 from functools import partial
-from model import Model, STRING_2_MODELTYPE, STRING_2_FILTERTYPE,STRING_2_TIMERESPONSE
-from view import App, get_initial_ui_values
-from customtkinter import CTkEntry
+from typing import Any, Callable, Iterable, Protocol
+from model import Model, FilterType, ModelType, STRING_2_MODELTYPE, STRING_2_FILTERTYPE,STRING_2_TIMERESPONSE
 from enum import Enum,auto
-import gc
 
 
 class EntryOperation(Enum):
@@ -48,13 +52,52 @@ def complex_and_conj_fach_dict(real:float,imaginary:float,fach:int | None) -> di
         decision_dict = {complex_num: fach, conj_num: fach}
     return decision_dict
 
-def handle_manual_entry(entry: list[CTkEntry,CTkEntry,CTkEntry])-> tuple[EntryOperation,dict]:
-    field_re_new = entry[0].get()
-    field_img_new = entry[1].get()
-    field_fach_new = entry[2].get()
-    field_re_old = entry[0]._placeholder_text
-    field_img_old = entry[1]._placeholder_text
-    field_fach_old = entry[2]._placeholder_text
+class EntryRow(Protocol):
+    # view.ManualEntryRow
+    placeholders: tuple[str, str, str]
+    values: list[str]
+
+
+class Frontend(Protocol):
+    """what the presenter needs from a user interface. view.App is the GUI frontend, headless.HeadlessApp runs the
+    same presenter without Tk. Plots are addressed by the panel names of utilities.PLOT_PANELS"""
+    side_frame: Any
+    pole_number_frame: Any
+    zero_number_frame: Any
+
+    def init_ui(self, presenter) -> None:
+        ...
+
+    def mainloop(self) -> None:
+        ...
+
+    def get_initial_ui_values(self) -> tuple[str, str, str]:
+        ...
+
+    def show_plot(self, panel: str, plotting_func: Callable) -> None:
+        ...
+
+    def refresh_plots(self) -> None:
+        ...
+
+    def attach_figure(self, panel: str, fig) -> Any:
+        ...
+
+    def update_plots(self, update: Callable[[str, Any], None]) -> None:
+        # update(panel, figure) changes the shown figures in place, they are redrawn afterwards
+        ...
+
+    # animation_clock.Scheduler
+    def after(self, ms: int, func: Callable) -> str:
+        ...
+
+    def after_cancel(self, id: str) -> None:
+        ...
+
+
+def handle_manual_entry(entry: EntryRow)-> tuple[EntryOperation,dict]:
+    field_re_new, field_img_new, field_fach_new = entry.values
+    field_re_old, field_img_old, field_fach_old = entry.placeholders
 
     if not any([field_re_new,field_img_new,field_fach_new]):
         #means the entry field was left unfilled, no info was typed in, so we move on
@@ -94,24 +137,210 @@ def handle_manual_entry(entry: list[CTkEntry,CTkEntry,CTkEntry])-> tuple[EntryOp
 
 
 class Presenter:
-    def __init__(self, model: Model, app: App) -> None:
+    def __init__(self, model: Model, app: Frontend) -> None:
         self.model = model
         self.app = app
-        self.anime = None
+        self.animation_driver = None
+        self.animate_phase = True
+        self.history = history.ModelHistory()
+        self.animation_duration = animation_clock.default_animation_duration
+        self.comparison_set = comparison.ComparisonSet()
+        # False while sweep or conversion plots are shown, those can not simply be rescaled to a new fs
+        self.plots_rescalable = True
     def change_time_response(self,variable):
         time_resp_str = self.app.side_frame.optionmenu_response.get()
         next_time_resp = STRING_2_TIMERESPONSE[time_resp_str]
         self.model.time_resp = next_time_resp
-        view.refresh_visual_filter_frame(filter_frame=self.app.visual_filter_frame)
+        self.model.update_time_resp()
+        self.history.record(self.model)
+        self.refresh_plots()
 
     def change_digital_sampling_freq(self):
         if not self.model.type.name == "DIGITAL":
             return
         sampling_freq = self.app.side_frame.open_fs_input_dialog_event()
         if sampling_freq:
-            self.model.sampling_time = 1/sampling_freq
-            self.change_manual_model()
+            self.rescale_sampling_freq(sampling_freq)
+            self.history.record(self.model)
 
+    def rescale_sampling_freq(self, sampling_freq:float):
+        # for fixed z-plane roots only the axes depend on fs, nothing is evaluated or built again (see
+        # Model.rescale_sampling_time). Plots of a sweep or a comparison are drawn again instead
+        if not self.plots_rescalable or self.comparison_set.get_entries(self.model):
+            self.model.sampling_time = 1/sampling_freq
+            self.model.update_freq_resp()
+            self.model.update_time_resp()
+            self.refresh_ui()
+            return
+        ratio = sampling_freq * self.model.sampling_time
+        self.model.rescale_sampling_time(1/sampling_freq)
+        self.app.update_plots(lambda panel, fig: utilities.PLOT_RESCALES[panel](fig, self.model, ratio))
+
+    def slide_sampling_freq(self, sampling_freq:float):
+        # digital models are rescaled, analog ones are converted at the new fs. History is recorded on release only
+        if self.model.type == ModelType.DIGITAL:
+            self.rescale_sampling_freq(sampling_freq)
+        else:
+            self.show_conversion_comparison(1/sampling_freq)
+
+    def record_sampling_freq(self):
+        if self.model.type == ModelType.DIGITAL:
+            self.history.record(self.model)
+
+
+    def toggle_magnitude_surface(self):
+        # only the pole zero map changes, the other three plots stay as they are
+        self.model.show_magnitude_surface = bool(self.app.side_frame.surface_switch.get())
+        self.stop_animation()
+        self.app.show_plot("pole_zero", partial(utilities.create_freq_domain_plot, self.model))
+
+    def toggle_high_resolution(self):
+        high_resolution = self.app.side_frame.high_resolution_switch.get()
+        self.model.high_resolution_points = highres.default_high_resolution_points if high_resolution else None
+        self.model.update_freq_resp()
+        self.history.record(self.model)
+        self.refresh_ui()
+        if self.model.highres is not None:
+            self.app.side_frame.show_memory_report(self.model.highres.memory)
+
+    def toggle_spectral_time_resp(self):
+        # digital time responses from the inverse FFT of the frequency response, see spectral_time
+        self.model.time_resp_from_spectrum = bool(self.app.side_frame.spectral_time_switch.get())
+        self.model.update_time_resp()
+        self.history.record(self.model)
+        self.app.show_plot("time", partial(utilities.create_time_plot, self.model))
+        if self.model.type == ModelType.DIGITAL:
+            self.app.side_frame.show_time_resp_error(self.model.time_resp_error)
+
+    def toggle_reduction(self):
+        # the entered roots stay as they are, only the evaluation uses the reduced ones
+        reduce_order = self.app.side_frame.reduction_switch.get()
+        self.model.reduction_tolerance = reduction.default_tolerance if reduce_order else None
+        self.model.update_num_denom()
+        self.model.update_freq_resp()
+        self.model.update_time_resp()
+        self.history.record(self.model)
+        self.refresh_ui()
+        self.app.side_frame.show_reduction_report(self.model.reduction)
+
+    def run_sweep(self):
+        # dialog text looks like "radius 0.5 0.99 200", "angle 0 180 500" or "gain 0 10 1000"
+        sweep_text = self.app.side_frame.open_sweep_input_dialog_event()
+        if not sweep_text:
+            return
+        try:
+            parameter_str, start, stop, steps = sweep_text.split()
+            if parameter_str.lower() not in sweep.STRING_2_SWEEPPARAMETER:
+                raise ValueError(f"unknown sweep parameter {parameter_str}, use radius, angle or gain")
+            parameter = sweep.STRING_2_SWEEPPARAMETER[parameter_str.lower()]
+            result = sweep.run_sweep(self.model, parameter, float(start), float(stop), int(steps))
+        except ValueError as error:
+            self.app.side_frame.show_error("Sweep", f"{error}\nexpected e.g. \"radius 0.5 0.99 200\"")
+            return
+        self.stop_animation()
+        for panel, draw_func in [("pole_zero", utilities.draw_sweep_root_trajectories),
+                                 ("time", utilities.draw_sweep_time_resp),
+                                 ("magnitude", utilities.draw_sweep_freq_resp),
+                                 ("phase", utilities.draw_sweep_phase_resp)]:
+            self.app.show_plot(panel, partial(utilities.create_sweep_plot, self.model, result, draw_func))
+        self.plots_rescalable = False
+
+    def compare_conversion(self):
+        # dialog text is the sampling frequency in Hz and optionally the prewarp frequency in Hz, e.g. "100 10"
+        if not self.model.type == ModelType.ANALOG:
+            return
+        conversion_text = self.app.side_frame.open_conversion_input_dialog_event()
+        if not conversion_text:
+            return
+        try:
+            numbers = [float(number) for number in conversion_text.split()]
+            sampling_time, prewarp_freq = 1 / numbers[0], numbers[1] if len(numbers) > 1 else None
+            self.show_conversion_comparison(sampling_time, prewarp_freq)
+        except (ValueError, IndexError, ZeroDivisionError) as error:
+            self.app.side_frame.show_error("A/D compare", f"{error}\nexpected e.g. \"100 10\" (fs and prewarp in Hz)")
+
+    def show_conversion_comparison(self, sampling_time:float, prewarp_freq:float | None = None):
+        # the mapping and the batched evaluation are cheap, this can run again for every new sampling frequency
+        # the sampling time only goes into the result the plots are drawn from, the analog model has none
+        result = conversion.compare_conversions(self.model, sampling_time, prewarp_freq)
+        self.stop_animation()
+        for panel, draw_func in [("pole_zero", utilities.draw_conversion_z_plane),
+                                 ("magnitude", utilities.draw_conversion_freq_resp),
+                                 ("phase", utilities.draw_conversion_phase_resp)]:
+            self.app.show_plot(panel, partial(utilities.create_sweep_plot, self.model, result, draw_func))
+        self.plots_rescalable = False
+
+    def add_to_comparison(self):
+        self.comparison_set.add_model(self.model)
+        self.show_comparison()
+
+    def clear_comparison(self):
+        self.comparison_set.clear()
+        self.refresh_ui()
+
+    def show_comparison(self):
+        # the current model is drawn as usual with all compared filters behind it, the pole zero map stays as it is
+        result = self.comparison_set.evaluate(self.model)
+        if result is None:
+            return
+        self.stop_animation()
+        for panel, draw_func in [("time", utilities.draw_comparison_time_resp),
+                                 ("magnitude", utilities.draw_comparison_freq_resp),
+                                 ("phase", utilities.draw_comparison_phase_resp)]:
+            self.app.show_plot(panel, partial(utilities.create_sweep_plot, self.model, result, draw_func))
+
+    def save_current_state(self):
+        out_dir = self.app.side_frame.open_save_directory_dialog_event()
+        if out_dir:
+            name = f"{self.model.type.name.lower()}_{self.model.filter.name.lower()}"
+            export.export_model(self.model, out_dir, name)
+
+    def import_roots(self):
+        # the imported roots replace the current ones, the model type (and sampling time) stays as it is
+        path = self.app.side_frame.open_import_file_dialog_event()
+        if not path:
+            return
+        try:
+            poles, zeros = root_import.import_roots_file(path)
+        except (OSError, ValueError, KeyError) as error:
+            self.app.side_frame.show_error("Import", f"can not import {path}:\n{error}")
+            return
+        self.model.init_model_from_roots(FilterType.MANUAL, poles, zeros)
+        self.history.record(self.model)
+        self.refresh_ui()
+
+    def design_filter(self):
+        # dialog text looks like "butter TP 8 1000" or "ellip BP 6 500 1500 rp=1 rs=60", cutoffs in Hz (digital)
+        # or rad/s (analog)
+        design_text = self.app.side_frame.open_design_input_dialog_event()
+        if not design_text:
+            return
+        try:
+            prototype, filter, order, cutoffs, rp, rs = filter_design.parse_design_text(design_text)
+            sampling_frequency = self.model.sampling_frequency if self.model.type == ModelType.DIGITAL else None
+            spec = filter_design.get_filter_spec(self.model.type, filter, prototype, order, cutoffs, rp, rs,
+                                                 sampling_frequency)
+            poles, zeros = filter_design.design_cache.get(spec)
+        except (ValueError, KeyError) as error:
+            self.app.side_frame.show_error("Design", f"{error}\nexpected e.g. \"butter TP 8 1000\"")
+            return
+        self.model.init_model_from_roots(filter, poles, zeros)
+        self.history.record(self.model)
+        self.app.side_frame.show_model_settings(self.model)
+        self.refresh_ui()
+
+    def get_animation_frames(self, on_finished:Callable | None = None) -> tuple[Iterable[int], int]:
+        # frame indices and timer interval for the animation driver. Without a target duration every frequency is
+        # drawn, otherwise a FrameClock skips frames so the sweep takes animation_duration seconds
+        n_frames = len(self.model.freqs)
+        if self.animation_duration is None:
+            return range(n_frames), 10
+        clock = animation_clock.FrameClock(n_frames, self.animation_duration, on_finished=on_finished)
+        return clock.frames(), clock.interval_ms
+
+    def toggle_timed_animation(self):
+        timed = self.app.side_frame.timed_animation_switch.get()
+        self.animation_duration = animation_clock.default_animation_duration if timed else None
 
     def run_animation(self):
         if self.model.type.name == "ANALOG":
@@ -121,103 +350,51 @@ class Presenter:
 
     def run_analog_animation(self):
         assert self.model.type.name == "ANALOG"
-        self.run_analog_pole_zero_animation()
-        self.run_analog_response_animation()
+        self.run_synchronized_animation(utilities.get_analog_pole_zero_line_objects,
+                                        utilities.analog_pole_zero_animation_func)
 
     def run_digital_animation(self):
         assert self.model.type.name == "DIGITAL"
-        self.run_digital_pole_zero_animation()
-        self.run_digital_response_animation()
-
-    def run_analog_response_animation(self):
-
-        anim_canvas = self.app.visual_filter_frame.canvas_freq_resp
-        if anim_canvas.canvas:
-            anim_canvas.canvas.get_tk_widget().destroy()
-
-        fig, ax, line_2d_objects = utilities.get_response_line_objects(self.model)
-        anim_canvas.canvas = FigureCanvasTkAgg(fig, anim_canvas)
-        anim_canvas.canvas.get_tk_widget().grid(sticky="nsew")
-
-        partial_anim_func = partial(utilities.response_animation_func,
-                                    line_2d_objects=line_2d_objects,
-                                    ax=ax,
-                                    canvas=anim_canvas.canvas,
-                                    model=self.model)
-
-        self.response_anime = animation.FuncAnimation(fig=fig,
-                                                   func=partial_anim_func,
-                                                   frames=len(self.model.freqs),
-                                                   interval=10,
-                                                   blit=False,
-                                                   repeat=False, )
-
-    def run_digital_response_animation(self):
-        anim_canvas = self.app.visual_filter_frame.canvas_freq_resp
-        if anim_canvas.canvas:
-            anim_canvas.canvas.get_tk_widget().destroy()
-
-        fig, ax, line_2d_objects = utilities.get_response_line_objects(self.model)
-        anim_canvas.canvas = FigureCanvasTkAgg(fig, anim_canvas)
-        anim_canvas.canvas.get_tk_widget().grid(sticky="nsew")
-
-        partial_anim_func = partial(utilities.response_animation_func,
-                                    line_2d_objects=line_2d_objects,
-                                    ax=ax,
-                                    canvas=anim_canvas.canvas,
-                                    model=self.model)
-
-        self.response_anime = animation.FuncAnimation(fig=fig,
-                                                   func=partial_anim_func,
-                                                   frames=len(self.model.freqs),
-                                                   interval=10,
-                                                   blit=False,
-                                                   repeat=False, )
-
-
-    def run_analog_pole_zero_animation(self):
-        anim_canvas = self.app.visual_filter_frame.canvas_freq_domain
-        if anim_canvas.canvas:
-            anim_canvas.canvas.get_tk_widget().destroy()
-
-        line_obj_dict = utilities.get_analog_pole_zero_line_objects(self.model)
-
-        anim_canvas.canvas = FigureCanvasTkAgg(line_obj_dict["fig"], anim_canvas)
-        anim_canvas.canvas.get_tk_widget().grid(sticky="nsew")
-
-
-        partial_anim_func = partial(utilities.analog_pole_zero_animation_func,
-                                    line_obj_dict = line_obj_dict,
-                                    canvas=anim_canvas.canvas,
-                                    model=self.model)
-        self.anime = animation.FuncAnimation(fig=line_obj_dict["fig"],
-                                                   func=partial_anim_func,
-                                                   frames=len(self.model.freqs),
-                                                   interval=10,
-                                                   blit=False,
-                                                   repeat=False, )
-    def run_digital_pole_zero_animation(self):
-        anim_canvas = self.app.visual_filter_frame.canvas_freq_domain
-        if anim_canvas.canvas:
-            anim_canvas.canvas.get_tk_widget().destroy()
-
-        line_obj_dict = utilities.get_digital_pole_zero_line_objects(self.model)
-
-        anim_canvas.canvas = FigureCanvasTkAgg(line_obj_dict["fig"], anim_canvas)
-        anim_canvas.canvas.get_tk_widget().grid(sticky="nsew")
-
-
-        partial_anim_func = partial(utilities.digital_pole_zero_animation_func,
-                                    line_obj_dict = line_obj_dict,
-                                    canvas=anim_canvas.canvas,
-                                    model=self.model)
-        self.anime = animation.FuncAnimation(fig=line_obj_dict['fig'],
-                                                   func=partial_anim_func,
-                                                   frames=len(self.model.freqs),
-                                                   interval=10,
-                                                   blit=False,
-                                                   repeat=False, )
-
+        self.run_synchronized_animation(utilities.get_digital_pole_zero_line_objects,
+                                        utilities.digital_pole_zero_animation_func)
+
+    def run_synchronized_animation(self, get_pole_zero_line_objects:Callable, pole_zero_animation_func:Callable):
+        # a single driver advances one frame index for all animated plots, so the pointers never drift apart
+        self.stop_animation()
+        line_obj_dict = get_pole_zero_line_objects(self.model)
+        pole_zero_canvas = self.app.attach_figure("pole_zero", line_obj_dict["fig"])
+        updates = [partial(pole_zero_animation_func,
+                           line_obj_dict=line_obj_dict,
+                           canvas=pole_zero_canvas,
+                           model=self.model)]
+        canvases = [pole_zero_canvas]
+
+        response_plots = [("magnitude", utilities.get_response_line_objects, utilities.response_animation_func)]
+        if self.animate_phase:
+            response_plots.append(("phase", utilities.get_phase_line_objects, utilities.phase_animation_func))
+        for panel, get_line_objects, animation_func in response_plots:
+            fig, ax, line_2d_objects = get_line_objects(self.model)
+            response_canvas = self.app.attach_figure(panel, fig)
+            updates.append(partial(animation_func,
+                                   line_2d_objects=line_2d_objects,
+                                   ax=ax,
+                                   canvas=response_canvas,
+                                   model=self.model))
+            canvases.append(response_canvas)
+
+        frames, interval = self.get_animation_frames(on_finished=self.app.side_frame.show_animation_stats)
+        self.animation_driver = animation_clock.AnimationDriver(scheduler=self.app,
+                                                                frames=frames,
+                                                                interval_ms=interval,
+                                                                updates=updates,
+                                                                canvases=canvases)
+        self.animation_driver.start()
+
+    def stop_animation(self):
+        # frames index the arrays of the model the animation was started with, it must not outlive them
+        if self.animation_driver:
+            self.animation_driver.stop()
+        self.animation_driver = None
 
     def change_default_model(self, variable):
         model_type_str = self.app.side_frame.optionmenu_model.get()
@@ -228,8 +405,9 @@ class Presenter:
         next_time_resp = STRING_2_TIMERESPONSE[time_resp_str]
         "Nader thinks code below is redundant. Except maybe for resetting default factory values "
         # self.model = Model()
+        self.stop_animation()
         self.model.init_default_model(type=next_model_type, filter=next_filter_type,time_resp=next_time_resp)
-        plt.close("all")
+        self.history.record(self.model)
         try:
             self.app.zero_number_frame.wipe_manual_zero_entries()
             self.app.pole_number_frame.wipe_manual_pole_entries()
@@ -237,56 +415,78 @@ class Presenter:
             ...
             # "Throw proper Error"
         # self.app.visual_filter_frame.refresh_plot_frame()
-        view.refresh_visual_filter_frame(filter_frame=self.app.visual_filter_frame)
+        self.refresh_plots()
         self.app.pole_number_frame.grid_manual_pole_entries()
         self.app.zero_number_frame.grid_manual_zero_entries()
         self.app.side_frame.disable_fs_button() if self.model.type.name == "ANALOG" else self.app.side_frame.enable_fs_button()
 
     def handle_manual_coordinates(self):
-        all_zero_entries = self.app.zero_number_frame.zeros_2_display.copy()
-        for i,zero_entry in enumerate(all_zero_entries):
+        # the panels only keep entry widgets for visible rows, what was typed into them is collected first
+        self.app.zero_number_frame.collect_entry_values()
+        self.app.pole_number_frame.collect_entry_values()
+        for zero_entry in self.app.zero_number_frame.zeros_2_display:
             decision, decision_dict = handle_manual_entry(zero_entry)
             if decision == EntryOperation.DELETION:
                 self.model.remove_zeros(decision_dict["deletion"].keys())
-                self.app.zero_number_frame.zeros_2_display.pop(i)
             elif decision == EntryOperation.ADDITION:
                 self.model.add_zeros(decision_dict["addition"])
             elif decision == EntryOperation.MODIFICATION:
                 self.model.remove_zeros(decision_dict["deletion"].keys())
-                self.app.zero_number_frame.zeros_2_display.pop(i)
                 self.model.add_zeros(decision_dict["addition"])
 
-        all_pole_entries = self.app.pole_number_frame.poles_2_display.copy()
-        for i, pole_entry in enumerate(all_pole_entries):
+        for pole_entry in self.app.pole_number_frame.poles_2_display:
             decision, decision_dict = handle_manual_entry(pole_entry)
             if decision == EntryOperation.DELETION:
                 self.model.remove_poles(decision_dict["deletion"].keys())
-                self.app.pole_number_frame.poles_2_display.pop(i)
             elif decision == EntryOperation.ADDITION:
                 self.model.add_poles(decision_dict["addition"])
             elif decision == EntryOperation.MODIFICATION:
                 self.model.remove_poles(decision_dict["deletion"].keys())
-                self.app.pole_number_frame.poles_2_display.pop(i)
                 self.model.add_poles(decision_dict["addition"])
 
-        gc.collect()
-
     def change_manual_model(self):
         self.handle_manual_coordinates()
         self.model.update_num_denom()
         self.model.update_freq_resp()
+        self.model.update_time_resp()
+        self.history.record(self.model)
+        self.refresh_ui()
+
+    def refresh_plots(self):
+        self.stop_animation()
+        self.app.refresh_plots()
+        self.plots_rescalable = True
+
+    def refresh_ui(self):
         self.app.zero_number_frame.wipe_manual_zero_entries()
         self.app.pole_number_frame.wipe_manual_pole_entries()
-        plt.close("all")
-        view.refresh_visual_filter_frame(filter_frame=self.app.visual_filter_frame)
+        self.refresh_plots()
         self.app.pole_number_frame.grid_manual_pole_entries()
         self.app.zero_number_frame.grid_manual_zero_entries()
+        self.show_comparison()
+
+    def restore_from_history(self, snapshot:history.ModelSnapshot | None):
+        # undo/redo only put back cached results, neither zpk2tf nor freqz (or the time simulation) run again
+        if snapshot is None:
+            return
+        self.stop_animation()
+        history.restore_snapshot(self.model, snapshot)
+        self.app.side_frame.show_model_settings(self.model)
+        self.refresh_ui()
+        self.app.side_frame.disable_fs_button() if self.model.type.name == "ANALOG" else self.app.side_frame.enable_fs_button()
+
+    def undo(self):
+        self.restore_from_history(self.history.undo())
+
+    def redo(self):
+        self.restore_from_history(self.history.redo())
 
     def run(self):
-        initial_model_type, initial_filter_type,initial_time_resp = get_initial_ui_values()
+        initial_model_type, initial_filter_type,initial_time_resp = self.app.get_initial_ui_values()
         type = STRING_2_MODELTYPE[initial_model_type]
         filter = STRING_2_FILTERTYPE[initial_filter_type]
         time_resp = STRING_2_TIMERESPONSE[initial_time_resp]
         self.model.init_default_model(type=type, filter=filter,time_resp=time_resp)
+        self.history.record(self.model)
         self.app.init_ui(self)
         self.app.mainloop()
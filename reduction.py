@@ -0,0 +1,146 @@
+"""Order reduction of a model before it is evaluated.
+
+Two kinds of roots hardly change the response and only raise the order zpk2tf, freqz and the time simulations work
+with. One kind is a pole and a zero at almost the same spot: they are found with a KD-tree over the complex plane and
+cancelled, closest pairs first. The other kind, for analog filters, is a root far above all the others: in the band
+that is shown, its factor (s - root) is practically the constant -root. Roots behind the first gap of far_ratio in the
+sorted root magnitudes are dropped and their constants are kept as the gain of the reduced filter, the time responses
+(which are not normalized) keep their scale that way. Digital roots have no such band, so only cancellation applies
+to them.
+
+The reduced roots are only used for evaluation, the model keeps (and shows) the roots as entered. The reported error is
+the largest difference of the normalized magnitudes on the grid the model is evaluated on, it says nothing about the
+time response. It is measured after the evaluation: the full response is the reduced one times the removed factors, so
+only the removed roots have to be evaluated on the grid, never the full order.
+"""
+from dataclasses import dataclass, field
+import numpy as np
+from scipy.spatial import cKDTree
+from utilities import build_repeated_item_list_from_dict
+
+default_tolerance = 1e-3
+far_ratio = 1e3
+
+
+@dataclass
+class ReductionReport:
+    poles: dict[complex, int] = field(repr=False)
+    zeros: dict[complex, int] = field(repr=False)
+    # (pole, zero, how many of both)
+    cancelled: list[tuple[complex, complex, int]] = field(repr=False)
+    dropped_poles: dict[complex, int] = field(repr=False)
+    dropped_zeros: dict[complex, int] = field(repr=False)
+    original_order: int
+    effective_order: int
+    # constant of the dropped far factors, prod(-far zeros) / prod(-far poles)
+    gain: float = 1.
+    # magnitude error, set by measure_error once the reduced model is evaluated
+    max_error: float | None = None
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.cancelled or self.dropped_poles or self.dropped_zeros)
+
+    def get_removed_roots(self) -> tuple[list[complex], list[complex]]:
+        # (poles, zeros) that are not evaluated, with repetitions
+        poles = [pole for pole, _, count in self.cancelled for _ in range(count)]
+        zeros = [zero for _, zero, count in self.cancelled for _ in range(count)]
+        return (poles + build_repeated_item_list_from_dict(self.dropped_poles),
+                zeros + build_repeated_item_list_from_dict(self.dropped_zeros))
+
+    def __str__(self) -> str:
+        error = "" if self.max_error is None else f", |H| error {self.max_error:.1e}"
+        return f"order {self.original_order} -> {self.effective_order}{error}"
+
+
+def get_order(poles: dict[complex, int], zeros: dict[complex, int]) -> int:
+    return max(sum(poles.values()), sum(zeros.values()))
+
+
+def _to_points(roots) -> np.ndarray:
+    roots = np.asarray(roots, dtype=complex)
+    return np.column_stack([roots.real, roots.imag])
+
+
+def cancel_pairs(poles: dict[complex, int], zeros: dict[complex, int],
+                 tolerance: float = default_tolerance) -> tuple[dict, dict, list[tuple[complex, complex, int]]]:
+    """cancels poles and zeros closer than tolerance, closest pairs first -> (poles, zeros, cancelled pairs).
+    Conjugate pairs have the same distance, so both halves of a pair are cancelled together"""
+    poles, zeros = dict(poles), dict(zeros)
+    if not poles or not zeros:
+        return poles, zeros, []
+    pole_keys, zero_keys = list(poles.keys()), list(zeros.keys())
+    candidates = cKDTree(_to_points(pole_keys)).sparse_distance_matrix(cKDTree(_to_points(zero_keys)), tolerance,
+                                                                      output_type="ndarray")
+    cancelled = []
+    closest_first = np.argsort(candidates["v"], kind="stable")
+    for pole_index, zero_index in zip(candidates["i"][closest_first], candidates["j"][closest_first]):
+        pole, zero = pole_keys[pole_index], zero_keys[zero_index]
+        count = min(poles.get(pole, 0), zeros.get(zero, 0))
+        if count == 0:
+            continue
+        cancelled.append((pole, zero, count))
+        for roots, root in ((poles, pole), (zeros, zero)):
+            roots[root] -= count
+            if roots[root] == 0:
+                del roots[root]
+    return poles, zeros, cancelled
+
+
+def split_far_roots(poles: dict[complex, int], zeros: dict[complex, int],
+                    ratio: float = far_ratio) -> tuple[dict, dict, dict, dict]:
+    """-> (near poles, near zeros, far poles, far zeros). Far roots lie behind the first gap of ratio in the sorted
+    magnitudes of all roots. Poles are only dropped as long as the filter stays proper"""
+    magnitudes = np.sort([abs(root) for root in (*poles, *zeros) if root != 0])
+    gaps = np.flatnonzero(magnitudes[1:] >= ratio * magnitudes[:-1])
+    if not len(gaps):
+        return dict(poles), dict(zeros), {}, {}
+    limit = magnitudes[gaps[0]]
+    near_poles = {root: fach for root, fach in poles.items() if abs(root) <= limit}
+    near_zeros = {root: fach for root, fach in zeros.items() if abs(root) <= limit}
+    if sum(near_zeros.values()) > sum(near_poles.values()) and sum(zeros.values()) <= sum(poles.values()):
+        near_poles = dict(poles)
+    far_poles = {root: fach for root, fach in poles.items() if root not in near_poles}
+    far_zeros = {root: fach for root, fach in zeros.items() if root not in near_zeros}
+    return near_poles, near_zeros, far_poles, far_zeros
+
+
+def get_far_gain(far_poles: dict[complex, int], far_zeros: dict[complex, int]) -> float:
+    # the value the dropped factors have in the band that is shown, real since the roots come in conjugate pairs
+    far_poles = np.asarray(build_repeated_item_list_from_dict(far_poles), dtype=complex)
+    far_zeros = np.asarray(build_repeated_item_list_from_dict(far_zeros), dtype=complex)
+    return float(np.real(np.prod(-far_zeros) / np.prod(-far_poles)))
+
+
+def measure_error(report: ReductionReport, points, complex_f_resp) -> float:
+    """largest difference of the normalized magnitudes with and without the removed roots. complex_f_resp is the
+    response of the reduced roots at points, the full one differs from it by the removed factors only"""
+    removed_poles, removed_zeros = report.get_removed_roots()
+    points = np.asarray(points)
+
+    def log_distances(roots) -> np.ndarray:
+        return np.sum(np.log(np.abs(points[None, :] - np.asarray(roots, dtype=complex)[:, None])), axis=0)
+
+    with np.errstate(divide="ignore"):
+        # in logs, far roots would overflow the product
+        log_removed = log_distances(removed_zeros) - log_distances(removed_poles)
+        log_reduced = np.log(np.abs(complex_f_resp))
+    log_full = log_reduced + log_removed
+    full = np.exp(log_full - np.max(log_full))
+    reduced = np.exp(log_reduced - np.max(log_reduced))
+    return float(np.max(np.abs(full - reduced)))
+
+
+def reduce_model(model, tolerance: float = default_tolerance, ratio: float = far_ratio) -> ReductionReport:
+    poles, zeros, cancelled = cancel_pairs(model.poles, model.zeros, tolerance)
+    far_poles, far_zeros = {}, {}
+    if model.type.name == "ANALOG":
+        poles, zeros, far_poles, far_zeros = split_far_roots(poles, zeros, ratio)
+    return ReductionReport(poles=poles,
+                           zeros=zeros,
+                           cancelled=cancelled,
+                           dropped_poles=far_poles,
+                           dropped_zeros=far_zeros,
+                           original_order=get_order(model.poles, model.zeros),
+                           effective_order=get_order(poles, zeros),
+                           gain=get_far_gain(far_poles, far_zeros))
@@ -0,0 +1,141 @@
+"""Loading many poles and zeros at once.
+
+Roots can come from CSV, NPY/NPZ or JSON files or directly from scipy's zpk output. Near duplicates are merged into one
+root with a multiplicity (fach) and complex roots are paired with their conjugates, both within a tolerance. Neighbours
+are found with a KD-tree over the complex plane instead of comparing every pair of roots.
+"""
+import json
+import os
+from collections import defaultdict
+import numpy as np
+from numpy.typing import NDArray
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+default_tolerance = 1e-6
+
+# kind column of CSV and NPY tables
+ZERO_KIND, POLE_KIND = 0, 1
+STRING_2_KIND = {"zero": ZERO_KIND, "z": ZERO_KIND, "pole": POLE_KIND, "p": POLE_KIND}
+
+
+def cluster_roots(roots: NDArray, tolerance: float = default_tolerance) -> tuple[NDArray, NDArray]:
+    """groups roots closer than tolerance (chains of close roots end up in one group) -> (centers, counts).
+    Roots within tolerance of the real axis are put on it, so they never get a conjugate."""
+    roots = np.asarray(roots, dtype=complex).ravel()
+    if roots.size == 0:
+        return np.zeros(0, dtype=complex), np.zeros(0, dtype=int)
+    roots = np.where(np.abs(roots.imag) <= tolerance, roots.real + 0j, roots)
+    points = np.column_stack([roots.real, roots.imag])
+    pairs = cKDTree(points).query_pairs(tolerance, output_type="ndarray")
+    adjacency = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(roots), len(roots)))
+    n_groups, labels = connected_components(adjacency, directed=False)
+    counts = np.bincount(labels, minlength=n_groups)
+    centers = (np.bincount(labels, weights=roots.real, minlength=n_groups)
+               + 1j * np.bincount(labels, weights=roots.imag, minlength=n_groups)) / counts
+    # a group can mix roots on and just off the real axis, its center belongs on the axis as well
+    centers = np.where(np.abs(centers.imag) <= tolerance, centers.real + 0j, centers)
+    return centers, counts
+
+
+def pair_conjugates(centers: NDArray, counts: NDArray, tolerance: float = default_tolerance) -> dict[complex, int]:
+    """roots dict with exact conjugate pairs. An upper half plane root is matched with the nearest lower half plane
+    root to its conjugate, the pair is made exactly symmetric and gets the larger of both multiplicities. Roots
+    without a partner get their conjugate added, like entering a complex root in the entry panels does."""
+    roots = defaultdict(int)
+    real = centers.imag == 0
+    for root, fach in zip(centers[real].real, counts[real]):
+        roots[complex(root, 0)] += int(fach)
+
+    upper, upper_counts = centers[centers.imag > 0], counts[centers.imag > 0]
+    lower, lower_counts = centers[centers.imag < 0], counts[centers.imag < 0]
+    matched = np.full(len(upper), len(lower))
+    if len(upper) and len(lower):
+        _, matched = cKDTree(np.column_stack([lower.real, lower.imag])).query(
+            np.column_stack([upper.real, -upper.imag]), distance_upper_bound=tolerance)
+    has_partner = matched < len(lower)
+    partners = matched[has_partner]
+    paired_roots, paired_counts = upper.copy(), upper_counts.copy()
+    paired_roots[has_partner] = (upper[has_partner] + np.conj(lower[partners])) / 2
+    paired_counts[has_partner] = np.maximum(upper_counts[has_partner], lower_counts[partners])
+    lonely_lower = np.ones(len(lower), dtype=bool)
+    lonely_lower[partners] = False
+
+    for root, fach in zip(np.concatenate([paired_roots, np.conj(lower[lonely_lower])]),
+                          np.concatenate([paired_counts, lower_counts[lonely_lower]])):
+        roots[complex(root)] += int(fach)
+        roots[complex(np.conj(root))] += int(fach)
+    return roots
+
+
+def merge_roots(roots: NDArray, tolerance: float = default_tolerance) -> dict[complex, int]:
+    """roots dict (root -> fach) of a flat list of roots in which multiple roots appear repeatedly"""
+    return pair_conjugates(*cluster_roots(roots, tolerance), tolerance)
+
+
+def get_roots_dicts_from_zpk(z: NDArray, p: NDArray, k: float = 1,
+                             tolerance: float = default_tolerance) -> tuple[dict[complex, int], dict[complex, int]]:
+    """poles and zeros dicts of scipy zpk output (e.g. signal.butter(..., output="zpk")). The gain is dropped, the
+    model always works with a gain of 1 (see Model.update_num_denom)"""
+    return merge_roots(p, tolerance), merge_roots(z, tolerance)
+
+
+def get_roots_from_table(table: NDArray) -> tuple[NDArray, NDArray]:
+    # rows of kind, real, imaginary and an optional fach column, each row stands for fach equal roots
+    table = np.atleast_2d(np.asarray(table, dtype=float))
+    if table.shape[1] not in (3, 4):
+        raise ValueError("root tables need the columns kind, real, imaginary and optionally fach")
+    fach = table[:, 3].astype(int) if table.shape[1] == 4 else np.ones(len(table), dtype=int)
+    if np.any(fach < 0):
+        raise ValueError("fach can not be negative")
+    roots = np.repeat(table[:, 1] + 1j * table[:, 2], fach)
+    kinds = np.repeat(table[:, 0].astype(int), fach)
+    return roots[kinds == POLE_KIND], roots[kinds == ZERO_KIND]
+
+
+def read_csv_table(path: str) -> NDArray:
+    # kind is written as pole/zero (or p/z), a header line is skipped
+    cells = np.loadtxt(path, delimiter=",", dtype=str, comments="#", ndmin=2)
+    cells = np.char.strip(np.char.lower(cells))
+    if cells.size and cells[0, 0] not in STRING_2_KIND:
+        cells = cells[1:]
+    kinds = np.vectorize(STRING_2_KIND.__getitem__, otypes=[float])(cells[:, 0]) if len(cells) else np.zeros(0)
+    return np.column_stack([kinds, cells[:, 1:].astype(float)]) if len(cells) else np.zeros((0, 3))
+
+
+def get_roots_from_json(content: dict) -> tuple[NDArray, NDArray]:
+    # state files (see Model.get_state_dict) list [real, imaginary, fach], zpk style files {"z": ..., "p": ...}
+    # list [real, imaginary] of every single root
+    poles_list = content.get("poles", content.get("p", []))
+    zeros_list = content.get("zeros", content.get("z", []))
+    table = [[POLE_KIND, *root] for root in poles_list] + [[ZERO_KIND, *root] for root in zeros_list]
+    if not table:
+        return np.zeros(0, dtype=complex), np.zeros(0, dtype=complex)
+    return get_roots_from_table(np.asarray(table, dtype=float))
+
+
+def read_roots_file(path: str) -> tuple[NDArray, NDArray]:
+    """flat arrays of poles and zeros (every root repeated fach times) of a .csv, .npy, .npz or .json file.
+    .npy files hold the same table as CSV files with kind 1 for poles and 0 for zeros, .npz files hold complex arrays
+    named poles/zeros or p/z like scipy's zpk output"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return get_roots_from_table(read_csv_table(path))
+    if extension == ".npy":
+        return get_roots_from_table(np.load(path, allow_pickle=False))
+    if extension == ".npz":
+        with np.load(path, allow_pickle=False) as arrays:
+            poles = arrays["poles"] if "poles" in arrays else arrays.get("p", np.zeros(0))
+            zeros = arrays["zeros"] if "zeros" in arrays else arrays.get("z", np.zeros(0))
+            return np.asarray(poles, dtype=complex).ravel(), np.asarray(zeros, dtype=complex).ravel()
+    if extension == ".json":
+        with open(path, "r") as file:
+            return get_roots_from_json(json.load(file))
+    raise ValueError(f"can not import roots from {extension} files")
+
+
+def import_roots_file(path: str, tolerance: float = default_tolerance) -> tuple[dict[complex, int], dict[complex, int]]:
+    """poles and zeros dicts of a roots file, merged and conjugate paired within tolerance"""
+    poles, zeros = read_roots_file(path)
+    return merge_roots(poles, tolerance), merge_roots(zeros, tolerance)
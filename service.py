@@ -0,0 +1,340 @@
+"""Local HTTP/JSON evaluation service for tools that need the Model's responses but can not drive the Tk app.
+
+Requests that arrive within a short window are evaluated together: all roots of a window go through one
+batch_eval.batch_freq_resp call per model type, and time responses are batched per time grid. Results are kept in an
+LRU evaluation cache (identical requests within one window are evaluated only once as well). Latency, batch sizes and
+throughput are reported under /metrics. The service only listens on the loopback interface or a unix socket.
+
+    POST /evaluate   {"type": "DIGITAL", "sampling_time": 0.01, "time_resp": "IMPULSE",
+                      "poles": [[0.8, 0.5, 1], [0.8, -0.5, 1]], "zeros": [[-1, 0, 2]]}
+                     or {"requests": [...]} for several at once
+    GET  /metrics
+    GET  /health
+
+usage: python service.py [--host 127.0.0.1] [--port 8765] [--unix PATH] [--window-ms 5]
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import numpy as np
+from numpy.typing import NDArray
+import batch_eval
+import grids
+import spectral_time
+from model import ModelType, TimeResponse, get_roots_dict_from_list
+from utilities import build_repeated_item_list_from_dict
+
+# the grids Model.update_freq_resp/update_time_resp get from scipy's defaults
+digital_freq_points = 512
+analog_freq_points = 200
+digital_time_samples = 30
+analog_time_points = 100
+
+default_window = 0.005
+default_max_batch_size = 256
+default_cache_size = 1024
+latency_history = 10000
+
+HTTP_STATUS = {200: "200 OK", 400: "400 Bad Request", 404: "404 Not Found", 405: "405 Method Not Allowed",
+               500: "500 Internal Server Error"}
+
+
+@dataclass(frozen=True)
+class EvalRequest:
+    """canonical form of a request: roots are listed fach times and sorted, so equal filters give equal requests"""
+    type: ModelType
+    time_resp: TimeResponse
+    sampling_time: float
+    poles: tuple[complex, ...]
+    zeros: tuple[complex, ...]
+
+
+def get_sorted_roots(roots_list: list[list[float]]) -> tuple[complex, ...]:
+    roots = build_repeated_item_list_from_dict(get_roots_dict_from_list(roots_list))
+    # json.loads accepts NaN and Infinity, there is no response of such roots to return
+    if not np.all(np.isfinite(roots)):
+        raise ValueError("roots have to be finite numbers")
+    return tuple(sorted(roots, key=lambda root: (root.real, root.imag)))
+
+
+def parse_request(content: dict) -> EvalRequest:
+    # same format as the state files of Model.get_state_dict
+    model_type = ModelType[content["type"]]
+    if model_type == ModelType.DIGITAL and not 0 < float(content.get("sampling_time", .01)) < np.inf:
+        raise ValueError("the sampling time has to be a positive finite number")
+    return EvalRequest(type=model_type,
+                       time_resp=TimeResponse[content.get("time_resp", TimeResponse.IMPULSE.name)],
+                       sampling_time=float(content.get("sampling_time", .01)) if model_type == ModelType.DIGITAL else 0.,
+                       poles=get_sorted_roots(content.get("poles", [])),
+                       zeros=get_sorted_roots(content.get("zeros", [])))
+
+
+def get_analog_time(poles: tuple[complex, ...]) -> NDArray:
+    # the default grid of scipy's impulse/step: 7 time constants of the slowest pole
+    slowest = min((abs(pole.real) for pole in poles), default=0.)
+    return np.linspace(0., 7. / (slowest if slowest != 0 else 1.), analog_time_points)
+
+
+def get_freqs(request: EvalRequest) -> NDArray:
+    # the grids of the Model, shared through the grid cache
+    if request.type == ModelType.DIGITAL:
+        grid = grids.get_digital_spec(1 / request.sampling_time, digital_freq_points)
+    else:
+        grid = grids.get_analog_spec(request.zeros, request.poles, analog_freq_points)
+    return grids.grid_cache.get(grid).freqs
+
+
+def get_points(request: EvalRequest, freqs: NDArray) -> NDArray:
+    if request.type == ModelType.DIGITAL:
+        return batch_eval.get_digital_points(freqs, request.sampling_time)
+    return batch_eval.get_analog_points(freqs)
+
+
+def has_time_resp(request: EvalRequest) -> bool:
+    if len(request.zeros) > len(request.poles):
+        return False
+    return request.type == ModelType.DIGITAL or len(request.poles) > 0
+
+
+def evaluate_batch(requests: list[EvalRequest]) -> list[dict]:
+    """results of all requests, one batch_freq_resp call per model type and one batch_time_resp call per time grid"""
+    results = [{} for _ in requests]
+    by_type = defaultdict(list)
+    for index, request in enumerate(requests):
+        by_type[request.type].append(index)
+    for indices in by_type.values():
+        freqs = np.stack([get_freqs(requests[index]) for index in indices])
+        points = np.stack([get_points(requests[index], row) for index, row in zip(indices, freqs)])
+        zeros = batch_eval.stack_root_sets([list(requests[index].zeros) for index in indices])
+        poles = batch_eval.stack_root_sets([list(requests[index].poles) for index in indices])
+        complex_f_resp = batch_eval.batch_freq_resp(zeros, poles, points)
+        if requests[indices[0]].type == ModelType.DIGITAL:
+            complex_f_resp *= batch_eval.get_freqz_factor(zeros, poles, points)
+        abs_resp = np.abs(complex_f_resp)
+        max_abs_resp = np.max(abs_resp, axis=1)
+        for row, index in enumerate(indices):
+            results[index].update(freqs=freqs[row].tolist(),
+                                  magnitude=(abs_resp[row] / max_abs_resp[row]).tolist(),
+                                  max_abs_resp=float(max_abs_resp[row]),
+                                  phase=np.angle(complex_f_resp[row]).tolist(),
+                                  time=None,
+                                  time_values=None)
+
+    by_time_grid = defaultdict(list)
+    for index, request in enumerate(requests):
+        if has_time_resp(request):
+            if request.type == ModelType.DIGITAL:
+                time = spectral_time.get_digital_time(request.sampling_time, digital_time_samples)
+            else:
+                time = get_analog_time(request.poles)
+            by_time_grid[(request.type, request.time_resp, tuple(time))].append(index)
+    for (model_type, time_resp, time), indices in by_time_grid.items():
+        _, time_values = batch_eval.batch_time_resp(
+            batch_eval.stack_root_sets([list(requests[index].zeros) for index in indices]),
+            batch_eval.stack_root_sets([list(requests[index].poles) for index in indices]),
+            analog=model_type == ModelType.ANALOG,
+            step=time_resp == TimeResponse.STEP,
+            time=np.asarray(time))
+        for row, index in enumerate(indices):
+            results[index].update(time=list(time), time_values=time_values[row].tolist())
+    return results
+
+
+def evaluate_batch_encoded(requests: list[EvalRequest]) -> list[bytes]:
+    # encoding costs more than the evaluation itself, it is done once per result (in the batch thread) and the encoded
+    # result is what the cache keeps. Strict json has no NaN or Infinity, roots that overflow the responses are an error
+    try:
+        return [json.dumps(result, allow_nan=False).encode() for result in evaluate_batch(requests)]
+    except ValueError:
+        raise ValueError("the responses of the filter are not finite, its roots are too large") from None
+
+
+@dataclass
+class ServiceMetrics:
+    started: float = field(default_factory=time.perf_counter)
+    requests: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    batches: int = 0
+    evaluated: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=latency_history))
+
+    def to_dict(self) -> dict:
+        uptime = time.perf_counter() - self.started
+        latencies_ms = 1000 * np.asarray(self.latencies) if self.latencies else np.zeros(1)
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+        return {"uptime_s": uptime,
+                "requests": self.requests,
+                "errors": self.errors,
+                "throughput_rps": self.requests / uptime if uptime > 0 else 0.,
+                "cache_hits": self.cache_hits,
+                "cache_hit_rate": self.cache_hits / self.requests if self.requests else 0.,
+                "batches": self.batches,
+                "mean_batch_size": self.evaluated / self.batches if self.batches else 0.,
+                "latency_ms": {"p50": p50, "p95": p95, "p99": p99, "max": float(np.max(latencies_ms))}}
+
+
+class EvaluationService:
+    def __init__(self, window: float = default_window, max_batch_size: int = default_max_batch_size,
+                 cache_size: int = default_cache_size) -> None:
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.cache_size = cache_size
+        self.cache: OrderedDict[EvalRequest, bytes] = OrderedDict()
+        self.metrics = ServiceMetrics()
+        self._pending: dict[EvalRequest, asyncio.Future] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # batches are computed one after another off the event loop, which keeps accepting requests meanwhile
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def evaluate(self, request: EvalRequest) -> bytes:
+        if request in self.cache:
+            self.cache.move_to_end(request)
+            self.metrics.cache_hits += 1
+            return self.cache[request]
+        if request not in self._pending:
+            loop = asyncio.get_running_loop()
+            self._pending[request] = loop.create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+        return await asyncio.shield(self._pending[request])
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: dict[EvalRequest, asyncio.Future]) -> None:
+        requests = list(batch.keys())
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self._executor, evaluate_batch_encoded, requests)
+        except Exception:
+            # one bad request must not fail the others of its window: each is evaluated alone, only the one that
+            # fails gets the error
+            results = []
+            for request in requests:
+                try:
+                    results.extend(await loop.run_in_executor(self._executor, evaluate_batch_encoded, [request]))
+                except Exception as error:
+                    results.append(error)
+        self.metrics.batches += 1
+        self.metrics.evaluated += len(requests)
+        for request, result in zip(requests, results):
+            if isinstance(result, Exception):
+                batch[request].set_exception(result)
+                continue
+            self.cache[request] = result
+            batch[request].set_result(result)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def route(self, method: str, path: str, body: bytes) -> tuple[int, dict | bytes]:
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, self.metrics.to_dict()
+        if path != "/evaluate":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST for /evaluate"}
+
+        start = time.perf_counter()
+        try:
+            content = json.loads(body)
+            contents = content["requests"] if "requests" in content else [content]
+            requests = [parse_request(item) for item in contents]
+        except (ValueError, KeyError, TypeError) as error:
+            self.metrics.errors += 1
+            return 400, {"error": f"invalid request: {error}"}
+        try:
+            results = await asyncio.gather(*(self.evaluate(request) for request in requests))
+        except ValueError as error:
+            self.metrics.errors += 1
+            return 400, {"error": f"invalid request: {error}"}
+        except Exception as error:
+            self.metrics.errors += 1
+            return 500, {"error": f"evaluation failed: {error}"}
+        self.metrics.requests += len(requests)
+        self.metrics.latencies.append(time.perf_counter() - start)
+        return 200, b'{"results": [' + b", ".join(results) + b"]}" if "requests" in content else results[0]
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # minimal HTTP/1.1 with keep-alive, enough for scripts and a local front-end
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, value = line.decode("latin-1").split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self.route(method, path.split("?")[0], body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                writer.write((f"HTTP/1.1 {HTTP_STATUS[status]}\r\n"
+                              f"Content-Type: application/json\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            ...
+        finally:
+            writer.close()
+
+
+def is_local_host(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+async def serve(service: EvaluationService, host: str = "127.0.0.1", port: int = 8765,
+                unix_path: str | None = None) -> None:
+    if unix_path:
+        server = await asyncio.start_unix_server(service.handle_connection, path=unix_path)
+    else:
+        server = await asyncio.start_server(service.handle_connection, host=host, port=port)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="local pole zero evaluation service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on a unix socket instead of a tcp port")
+    parser.add_argument("--window-ms", type=float, default=1000 * default_window)
+    parser.add_argument("--max-batch", type=int, default=default_max_batch_size)
+    parser.add_argument("--cache-size", type=int, default=default_cache_size)
+    args = parser.parse_args()
+    if not is_local_host(args.host):
+        parser.error("the service only listens on localhost")
+
+    service = EvaluationService(args.window_ms / 1000, args.max_batch, args.cache_size)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        ...
+
+
+if __name__ == "__main__":
+    main()
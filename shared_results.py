@@ -0,0 +1,140 @@
+"""Arrays shared between the main process and process pool workers.
+
+Instead of pickling roots, frequency/time responses and animation data to and from every worker, the main process
+preallocates them in multiprocessing.shared_memory blocks. Workers attach to the blocks by name (in the pool
+initializer) and write their rows directly into the result arrays, the main process reads them without any copy.
+
+The arrays of a store are only valid while it is open: closing unmaps the memory, so whatever has to outlive the store
+has to be copied out of it first. Stores that are never closed are at least unlinked when the program exits, so no
+block is left behind in the system.
+"""
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+import numpy as np
+from numpy.typing import NDArray
+import batch_eval
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    """everything a worker needs to attach to an array, small enough to be passed to every worker"""
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+def _get_array(block: shared_memory.SharedMemory, spec: SharedArraySpec) -> NDArray:
+    return np.ndarray(spec.shape, dtype=spec.dtype, buffer=block.buf)
+
+
+def _unlink_blocks(blocks: list[shared_memory.SharedMemory]) -> None:
+    for block in blocks:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            ...
+
+
+class SharedResultStore:
+    """owner of the shared blocks, to be used as context manager around the pool work"""
+
+    def __init__(self) -> None:
+        self._blocks: list[shared_memory.SharedMemory] = []
+        self.arrays: dict[str, NDArray] = {}
+        self.specs: dict[str, SharedArraySpec] = {}
+        # only unlinks (never unmaps) at exit, unmapping arrays that may still be in use would crash the process
+        self._finalizer = weakref.finalize(self, _unlink_blocks, self._blocks)
+
+    def __enter__(self) -> "SharedResultStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def allocate(self, key: str, shape: tuple[int, ...], dtype=float) -> NDArray:
+        dtype = np.dtype(dtype)
+        # shared memory blocks can not be empty
+        block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        self._blocks.append(block)
+        self.specs[key] = SharedArraySpec(block.name, tuple(int(n) for n in shape), dtype.str)
+        self.arrays[key] = _get_array(block, self.specs[key])
+        return self.arrays[key]
+
+    def put(self, key: str, array: NDArray) -> NDArray:
+        array = np.asarray(array)
+        shared = self.allocate(key, array.shape, array.dtype)
+        shared[...] = array
+        return shared
+
+    def close(self) -> None:
+        self.arrays.clear()
+        self.specs.clear()
+        for block in self._blocks:
+            block.close()
+        self._finalizer()
+
+
+# blocks a worker attached to, they stay mapped for the lifetime of the worker process
+_worker_blocks: list[shared_memory.SharedMemory] = []
+_worker_arrays: dict[str, NDArray] = {}
+
+
+def attach_arrays(specs: dict[str, SharedArraySpec]) -> dict[str, NDArray]:
+    arrays = {}
+    for key, spec in specs.items():
+        block = shared_memory.SharedMemory(name=spec.name)
+        _worker_blocks.append(block)
+        arrays[key] = _get_array(block, spec)
+    return arrays
+
+
+def init_worker(specs: dict[str, SharedArraySpec]) -> None:
+    # pool initializer, the arrays are attached once per worker instead of once per job
+    global _worker_arrays
+    _worker_arrays = attach_arrays(specs)
+
+
+def get_worker_arrays() -> dict[str, NDArray]:
+    return _worker_arrays
+
+
+def _evaluate_rows_job(job: tuple[int, int, bool, bool]) -> None:
+    start, stop, analog, step = job
+    arrays = _worker_arrays
+    rows = slice(start, stop)
+    gains = arrays["gains"][rows] if "gains" in arrays else None
+    arrays["complex_f_resp"][rows] = batch_eval.batch_freq_resp(arrays["zeros"][rows], arrays["poles"][rows],
+                                                                arrays["points"], gains)
+    _, arrays["time_values"][rows] = batch_eval.batch_time_resp(arrays["zeros"][rows], arrays["poles"][rows],
+                                                                analog=analog, step=step, time=arrays["time"],
+                                                                gains=gains)
+
+
+def evaluate_in_pool(store: SharedResultStore, zeros: NDArray, poles: NDArray, points: NDArray, analog: bool,
+                     step: bool, time: NDArray, gains: NDArray | None = None,
+                     workers: int | None = None) -> tuple[NDArray, NDArray]:
+    """batch_freq_resp and batch_time_resp of all rows, split into blocks of rows over a process pool. The returned
+    frequency and time responses live in the store"""
+    store.put("zeros", zeros)
+    store.put("poles", poles)
+    store.put("points", points)
+    store.put("time", time)
+    if gains is not None:
+        store.put("gains", gains)
+    complex_f_resp = store.allocate("complex_f_resp", (zeros.shape[0], len(points)), complex)
+    time_values = store.allocate("time_values", (zeros.shape[0], len(time)), float)
+
+    workers = workers if workers else os.cpu_count()
+    bounds = np.linspace(0, zeros.shape[0], min(4 * workers, zeros.shape[0]) + 1).astype(int)
+    jobs = [(int(start), int(stop), analog, step) for start, stop in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(store.specs,)) as pool:
+        # jobs return nothing, errors of the workers are still raised here
+        list(pool.map(_evaluate_rows_job, jobs))
+    return complex_f_resp, time_values
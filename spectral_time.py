@@ -0,0 +1,96 @@
+"""Digital impulse and step responses from the frequency response on the whole unit circle.
+
+The inverse FFT of N equally spaced samples of H(e^jw) is the impulse response with its tail folded back every N
+samples (time aliasing). With all poles inside the unit circle the tail decays like r^n (r the largest pole radius), so
+N is chosen as the power of two for which the folded tail is below a tolerance over the plotted samples. When the 512
+point spectrum of Model.update_freq_resp is large enough it is used as it is. A few more points are evaluated on a
+grid of the grid cache, poles that need more than max_fft_points are simulated with dimpulse instead, which is far
+cheaper than the power tables of such a grid. The step response is the cumulative sum of the impulse response.
+
+The error bound follows from the geometric tail without evaluating anything more: the samples folded back at the
+multiples k*N are about the peak of the response times r^(k*N), all of them together peak * r^N / (1 - r^N).
+"""
+from dataclasses import dataclass, field
+from functools import lru_cache
+import numpy as np
+from numpy.typing import NDArray
+from scipy.signal import dimpulse
+import grids
+
+default_tolerance = 1e-10
+# larger grids cost more than simulating (and would crowd the other grids out of the grid cache)
+max_fft_points = 2 ** 10
+
+
+@dataclass
+class SpectralTimeResponse:
+    time: NDArray = field(repr=False)
+    values: NDArray = field(repr=False)
+    n_fft: int
+    error_bound: float
+
+
+@lru_cache(maxsize=64)
+def get_digital_time(sampling_time: float, n_samples: int) -> NDArray:
+    # the time grid only depends on the sampling time. It is taken from dimpulse itself (of a trivial system), whose
+    # grid can be one sample short because of rounding, so results stay identical to the simulated ones
+    time = dimpulse(([1.], [1.], sampling_time), n=n_samples)[0]
+    time.flags.writeable = False
+    return time
+
+
+def get_pole_radius(poles) -> float:
+    return float(np.max(np.abs(poles), initial=0.))
+
+
+def get_fft_points(pole_radius: float, n_samples: int, tolerance: float = default_tolerance) -> int | None:
+    """smallest power of two N with pole_radius^N below tolerance after n_samples, None when the poles do not decay
+    (on or outside the unit circle) and there is no spectrum to invert"""
+    if pole_radius >= 1:
+        return None
+    n_tail = 1 if pole_radius == 0 else int(np.ceil(np.log(tolerance) / np.log(pole_radius)))
+    return int(2 ** np.ceil(np.log2(max(n_samples + n_tail, 2))))
+
+
+def get_aliasing_bound(pole_radius: float, n_fft: int, peak: float) -> float:
+    folded = pole_radius ** n_fft
+    return float(peak * folded / (1 - folded))
+
+
+def invert_spectrum(spectrum: NDArray, n_samples: int, delay: int) -> NDArray:
+    # freqz treats num and denom as polynomials in z^-1, that is H(z) * z^delay with delay = #poles - #zeros, so the
+    # result has to be shifted back by delay samples to be the response of the model (and of dimpulse)
+    advanced = np.fft.ifft(spectrum)[:n_samples].real
+    return np.concatenate([np.zeros(delay), advanced])[:n_samples]
+
+
+def get_spectral_time_resp(num, denom, poles, sampling_time: float, n_samples: int, step: bool = False,
+                           spectrum: NDArray | None = None,
+                           tolerance: float = default_tolerance) -> SpectralTimeResponse | None:
+    """impulse (or step) response of num/denom from its spectrum, on the time grid of dimpulse(..., n=n_samples).
+    spectrum is an already evaluated freqz(num, denom, whole=True) that is used if it has enough points. None when the
+    filter is not stable or not proper or its poles need more than max_fft_points, dimpulse has to be used then"""
+    time = get_digital_time(sampling_time, n_samples)
+    n_samples = len(time)
+    delay = len(denom) - len(num)
+    pole_radius = get_pole_radius(poles)
+    n_fft = get_fft_points(pole_radius, n_samples + max(delay, 0), tolerance)
+    if n_fft is None or delay < 0:
+        return None
+    if spectrum is not None and len(spectrum) >= n_fft and len(spectrum) & (len(spectrum) - 1) == 0:
+        n_fft = len(spectrum)
+    elif n_fft <= max_fft_points:
+        spectrum = grids.grid_cache.evaluate(grids.get_digital_spec(1 / sampling_time, n_fft), num, denom)[1]
+    else:
+        # poles close to the unit circle would need a huge grid, simulating is cheaper then
+        return None
+    values = invert_spectrum(spectrum, n_samples, delay)
+    error_bound = get_aliasing_bound(pole_radius, n_fft, float(np.max(np.abs(values), initial=0.)))
+    if step:
+        values = np.cumsum(values)
+        # every step sample adds up the errors of the impulse samples before it
+        error_bound *= n_samples
+    return SpectralTimeResponse(time=time,
+                                values=values,
+                                n_fft=n_fft,
+                                error_bound=error_bound)
@@ -0,0 +1,191 @@
+"""Event loop watchdog: how late the Tk main loop runs its callbacks, and where it was when it hung.
+
+A heartbeat is put on the main loop with after(interval_ms). Every beat records how much later it ran than asked for
+(the scheduling lag) and schedules the next one. A helper thread watches the time of the last beat: as soon as a beat
+is one interval late, it samples the stack of the main thread every sample_interval until the beats are back. If no
+beat came for longer than threshold_ms, that was a stall, and it is logged with its duration, the time the garbage
+collector ran during it and the stacks it was sampled in, most frequent first. Sampling starts before the threshold
+is reached, so the beginning of a stall is in the samples as well. stop() appends a summary of all stalls to the log.
+
+Samples can only be taken when the main thread lets go of the GIL, a long call into C code that keeps it (drawing a
+large figure, for example) shows up as one sample at the line that called it.
+
+    watchdog = StallWatchdog(app, log_path="stalls.log")  # or: python main.py --watchdog stalls.log
+    watchdog.start()
+    app.mainloop()
+    watchdog.stop()
+"""
+import gc
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass, field
+import numpy as np
+from animation_clock import Scheduler
+
+default_interval_ms = 50
+default_threshold_ms = 200
+default_sample_interval = 0.01
+default_log_path = "stalls.log"
+# frames shown per stack in the log, innermost last
+stack_depth = 8
+top_stacks = 5
+max_lags = 10000
+
+
+@dataclass
+class Stall:
+    start: float
+    duration: float
+    gc_time: float
+    samples: Counter = field(repr=False)
+
+    def format(self, n_stacks: int = top_stacks) -> str:
+        lines = [f"stall at {time.strftime('%H:%M:%S', time.localtime(self.start))}: {1000 * self.duration:.0f} ms, "
+                 f"{sum(self.samples.values())} samples, gc {1000 * self.gc_time:.0f} ms"]
+        for stack, count in self.samples.most_common(n_stacks):
+            lines.append(f"  {count:5d}  {' > '.join(stack)}")
+        return "\n".join(lines)
+
+
+def format_frame(frame: traceback.FrameSummary) -> str:
+    return f"{os.path.splitext(os.path.basename(frame.filename))[0]}.{frame.name}:{frame.lineno}"
+
+
+def sample_stack(thread_id: int, depth: int = stack_depth) -> tuple[str, ...] | None:
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return None
+    # the gc callback of the watchdog runs on the main thread too, it is not part of what the application does
+    stack = [summary for summary in traceback.extract_stack(frame) if summary.filename != __file__]
+    return tuple(format_frame(summary) for summary in stack[-depth:])
+
+
+class StallWatchdog:
+    def __init__(self, scheduler: Scheduler, threshold_ms: float = default_threshold_ms,
+                 interval_ms: int = default_interval_ms, sample_interval: float = default_sample_interval,
+                 log_path: str | None = default_log_path) -> None:
+        self.scheduler = scheduler
+        self.threshold = threshold_ms / 1000
+        self.interval_ms = interval_ms
+        self.sample_interval = sample_interval
+        self.log_path = log_path
+        self.lags = deque(maxlen=max_lags)
+        self.stalls: list[Stall] = []
+        self._main_thread_id = threading.main_thread().ident
+        self._expected_beat = None
+        self._last_beat = None
+        self._job = None
+        self._thread = None
+        self._stopped = threading.Event()
+        self._gc_start = None
+        self._gc_total = 0.0
+        self._gc_at_beat = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._job is not None
+
+    def start(self) -> None:
+        self._last_beat = time.perf_counter()
+        self._expected_beat = self._last_beat + self.interval_ms / 1000
+        self._job = self.scheduler.after(self.interval_ms, self._beat)
+        gc.callbacks.append(self._on_gc)
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._job is not None:
+            # the main loop may already be gone when the window was closed
+            try:
+                self.scheduler.after_cancel(self._job)
+            except Exception:
+                pass
+            self._job = None
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        self.write_log(self.format_summary())
+
+    def _beat(self) -> None:
+        now = time.perf_counter()
+        self.lags.append(max(now - self._expected_beat, 0.0))
+        self._gc_at_beat = self._gc_total
+        self._last_beat = now
+        self._expected_beat = now + self.interval_ms / 1000
+        self._job = self.scheduler.after(self.interval_ms, self._beat)
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        # collections can run on any thread, only their total time during a stall is of interest
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        elif self._gc_start is not None:
+            self._gc_total += time.perf_counter() - self._gc_start
+            self._gc_start = None
+
+    def _is_late(self, last_beat: float) -> bool:
+        return time.perf_counter() - last_beat > 2 * self.interval_ms / 1000
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.sample_interval):
+            last_beat = self._last_beat
+            if not self._is_late(last_beat):
+                continue
+            samples = Counter()
+            gc_at_beat = self._gc_at_beat
+            # sampled until a new beat comes (or the watchdog is stopped in the middle of a stall)
+            while self._last_beat == last_beat and not self._stopped.is_set():
+                stack = sample_stack(self._main_thread_id)
+                if stack is not None:
+                    samples[stack] += 1
+                time.sleep(self.sample_interval)
+            end = self._last_beat if self._last_beat != last_beat else time.perf_counter()
+            # the beat was due one interval after the last one
+            due = last_beat + self.interval_ms / 1000
+            if end - due <= self.threshold:
+                continue
+            stall = Stall(start=time.time() - (time.perf_counter() - due),
+                          duration=end - due,
+                          gc_time=self._gc_total - gc_at_beat,
+                          samples=samples)
+            self.stalls.append(stall)
+            self.write_log(stall.format())
+
+    def get_summary(self) -> dict:
+        lags_ms = 1000 * np.asarray(self.lags, dtype=float)
+        hot_frames = Counter()
+        for stall in self.stalls:
+            for stack, count in stall.samples.items():
+                # every function is counted once per sample, including the ones it called
+                for frame in set(stack):
+                    hot_frames[frame] += count
+        return {"beats": len(lags_ms),
+                "lag_p50_ms": float(np.percentile(lags_ms, 50)) if len(lags_ms) else 0.0,
+                "lag_p95_ms": float(np.percentile(lags_ms, 95)) if len(lags_ms) else 0.0,
+                "lag_max_ms": float(np.max(lags_ms, initial=0.0)),
+                "stalls": len(self.stalls),
+                "stalled_ms": 1000 * sum(stall.duration for stall in self.stalls),
+                "gc_ms": 1000 * sum(stall.gc_time for stall in self.stalls),
+                "hot_frames": hot_frames.most_common(top_stacks * 2)}
+
+    def format_summary(self) -> str:
+        summary = self.get_summary()
+        lines = [f"summary: {summary['beats']} beats, lag p50 {summary['lag_p50_ms']:.1f} ms, "
+                 f"p95 {summary['lag_p95_ms']:.1f} ms, max {summary['lag_max_ms']:.0f} ms; "
+                 f"{summary['stalls']} stalls, {summary['stalled_ms']:.0f} ms stalled, gc {summary['gc_ms']:.0f} ms"]
+        for frame, count in summary["hot_frames"]:
+            lines.append(f"  {count:5d}  {frame}")
+        return "\n".join(lines)
+
+    def write_log(self, text: str) -> None:
+        if self.log_path is None:
+            return
+        with open(self.log_path, "a") as file:
+            file.write(text + "\n")
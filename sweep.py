@@ -0,0 +1,139 @@
+from dataclasses import dataclass, field
+from enum import Enum, auto
+import numpy as np
+from numpy.typing import NDArray
+import batch_eval
+import shared_results
+from model import Model, ModelType, TimeResponse
+from utilities import build_repeated_item_list_from_dict
+
+
+class SweepParameter(Enum):
+    RADIUS = auto()
+    ANGLE = auto()
+    GAIN = auto()
+
+
+STRING_2_SWEEPPARAMETER = {"radius": SweepParameter.RADIUS,
+                           "angle": SweepParameter.ANGLE,
+                           "gain": SweepParameter.GAIN}
+
+
+@dataclass
+class SweepResult:
+    """roots and responses of every sweep step, each array has one row per step"""
+    parameter: SweepParameter
+    values: NDArray
+    zeros: NDArray = field(repr=False)
+    poles: NDArray = field(repr=False)
+    freqs: NDArray = field(repr=False)
+    complex_f_resp: NDArray = field(repr=False)
+    normalized_abs_f_resp: NDArray = field(repr=False)
+    time: NDArray = field(repr=False)
+    time_values: NDArray = field(repr=False)
+
+
+def get_model_points(model: Model) -> NDArray:
+    if model.type == ModelType.DIGITAL:
+        return batch_eval.get_digital_points(model.freqs, model.sampling_time)
+    return batch_eval.get_analog_points(model.freqs)
+
+
+def get_default_sweep_root(model: Model) -> complex:
+    # the first pole in the upper half plane, its conjugate moves along with it
+    upper_poles = [pole for pole in model.poles.keys() if np.imag(pole) >= 0]
+    if not upper_poles:
+        raise ValueError("the model has no pole to sweep")
+    return upper_poles[0]
+
+
+def get_moved_root_sets(model: Model, root: complex, parameter: SweepParameter, values: NDArray,
+                        of_poles: bool = True) -> tuple[NDArray, NDArray]:
+    """stacked zeros and poles of all steps, the given root (and its conjugate) is set to the radius or angle (degrees)
+    of every step, all other roots stay where they are"""
+    zeros = np.asarray(build_repeated_item_list_from_dict(model.zeros), dtype=complex)
+    poles = np.asarray(build_repeated_item_list_from_dict(model.poles), dtype=complex)
+    base = poles if of_poles else zeros
+    if root not in (poles if of_poles else zeros):
+        raise ValueError(f"{root} is not a {'pole' if of_poles else 'zero'} of the model")
+    if parameter == SweepParameter.RADIUS:
+        moved = values * np.exp(1j * np.angle(root))
+    elif parameter == SweepParameter.ANGLE:
+        if np.imag(root) == 0:
+            raise ValueError("angle sweeps need a complex root, a real root would lose its conjugate")
+        moved = np.abs(root) * np.exp(1j * np.deg2rad(values))
+    else:
+        raise ValueError("only radius and angle sweeps move a single root")
+
+    stacked = np.tile(base, (len(values), 1))
+    stacked[:, base == root] = moved[:, None]
+    if np.imag(root) != 0:
+        stacked[:, base == np.conj(root)] = np.conj(moved)[:, None]
+    tiled_other = np.tile(zeros if of_poles else poles, (len(values), 1))
+    return (tiled_other, stacked) if of_poles else (stacked, tiled_other)
+
+
+def get_root_locus(model: Model, gains: NDArray) -> tuple[NDArray, NDArray, NDArray]:
+    """closed loop poles of 1 + K*G for every gain K, i.e. the roots of denom + K*num -> (zeros, poles, effective
+    gains). The roots of all gains are the eigenvalues of a stack of companion matrices, solved in one batched call.
+    The closed loop K*num / (denom + K*num) in root form has the gain K * num[0] / (denom + K*num)[0], which is not
+    K when num and denom have the same degree"""
+    num, denom = np.atleast_1d(model.num), np.atleast_1d(model.denom)
+    if len(num) > len(denom):
+        raise ValueError("root locus needs at least as many poles as zeros")
+    num_lead = num[0]
+    num = np.pad(num, (len(denom) - len(num), 0))
+    closed_loop = denom[None, :] + gains[:, None] * num[None, :]
+    order = closed_loop.shape[1] - 1
+    if order == 0:
+        raise ValueError("root locus needs at least one pole")
+    companion = np.zeros((len(gains), order, order), dtype=closed_loop.dtype)
+    companion[:, 0, :] = -closed_loop[:, 1:] / closed_loop[:, :1]
+    companion[:, 1:, :-1] = np.eye(order - 1)
+    poles = np.linalg.eigvals(companion).astype(complex)
+    zeros = np.tile(np.asarray(build_repeated_item_list_from_dict(model.zeros), dtype=complex), (len(gains), 1))
+    return zeros, poles, gains * num_lead / closed_loop[:, 0]
+
+
+def run_sweep(model: Model, parameter: SweepParameter, start: float, stop: float, steps: int,
+              root: complex | None = None, of_poles: bool = True, workers: int | None = None) -> SweepResult:
+    """roots, frequency responses and time responses of all steps, computed batched on the grids of the model.
+    With workers the steps are spread over a process pool that writes into shared memory"""
+    values = np.linspace(start, stop, steps)
+    gains = None
+    if parameter == SweepParameter.GAIN:
+        zeros, poles, gains = get_root_locus(model, values)
+    else:
+        root = root if root is not None else get_default_sweep_root(model)
+        zeros, poles = get_moved_root_sets(model, root, parameter, values, of_poles)
+
+    analog = model.type == ModelType.ANALOG
+    step = model.time_resp == TimeResponse.STEP
+    if workers is None:
+        complex_f_resp = batch_eval.batch_freq_resp(zeros, poles, get_model_points(model), gains)
+        time, time_values = batch_eval.batch_time_resp(zeros, poles, analog=analog, step=step, time=model.time,
+                                                       gains=gains)
+        normalized_abs_f_resp = batch_eval.normalize_magnitudes(complex_f_resp)
+    else:
+        with shared_results.SharedResultStore() as store:
+            time = np.asarray(model.time)
+            shared_f_resp, shared_time_values = shared_results.evaluate_in_pool(store, zeros, poles,
+                                                                                get_model_points(model), analog, step,
+                                                                                time, gains, workers)
+            # the magnitudes are computed straight from shared memory, the responses are copied out once since
+            # the result outlives the store
+            normalized_abs_f_resp = batch_eval.normalize_magnitudes(shared_f_resp)
+            complex_f_resp, time_values = shared_f_resp.copy(), shared_time_values.copy()
+            del shared_f_resp, shared_time_values
+    if not analog:
+        # same phase as the model's own (freqz) line the steps are drawn with
+        complex_f_resp *= batch_eval.get_freqz_factor(zeros, poles, get_model_points(model))
+    return SweepResult(parameter=parameter,
+                       values=values,
+                       zeros=zeros,
+                       poles=poles,
+                       freqs=np.asarray(model.freqs),
+                       complex_f_resp=complex_f_resp,
+                       normalized_abs_f_resp=normalized_abs_f_resp,
+                       time=time,
+                       time_values=time_values)
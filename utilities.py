@@ -3,12 +3,18 @@ warnings.filterwarnings("ignore")
 from dataclasses import dataclass,field
 import numpy as np
 from numpy.typing import NDArray
-import matplotlib.pyplot as plt
 from typing import Protocol, Callable
 from scipy import signal
 from enum import Enum,auto
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+from matplotlib.axes import Axes
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.lines import Line2D
+from matplotlib.collections import LineCollection
+import plane
+import highres
+from highres import HighResResponse
 
 
 # TODO: "implement step response as well using  t,y = signal.dstep(sys3,n=30)"
@@ -38,14 +44,22 @@ class Model(Protocol):
     max_abs_resp: float = field(init=False,repr=False)
     num: list = field(init=False, repr=False, default_factory=list)
     denom: list = field(init=False, repr=False, default_factory=list)
+    time: NDArray = field(init=False, repr=False)
+    time_values: NDArray = field(init=False, repr=False)
+    show_magnitude_surface: bool = field(init=False, default=False)
+    highres: HighResResponse | None = field(init=False, repr=False, default=None)
+    time_resp_error: float | None = field(init=False, repr=False, default=None)
 
     @property
     def sampling_frequency(self):
         ...
 
+    def evaluate_freq_band(self, f_low:float, f_high:float, n_points:int) -> tuple[NDArray,NDArray]:
+        ...
+
 @dataclass
 class PlottingCanvas(Protocol):
-    canvas: FigureCanvasTkAgg
+    canvas: FigureCanvasBase
 
 def read_proper_number(number_string:str) -> float | None:
     try:
@@ -78,14 +92,126 @@ def get_degree_on_unit_circle(x,y):
     else:
         return degree
 
-def create_freq_resp_plot(model:Model) -> tuple[plt.Figure,plt.axes]:
+def min_max_decimate(x_values:NDArray, y_values:NDArray, n_buckets:int) -> tuple[NDArray,NDArray]:
+    """splits the curve into n_buckets and keeps only the minimum and maximum of every bucket (in their original order)
+    so narrow peaks and notches survive, while the number of points is bounded by 2*n_buckets"""
+    x_values, y_values = np.asarray(x_values), np.asarray(y_values)
+    n = len(y_values)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return x_values, y_values
+    bucket_size = n // n_buckets
+    usable = bucket_size * n_buckets
+    buckets = y_values[:usable].reshape(n_buckets, bucket_size)
+    offsets = np.arange(n_buckets) * bucket_size
+    kept = [np.argmin(buckets, axis=1) + offsets, np.argmax(buckets, axis=1) + offsets, [0, n - 1]]
+    if usable < n:
+        tail = y_values[usable:]
+        kept.append([usable + np.argmin(tail), usable + np.argmax(tail)])
+    # np.unique also sorts, so the kept points stay in the order they are drawn
+    kept_idx = np.unique(np.concatenate(kept))
+    return x_values[kept_idx], y_values[kept_idx]
+
+
+def get_axes_pixel_width(ax:Axes) -> int:
+    fig = ax.figure
+    return max(int(ax.get_position().width * fig.get_figwidth() * fig.dpi), 1)
+
+
+def plot_decimated(ax:Axes, x_values:NDArray, y_values:NDArray, **kwargs) -> Line2D:
+    # drawing more than two points per pixel column is wasted time, extra points are hidden behind each other anyway
+    x_shown, y_shown = min_max_decimate(x_values, y_values, get_axes_pixel_width(ax))
+    line, = ax.plot(x_shown, y_shown, **kwargs)
+    return line
+
+
+def attach_zoom_refinement(ax:Axes, line:Line2D, model:Model, y_from_complex:Callable[[NDArray],NDArray]) -> None:
+    """whenever the visible frequency band changes, the line is redrawn from the cached grid if it holds enough points
+    for the band, otherwise the band alone is evaluated again with (about) two points per pixel"""
+    full_y = y_from_complex(np.asarray(model.complex_f_resp))
+    ax.set_xlim(model.freqs[0], model.freqs[-1])
+
+    def on_xlim_changed(changed_ax:Axes) -> None:
+        # the grid is looked up on every change, rescale_freq_plot changes it without building a new plot
+        full_x = np.asarray(model.freqs)
+        f_min, f_max = full_x[0], full_x[-1]
+        low, high = changed_ax.get_xlim()
+        low, high = max(low, f_min), min(high, f_max)
+        if high <= low:
+            return
+        n_pixels = get_axes_pixel_width(changed_ax)
+        start, stop = np.searchsorted(full_x, [low, high])
+        start, stop = max(start - 1, 0), min(stop + 1, len(full_x))
+        if stop - start >= 2 * n_pixels or (low, high) == (f_min, f_max):
+            band_x, band_y = min_max_decimate(full_x[start:stop], full_y[start:stop], n_pixels)
+        else:
+            band_x, complex_band = model.evaluate_freq_band(low, high, 2 * n_pixels)
+            band_y = y_from_complex(complex_band)
+        line.set_data(band_x, band_y)
+
+    ax.callbacks.connect("xlim_changed", on_xlim_changed)
+
+
+def draw_highres_line(ax:Axes, model:Model, phase:bool = False) -> Line2D:
+    """draws the pixel summary of the high resolution grid, zooming summarizes the visible band again at the resolution
+    of the screen so notches narrower than a pixel column stay visible at every zoom level"""
+    grid = model.highres
+    max_phase = grid.max_phase
+    line, = ax.plot(grid.summary_freqs, grid.summary_phase / max_phase if phase else grid.summary_abs)
+    ax.set_xlim(grid.f_first, grid.f_last)
+
+    def on_xlim_changed(changed_ax:Axes) -> None:
+        grid = model.highres
+        low, high = changed_ax.get_xlim()
+        if low <= grid.f_first + grid.f_step / 2 and high >= grid.f_last - grid.f_step / 2:
+            # the whole grid is visible, its summary is already there
+            line.set_data(grid.summary_freqs, grid.summary_phase / max_phase if phase else grid.summary_abs)
+            return
+        low, high = max(low, grid.f_first), min(high, grid.f_last)
+        if high <= low:
+            return
+        band_x, band_abs, band_phase = highres.summarize_band(model, grid, low, high, get_axes_pixel_width(changed_ax))
+        line.set_data(band_x, band_phase / max_phase if phase else band_abs)
+
+    ax.callbacks.connect("xlim_changed", on_xlim_changed)
+    return line
+
+
+def zoom_on_scroll(event, base_scale:float = 1.5) -> None:
+    # zooms around the mouse cursor, response plots refine themselves through their xlim_changed callback
+    ax = event.inaxes
+    if ax is None or event.xdata is None or event.ydata is None:
+        return
+    scale = 1 / base_scale if event.button == "up" else base_scale
+    x_low, x_high = ax.get_xlim()
+    y_low, y_high = ax.get_ylim()
+    ax.set_xlim(event.xdata - (event.xdata - x_low) * scale, event.xdata + (x_high - event.xdata) * scale)
+    ax.set_ylim(event.ydata - (event.ydata - y_low) * scale, event.ydata + (y_high - event.ydata) * scale)
+    ax.figure.canvas.draw_idle()
+
+
+def new_plot() -> tuple[Figure,Axes]:
+    # a plain Figure on an Agg canvas, nothing is registered with pyplot. Frontends put their own canvas on it (the GUI
+    # a FigureCanvasTkAgg), headless runs can draw or save it as it is
+    fig = Figure(figsize=all_fig_size)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    return fig, ax
+
+
+# every create_*_plot function has a draw_* twin that only fills an already existing axes. This way exporters can
+# reuse one figure for many models instead of building new figures for every plot.
+
+def draw_freq_resp(ax:Axes, model:Model) -> None:
     frequencies, freq_abs_resp = model.freqs, model.normalized_abs_f_resp
-    fig, ax = plt.subplots(figsize=all_fig_size)
     ax.grid()
     x_values = frequencies
     y_values = freq_abs_resp
 
-    ax.plot(x_values, y_values)
+    if model.highres is not None:
+        draw_highres_line(ax, model)
+    else:
+        line = plot_decimated(ax, x_values, y_values)
+        attach_zoom_refinement(ax, line, model, y_from_complex=lambda resp: np.abs(resp) / model.max_abs_resp)
     ax.set_title(f"frequency response")
 
     if model.type.name == "DIGITAL":
@@ -94,17 +220,30 @@ def create_freq_resp_plot(model:Model) -> tuple[plt.Figure,plt.axes]:
         ax.set_xlabel(r"angular frequencies $\omega$")
 
     ax.set_ylabel("gain")
+
+
+def create_freq_resp_plot(model:Model) -> tuple[Figure,Axes]:
+    fig, ax = new_plot()
+    draw_freq_resp(ax, model)
     return fig, ax
 
 
-def create_phase_resp_plot(model:Model) -> tuple[plt.Figure,plt.axes]:
+def get_normalized_phase_resp(model:Model) -> NDArray:
+    phase = np.angle(model.complex_f_resp)
+    return phase/np.max(phase) #normalize phase gain
+
+
+def draw_phase_resp(ax:Axes, model:Model) -> None:
     frequencies, freq_complex_resp = model.freqs, model.complex_f_resp
-    fig, ax = plt.subplots(figsize=all_fig_size)
     ax.grid()
     x_values = frequencies
-    y_values = np.angle(freq_complex_resp)
-    y_values = y_values/np.max(y_values) #normalize phase gain
-    ax.plot(x_values, y_values)
+    if model.highres is not None:
+        draw_highres_line(ax, model, phase=True)
+    else:
+        y_values = get_normalized_phase_resp(model)
+        max_phase = np.max(np.angle(freq_complex_resp))
+        line = plot_decimated(ax, x_values, y_values)
+        attach_zoom_refinement(ax, line, model, y_from_complex=lambda resp: np.angle(resp) / max_phase)
     ax.set_title("phase response")
 
     if model.type.name == "DIGITAL":
@@ -114,35 +253,44 @@ def create_phase_resp_plot(model:Model) -> tuple[plt.Figure,plt.axes]:
 
 
     ax.set_ylabel("phase")
+
+
+def create_phase_resp_plot(model:Model) -> tuple[Figure,Axes]:
+    fig, ax = new_plot()
+    draw_phase_resp(ax, model)
     return fig, ax
 
 
-def create_unit_circle() -> tuple[plt.Figure,plt.axes]:
+def draw_unit_circle(ax:Axes) -> None:
     a = radius * np.cos(theta)
     b = radius * np.sin(theta)
-    fig, ax = plt.subplots(figsize=all_fig_size)
     ax.grid()
     ax.plot(a, b, c="b")
     ax.axhline(y=0, color="k")
     ax.axvline(x=0, color="k")
+
+
+def create_unit_circle() -> tuple[Figure,Axes]:
+    fig, ax = new_plot()
+    draw_unit_circle(ax)
     return fig, ax
 
 
-def create_freq_domain_plot(model:Model)->Callable[[Model],tuple[plt.Figure,plt.axes]]:
+def create_freq_domain_plot(model:Model)->Callable[[Model],tuple[Figure,Axes]]:
     if model.type.name == "DIGITAL":
         return create_z_plot(model)
     elif model.type.name == "ANALOG":
         return create_s_plot(model)
 
 
-def create_z_plot(model:Model) ->tuple[plt.Figure,plt.axes] :
-    assert model.type.name == "DIGITAL", "z plot only for Digital (discrete) case"
-    fig, ax = create_unit_circle()
-    ax.grid()
-    ax.set_title(f"Pole Zero map fs = {model.sampling_frequency} Hz")
-    y_labels = ["","","","","",r"$\frac{fs}{2}$","","","",""]
-    ax.set_yticklabels(y_labels,rotation='horizontal', fontsize=16)
-    ax.set_xticklabels(y_labels, rotation='horizontal', fontsize=0)
+def draw_freq_domain(ax:Axes, model:Model) -> None:
+    if model.type.name == "DIGITAL":
+        draw_z_plane(ax, model)
+    elif model.type.name == "ANALOG":
+        draw_s_plane(ax, model)
+
+
+def draw_pole_zero_markers(ax:Axes, model:Model) -> None:
     for pole in model.poles.keys():
         ax.scatter(np.real(pole), np.imag(pole), marker="X", color="r", s=100)
         ax.text(np.real(pole), np.imag(pole), f'x{model.poles[pole]}', ha='center', size='large')
@@ -150,12 +298,52 @@ def create_z_plot(model:Model) ->tuple[plt.Figure,plt.axes] :
         ax.scatter(np.real(zero), np.imag(zero), marker="o", color="g", s=100)
         ax.text(np.real(zero), np.imag(zero), f'x{model.zeros[zero]}', ha='center', size='large')
 
+
+def draw_magnitude_surface(ax:Axes, model:Model) -> None:
+    """shows 20*log10|H| under the pole zero markers, only the tiles inside the current limits are evaluated and
+    the image follows zooming and panning"""
+    ax.set_autoscale_on(False)
+    image = ax.imshow(np.zeros((1, 1)), origin="lower", cmap="viridis", alpha=0.6, zorder=0,
+                      interpolation="bilinear", aspect="auto")
+
+    def update_surface(changed_ax:Axes) -> None:
+        log_mag, extent = plane.plane_evaluator.log_magnitude_mosaic(changed_ax.get_xlim(), changed_ax.get_ylim(),
+                                                                     model.poles, model.zeros)
+        db_mag = (20 / np.log(10)) * log_mag
+        image.set_data(db_mag)
+        image.set_extent(extent)
+        image.set_clim(*np.percentile(db_mag, [2, 98]))
+
+    update_surface(ax)
+    ax.callbacks.connect("xlim_changed", update_surface)
+    ax.callbacks.connect("ylim_changed", update_surface)
+
+
+def get_z_plane_title(model:Model) -> str:
+    return f"Pole Zero map fs = {model.sampling_frequency:g} Hz"
+
+
+def draw_z_plane(ax:Axes, model:Model) -> None:
+    assert model.type.name == "DIGITAL", "z plot only for Digital (discrete) case"
+    draw_unit_circle(ax)
+    ax.grid()
+    ax.set_title(get_z_plane_title(model))
+    y_labels = ["","","","","",r"$\frac{fs}{2}$","","","",""]
+    ax.set_yticklabels(y_labels,rotation='horizontal', fontsize=16)
+    ax.set_xticklabels(y_labels, rotation='horizontal', fontsize=0)
+    draw_pole_zero_markers(ax, model)
+    if model.show_magnitude_surface:
+        draw_magnitude_surface(ax, model)
+
+
+def create_z_plot(model:Model) ->tuple[Figure,Axes] :
+    fig, ax = new_plot()
+    draw_z_plane(ax, model)
     return fig, ax
 
 
-def create_s_plot(model:Model) -> tuple[plt.Figure,plt.axes]:
+def draw_s_plane(ax:Axes, model:Model) -> None:
     assert model.type.name == "ANALOG", "S plot is used only for analog (continuous) case"
-    fig, ax = plt.subplots(figsize=all_fig_size)
     ax.grid()
     ax.set_ylim([-4, 4])
     ax.grid()
@@ -164,52 +352,77 @@ def create_s_plot(model:Model) -> tuple[plt.Figure,plt.axes]:
     ax.set_title("Pole Zero map")
     ax.set_xlabel("real axis")
     ax.set_ylabel("j$\omega$ axis")
-    for pole in model.poles.keys():
-        ax.scatter(np.real(pole), np.imag(pole), marker="X", color="r", s=100)
-        ax.text(np.real(pole), np.imag(pole), f'x{model.poles[pole]}', ha='center', size='large')
-    for zero in model.zeros.keys():
-        ax.scatter(np.real(zero), np.imag(zero), marker="o", color="g", s=100)
-        ax.text(np.real(zero), np.imag(zero), f'x{model.zeros[zero]}', ha='center', size='large')
+    draw_pole_zero_markers(ax, model)
+    if model.show_magnitude_surface:
+        draw_magnitude_surface(ax, model)
+
 
+def create_s_plot(model:Model) -> tuple[Figure,Axes]:
+    fig, ax = new_plot()
+    draw_s_plane(ax, model)
     return fig, ax
 
 
-def create_time_plot(model:Model)->Callable[[Model],tuple[plt.Figure,plt.axes]]:
+def create_time_plot(model:Model)->Callable[[Model],tuple[Figure,Axes]]:
     if model.type.name == "DIGITAL":
         return create_digital_time_response(model)
     elif model.type.name == "ANALOG":
         return create_analog_time_response(model)
 
 
-def create_digital_time_response(model:Model) -> tuple[plt.Figure,plt.axes]:
-    fig, ax = plt.subplots(figsize=all_fig_size)
-    sys3 = signal.TransferFunction(model.num, model.denom, dt=model.sampling_time)
+# plot panel name -> function that builds its figure for a model, the same four plots every frontend shows
+PLOT_PANELS = {
+    "pole_zero": create_freq_domain_plot,
+    "time": create_time_plot,
+    "magnitude": create_freq_resp_plot,
+    "phase": create_phase_resp_plot,
+}
+
+
+def draw_time_response(ax:Axes, model:Model) -> None:
+    if model.type.name == "DIGITAL":
+        draw_digital_time_response(ax, model)
+    elif model.type.name == "ANALOG":
+        draw_analog_time_response(ax, model)
+
+
+def get_digital_time_label(model:Model) -> str:
+    label = f"sampling time {np.around(model.sampling_time,decimals=3)} s"
+    if model.time_resp_error is not None:
+        # computed from the spectrum, see spectral_time
+        label += f"\nfrom spectrum, error <= {model.time_resp_error:.1e}"
+    return label
+
+
+def draw_digital_time_response(ax:Axes, model:Model) -> None:
+    # the response itself is computed (and cached) by the model in update_time_resp
+    t, y = model.time, model.time_values
     if model.time_resp.name == "IMPULSE":
-        t, y = signal.dimpulse(sys3, n=30)
         ax.set_title(f"impulse time response")
     elif model.time_resp.name == "STEP":
-        t, y = signal.dstep(sys3, n=30)
         ax.set_title(f"step time response")
     else:
         raise ValueError("Either Impulse or Step time response")
 
-    ax.step(t, np.squeeze(y),label=f"sampling time {np.around(model.sampling_time,decimals=3)} s")
+    ax.step(t, y,label=get_digital_time_label(model))
     ax.grid()
     ax.set_xlabel("number of samples")
     ax.set_ylabel("amplitude")
 
     ax.legend()
+
+
+def create_digital_time_response(model:Model) -> tuple[Figure,Axes]:
+    fig, ax = new_plot()
+    draw_digital_time_response(ax, model)
     return fig, ax
 
 
-def create_analog_time_response(model:Model) -> tuple[plt.Figure,plt.axes]:
-    fig, ax = plt.subplots(figsize=all_fig_size)
-    sys3 = signal.TransferFunction(model.num, model.denom)
+def draw_analog_time_response(ax:Axes, model:Model) -> None:
+    t, y = model.time, model.time_values
     if model.time_resp.name == "IMPULSE":
-        t, y = signal.impulse(sys3)
         ax.set_title("impulse time response")
     elif model.time_resp.name == "STEP":
-        t, y = signal.step(sys3)
         ax.set_title("step time response")
     else:
         raise ValueError("Either Impulse or Step time response")
@@ -217,9 +430,184 @@ def create_analog_time_response(model:Model) -> tuple[plt.Figure,plt.axes]:
     ax.grid()
     ax.set_xlabel("time")
     ax.set_ylabel("amplitude")
+
+
+def create_analog_time_response(model:Model) -> tuple[Figure,Axes]:
+    fig, ax = new_plot()
+    draw_analog_time_response(ax, model)
+    return fig, ax
+
+
+
+# a new sampling frequency for the same z-plane roots (Model.rescale_sampling_time) only moves the frequency and time
+# axes, the rescale_* functions update an existing figure of a panel instead of building a new one. ratio is new fs / old fs
+
+def rescale_z_plot(fig:Figure, model:Model, ratio:float) -> None:
+    fig.axes[0].set_title(get_z_plane_title(model))
+
+
+def rescale_freq_plot(fig:Figure, model:Model, ratio:float) -> None:
+    ax = fig.axes[0]
+    # markers (the animation pointer) are moved, the curve itself is redrawn from the model by the xlim_changed callback
+    for collection in ax.collections:
+        offsets = np.array(collection.get_offsets(), dtype=float)
+        offsets[:, 0] *= ratio
+        collection.set_offsets(offsets)
+    low, high = ax.get_xlim()
+    full_range = np.isclose(low, 0) and np.isclose(high * ratio, model.freqs[-1])
+    ax.set_xlim((model.freqs[0], model.freqs[-1]) if full_range else (low * ratio, high * ratio))
+
+
+def rescale_digital_time_plot(fig:Figure, model:Model, ratio:float) -> None:
+    ax = fig.axes[0]
+    # taken from the model, the number of samples can change with fs (see Model.rescale_sampling_time)
+    for line in ax.lines:
+        line.set_data(model.time, model.time_values)
+        line.set_label(get_digital_time_label(model))
+    ax.relim()
+    ax.autoscale_view()
+    # the text is changed in place, a new legend would take longer than everything else here
+    legend = ax.get_legend()
+    if legend is not None:
+        for text in legend.get_texts():
+            text.set_text(get_digital_time_label(model))
+
+
+# plot panel name -> function that rescales the figure of a digital model shown there, see PLOT_PANELS
+PLOT_RESCALES = {
+    "pole_zero": rescale_z_plot,
+    "time": rescale_digital_time_plot,
+    "magnitude": rescale_freq_plot,
+    "phase": rescale_freq_plot,
+}
+
+
+def add_line_family(ax:Axes, x_values:NDArray, family:NDArray, **kwargs) -> LineCollection:
+    # one artist for all rows of family (drawn against the same x values), however many rows there are
+    segments = np.stack([np.broadcast_to(x_values, family.shape), family], axis=-1)
+    collection = LineCollection(segments, **kwargs)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+
+def draw_curve_family(ax:Axes, x_values:NDArray, family:NDArray, parameter_values:NDArray,
+                      parameter_label:str) -> LineCollection:
+    """draws every row of family as one curve, all inside a single LineCollection colored by the parameter"""
+    collection = add_line_family(ax, x_values, family, array=parameter_values, cmap="viridis", linewidths=1)
+    ax.figure.colorbar(collection, ax=ax, label=parameter_label)
+    return collection
+
+
+def get_normalized_phases(complex_f_resp:NDArray) -> NDArray:
+    # row by row version of get_normalized_phase_resp, rows without a positive phase are left as they are
+    phases = np.angle(complex_f_resp)
+    max_phases = np.max(phases, axis=1, keepdims=True)
+    return phases / np.where(max_phases > 0, max_phases, 1)
+
+
+def draw_sweep_freq_resp(ax:Axes, model:Model, result) -> None:
+    ax.grid()
+    draw_curve_family(ax, result.freqs, result.normalized_abs_f_resp, result.values, result.parameter.name.lower())
+    ax.set_title("frequency response sweep")
+    ax.set_xlabel("frequencies" if model.type.name == "DIGITAL" else r"angular frequencies $\omega$")
+    ax.set_ylabel("gain")
+
+
+def draw_sweep_phase_resp(ax:Axes, model:Model, result) -> None:
+    ax.grid()
+    phases = get_normalized_phases(result.complex_f_resp) #normalize phase gain, like the single phase plot
+    draw_curve_family(ax, result.freqs, phases, result.values, result.parameter.name.lower())
+    ax.set_title("phase response sweep")
+    ax.set_xlabel("frequencies" if model.type.name == "DIGITAL" else r"angular frequencies $\omega$")
+    ax.set_ylabel("phase")
+
+
+def draw_sweep_time_resp(ax:Axes, model:Model, result) -> None:
+    ax.grid()
+    draw_curve_family(ax, result.time, result.time_values, result.values, result.parameter.name.lower())
+    ax.set_title(f"{model.time_resp.name.lower()} time response sweep")
+    ax.set_xlabel("time")
+    ax.set_ylabel("amplitude")
+
+
+def draw_sweep_root_trajectories(ax:Axes, model:Model, result) -> None:
+    # the pole zero map of the current model with the roots of every step on top, colored by the parameter
+    draw_freq_domain(ax, model)
+    for roots, marker in [(result.poles, "x"), (result.zeros, "o")]:
+        if roots.size:
+            ax.scatter(np.real(roots).ravel(), np.imag(roots).ravel(), marker=marker, s=6,
+                       c=np.repeat(result.values, roots.shape[1]), cmap="viridis")
+    ax.set_title(f"root {result.parameter.name.lower()} sweep")
+
+
+def create_sweep_plot(model:Model, result, draw_func:Callable) -> tuple[Figure,Axes]:
+    fig, ax = new_plot()
+    draw_func(ax, model, result)
     return fig, ax
 
 
+def add_comparison_family(ax:Axes, x_values:NDArray, family:NDArray) -> LineCollection:
+    # the compared filters stay behind the line of the current model (zorder 2) and are told apart by color
+    return add_line_family(ax, x_values, family, array=np.arange(len(family)), cmap="tab20", linewidths=1,
+                           alpha=.6, zorder=1)
+
+
+def draw_comparison_freq_resp(ax:Axes, model:Model, result) -> None:
+    draw_freq_resp(ax, model)
+    add_comparison_family(ax, result.freqs, result.normalized_abs_f_resp)
+    ax.set_title(f"frequency response ({len(result.labels)} compared)")
+
+
+def draw_comparison_phase_resp(ax:Axes, model:Model, result) -> None:
+    draw_phase_resp(ax, model)
+    add_comparison_family(ax, result.freqs, get_normalized_phases(result.complex_f_resp))
+    ax.set_title(f"phase response ({len(result.labels)} compared)")
+
+
+def draw_comparison_time_resp(ax:Axes, model:Model, result) -> None:
+    draw_time_response(ax, model)
+    if result.time_values is None:
+        return
+    t, y = result.time, result.time_values
+    if model.type.name == "DIGITAL":
+        # same steps as ax.step(where="pre") draws for the single response
+        t, y = np.repeat(t, 2)[:-1], np.repeat(y, 2, axis=1)[:, 1:]
+    add_comparison_family(ax, t, y)
+
+
+def draw_conversion_freq_resp(ax:Axes, model:Model, result) -> None:
+    ax.grid()
+    for label, abs_resp in zip(result.labels, result.normalized_abs_f_resp):
+        ax.plot(result.freqs, abs_resp, label=label)
+    ax.legend()
+    ax.set_title(f"conversion at fs = {1/result.sampling_time:g} Hz")
+    ax.set_xlabel("frequencies")
+    ax.set_ylabel("gain")
+
+
+def draw_conversion_phase_resp(ax:Axes, model:Model, result) -> None:
+    ax.grid()
+    for label, complex_resp in zip(result.labels, result.complex_f_resp):
+        ax.plot(result.freqs, np.angle(complex_resp), label=label)
+    ax.legend()
+    ax.set_title("phase response")
+    ax.set_xlabel("frequencies")
+    ax.set_ylabel("phase")
+
+
+def draw_conversion_z_plane(ax:Axes, model:Model, result) -> None:
+    # the digital roots of every conversion (all rows but the first, which is the analog filter)
+    draw_unit_circle(ax)
+    for index, label in enumerate(result.labels[1:], start=1):
+        color = f"C{index}"
+        poles, zeros = result.poles[index], result.zeros[index]
+        ax.scatter(np.real(poles), np.imag(poles), marker="x", color=color, label=label)
+        ax.scatter(np.real(zeros), np.imag(zeros), marker="o", facecolors="none", edgecolors=color)
+    ax.legend()
+    ax.set_title("converted poles and zeros")
+
+
 def get_complex_number_from_list(num_list: list[float, float]) -> complex:
     assert len(num_list) == 2, "Complex number not in right format"
     return complex(num_list[0], num_list[1])
@@ -329,6 +717,37 @@ def response_animation_func(frame:int, line_2d_objects:list[Line2D], ax, canvas,
     return ax,
 
 
+# (complex_f_resp, its normalized phase) of the running phase animation, the frames only look the phase up
+_animation_phase = (None, None)
+
+def get_animation_phase_resp(model:Model) -> NDArray:
+    global _animation_phase
+    if _animation_phase[0] is not model.complex_f_resp:
+        _animation_phase = (model.complex_f_resp, get_normalized_phase_resp(model))
+    return _animation_phase[1]
+
+def get_phase_line_objects(model:Model):
+    line_2d_objects = []
+    frequencies, normalized_phase = model.freqs, get_animation_phase_resp(model)
+    fig, ax = create_phase_resp_plot(model)
+    line = ax.scatter(frequencies[0], normalized_phase[0], marker="o", color="b", s=100)
+    line_2d_objects.append(line)
+    return fig, ax, line_2d_objects
+
+def phase_animation_func(frame:int, line_2d_objects:list[Line2D], ax, canvas, model):
+    frequencies, normalized_phase = model.freqs, get_animation_phase_resp(model)
+    max_frame = len(frequencies)-1
+    if frame >= max_frame:
+        fig, ax = create_phase_resp_plot(model)
+        canvas.figure = fig
+    phase_degree = np.rad2deg(np.angle(model.complex_f_resp[frame]))
+    for line_obj in line_2d_objects:
+        line_obj.set_offsets([frequencies[frame], normalized_phase[frame]])
+        line_obj.set_label(f"phase {phase_degree:.1f}°")
+    ax.legend()
+    return ax,
+
+
 def get_digital_pole_zero_line_objects(model: Model):
     pole_line_2d_objects = []
     zero_line_2d_objects = []
@@ -1,16 +1,15 @@
 import gc
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import customtkinter
 import tkinter as tk
+from tkinter import filedialog, messagebox
 from typing import Protocol, Callable
-import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import utilities
 from functools import partial
 
 # TODO check this link for clearing canvas instead of reconstructing an instance: https://stackoverflow.com/questions/64273113/how-to-refresh-figurecanvastkagg-continuously-in-tkinter
-# TODO: "a button for save as PDF in the Side Frame"
 # TODO: "Animation mode as requested by professor"
 
 
@@ -24,7 +23,13 @@ response_values = ["Impulse response","Step response"]
 model_menu_values = ["Digital", "Analog"]
 filter_menu_values = ["Tief pass", "Hoch pass", "Band pass", "Band stop"]
 
+MODELTYPE_NAME_2_STRING = {"DIGITAL": "Digital", "ANALOG": "Analog"}
+FILTERTYPE_NAME_2_STRING = {"TP": "Tief pass", "HP": "Hoch pass", "BP": "Band pass", "BS": "Band stop"}
+TIMERESPONSE_NAME_2_STRING = {"IMPULSE": "Impulse response", "STEP": "Step response"}
+
 app_geometry = (750, 750)
+# the fs slider moves over log10(fs), 1 Hz ... 100 kHz
+fs_slider_decades = (0, 5)
 
 
 def get_initial_ui_values():
@@ -52,6 +57,54 @@ class Presenter(Protocol):
     def change_digital_sampling_freq(self):
         ...
 
+    def save_current_state(self):
+        ...
+
+    def import_roots(self):
+        ...
+
+    def design_filter(self):
+        ...
+
+    def compare_conversion(self):
+        ...
+
+    def add_to_comparison(self):
+        ...
+
+    def toggle_high_resolution(self):
+        ...
+
+    def toggle_spectral_time_resp(self):
+        ...
+
+    def toggle_reduction(self):
+        ...
+
+    def slide_sampling_freq(self, sampling_freq: float):
+        ...
+
+    def record_sampling_freq(self):
+        ...
+
+    def clear_comparison(self):
+        ...
+
+    def run_sweep(self):
+        ...
+
+    def toggle_timed_animation(self):
+        ...
+
+    def toggle_magnitude_surface(self):
+        ...
+
+    def undo(self):
+        ...
+
+    def redo(self):
+        ...
+
 
 class App(customtkinter.CTk):
     def __init__(self) -> None:
@@ -85,6 +138,34 @@ class App(customtkinter.CTk):
         )
         self.manual_pole_zero_button.grid(row=3, column=5, sticky="n")
         self.side_frame.disable_fs_button() if presenter.model.type.name == "ANALOG" else self.side_frame.enable_fs_button()
+        self.bind("<Control-z>", lambda event: presenter.undo())
+        self.bind("<Control-y>", lambda event: presenter.redo())
+
+    # the presenter only talks to the GUI through the methods below (and the frames), see presenter.Frontend
+
+    def get_initial_ui_values(self) -> tuple[str, str, str]:
+        return get_initial_ui_values()
+
+    def show_plot(self, panel: str, plotting_func: Callable) -> None:
+        display_canvas_plot(plotting_canvas=self.visual_filter_frame.panels[panel], plotting_func=plotting_func)
+
+    def refresh_plots(self) -> None:
+        refresh_visual_filter_frame(filter_frame=self.visual_filter_frame)
+
+    def attach_figure(self, panel: str, fig) -> FigureCanvasTkAgg:
+        plotting_canvas = self.visual_filter_frame.panels[panel]
+        if plotting_canvas.canvas:
+            plotting_canvas.canvas.get_tk_widget().destroy()
+        plotting_canvas.canvas = FigureCanvasTkAgg(fig, plotting_canvas)
+        plotting_canvas.canvas.get_tk_widget().grid(sticky="nsew")
+        return plotting_canvas.canvas
+
+    def update_plots(self, update: Callable) -> None:
+        # the canvases stay, only their figures are changed and drawn again
+        for panel, plotting_canvas in self.visual_filter_frame.panels.items():
+            if plotting_canvas.canvas:
+                update(panel, plotting_canvas.canvas.figure)
+                plotting_canvas.canvas.draw_idle()
 
 
 class SideFrame(customtkinter.CTkFrame):
@@ -103,13 +184,41 @@ class SideFrame(customtkinter.CTkFrame):
         number = utilities.read_proper_number(recieved_text)
         return number
 
+    def open_sweep_input_dialog_event(self) -> str | None:
+        dialog = customtkinter.CTkInputDialog(text="Type in parameter (radius, angle or gain), start, stop and steps:",
+                                              title="Sweep")
+        return dialog.get_input()
+
+    def open_design_input_dialog_event(self) -> str | None:
+        dialog = customtkinter.CTkInputDialog(text="Type in prototype (butter, cheby1, cheby2, ellip), filter (TP, HP, BP, "
+                                                   "BS), order, cutoff(s) and rp=, rs= in dB if needed:",
+                                              title="Design filter")
+        return dialog.get_input()
+
+    def open_conversion_input_dialog_event(self) -> str | None:
+        dialog = customtkinter.CTkInputDialog(text="Type in sampling frequency in Hz and optionally a prewarp frequency "
+                                                   "in Hz:", title="Analog to digital")
+        return dialog.get_input()
+
+    def open_save_directory_dialog_event(self) -> str:
+        return filedialog.askdirectory(title="Save plots and state to")
+
+    def open_import_file_dialog_event(self) -> str:
+        return filedialog.askopenfilename(title="Import poles and zeros",
+                                          filetypes=[("Roots", "*.csv *.npy *.npz *.json"), ("All files", "*.*")])
+
     def disable_fs_button(self):
         self.sampling_freq_button.configure(state="disabled", text="Modify fs")
+        # analog models have no fs of their own, but they can be converted at one
+        self.conversion_button.configure(state="normal")
+        self.fs_slider_label.configure(text="A/D conversion fs")
     def enable_fs_button(self):
         self.sampling_freq_button.configure(state="enabled", text="Modify fs")
+        self.conversion_button.configure(state="disabled")
+        self.fs_slider_label.configure(text="fs")
 
     def __init_side_frame(self) -> None:
-        self.grid_rowconfigure(tuple(range(12)), weight=1)
+        self.grid_rowconfigure(tuple(range(23)), weight=1)
         # self.grid_rowconfigure(4, weight=50)
 
         self.grid_columnconfigure(tuple(range(1)), weight=1)
@@ -170,6 +279,110 @@ class SideFrame(customtkinter.CTkFrame):
         )
         self.optionmenu_response.grid(row=5, column=0, padx=10, pady=20, sticky="n")
 
+        self.save_button = customtkinter.CTkButton(
+            master=self, text="Save", command=self.presenter.save_current_state)
+        self.save_button.grid(row=6, column=0, sticky="n")
+
+        self.undo_button = customtkinter.CTkButton(
+            master=self, text="Undo", command=self.presenter.undo)
+        self.undo_button.grid(row=7, column=0, sticky="n")
+
+        self.redo_button = customtkinter.CTkButton(
+            master=self, text="Redo", command=self.presenter.redo)
+        self.redo_button.grid(row=8, column=0, sticky="n")
+
+        self.surface_switch = customtkinter.CTkSwitch(
+            master=self, text="|H| surface", command=self.presenter.toggle_magnitude_surface)
+        self.surface_switch.grid(row=9, column=0, sticky="n")
+
+        self.sweep_button = customtkinter.CTkButton(
+            master=self, text="Sweep", command=self.presenter.run_sweep)
+        self.sweep_button.grid(row=10, column=0, sticky="n")
+
+        self.timed_animation_switch = customtkinter.CTkSwitch(
+            master=self, text="Real-time animation", command=self.presenter.toggle_timed_animation)
+        self.timed_animation_switch.select()
+        self.timed_animation_switch.grid(row=11, column=0, sticky="n")
+
+        self.animation_stats_label = customtkinter.CTkLabel(master=self, text="")
+        self.animation_stats_label.grid(row=12, column=0, sticky="n")
+
+        self.import_button = customtkinter.CTkButton(
+            master=self, text="Import", command=self.presenter.import_roots)
+        self.import_button.grid(row=13, column=0, sticky="n")
+
+        self.design_button = customtkinter.CTkButton(
+            master=self, text="Design", command=self.presenter.design_filter)
+        self.design_button.grid(row=14, column=0, sticky="n")
+
+        self.conversion_button = customtkinter.CTkButton(
+            master=self, text="A/D compare", command=self.presenter.compare_conversion)
+        self.conversion_button.grid(row=15, column=0, sticky="n")
+
+        self.add_comparison_button = customtkinter.CTkButton(
+            master=self, text="Compare +", command=self.presenter.add_to_comparison)
+        self.add_comparison_button.grid(row=16, column=0, sticky="n")
+
+        self.clear_comparison_button = customtkinter.CTkButton(
+            master=self, text="Clear comparison", command=self.presenter.clear_comparison)
+        self.clear_comparison_button.grid(row=17, column=0, sticky="n")
+
+        self.high_resolution_switch = customtkinter.CTkSwitch(
+            master=self, text="High resolution", command=self.presenter.toggle_high_resolution)
+        self.high_resolution_switch.grid(row=18, column=0, sticky="n")
+
+        self.spectral_time_switch = customtkinter.CTkSwitch(
+            master=self, text="Time from spectrum", command=self.presenter.toggle_spectral_time_resp)
+        self.spectral_time_switch.grid(row=19, column=0, sticky="n")
+
+        self.reduction_switch = customtkinter.CTkSwitch(
+            master=self, text="Reduce order", command=self.presenter.toggle_reduction)
+        self.reduction_switch.grid(row=20, column=0, sticky="n")
+
+        self.fs_slider_label = customtkinter.CTkLabel(master=self, text="fs")
+        self.fs_slider_label.grid(row=21, column=0, sticky="n")
+
+        # continuous fs changes, digital plots are only rescaled, analog filters are converted at the new fs
+        self.fs_slider = customtkinter.CTkSlider(
+            master=self, from_=fs_slider_decades[0], to=fs_slider_decades[1],
+            command=lambda decade: self.presenter.slide_sampling_freq(10 ** decade))
+        self.fs_slider.set(2)
+        self.fs_slider.bind("<ButtonRelease-1>", lambda event: self.presenter.record_sampling_freq())
+        self.fs_slider.grid(row=22, column=0, sticky="n")
+
+    def show_animation_stats(self, stats) -> None:
+        self.animation_stats_label.configure(text=str(stats))
+
+    def show_memory_report(self, report) -> None:
+        # shares the label with the animation stats, whichever ran last is shown
+        self.animation_stats_label.configure(text=str(report))
+
+    def show_reduction_report(self, report) -> None:
+        self.animation_stats_label.configure(text="no reduction" if report is None else str(report))
+
+    def show_time_resp_error(self, error: float | None) -> None:
+        text = "time response simulated" if error is None else f"time response error <= {error:.1e}"
+        self.animation_stats_label.configure(text=text)
+
+    def show_error(self, title: str, message: str) -> None:
+        messagebox.showerror(title=title, message=message)
+
+    def show_model_settings(self, model) -> None:
+        # after undo/redo the option menus have to show the restored model, not the last selection
+        self.optionmenu_model.set(MODELTYPE_NAME_2_STRING[model.type.name])
+        if model.filter.name in FILTERTYPE_NAME_2_STRING:
+            self.optionmenu_filter.set(FILTERTYPE_NAME_2_STRING[model.filter.name])
+        self.optionmenu_response.set(TIMERESPONSE_NAME_2_STRING[model.time_resp.name])
+        # the switches as well, select/deselect do not call their commands
+        for switch, on in [(self.surface_switch, model.show_magnitude_surface),
+                           (self.high_resolution_switch, model.high_resolution_points is not None),
+                           (self.spectral_time_switch, model.time_resp_from_spectrum),
+                           (self.reduction_switch, model.reduction_tolerance is not None)]:
+            switch.select() if on else switch.deselect()
+        # for analog models the slider is the fs of the A/D conversion, which is not part of the model
+        if model.type.name == "DIGITAL":
+            self.fs_slider.set(float(np.clip(np.log10(model.sampling_frequency), *fs_slider_decades)))
+
 
 class FilterVisualFrame:
     plots_2_display = []
@@ -207,6 +420,11 @@ class FilterVisualFrame:
         )
 
         self.plots_2_display.append(self.canvas_phase_resp)
+        # same names as utilities.PLOT_PANELS
+        self.panels = {"pole_zero": self.canvas_freq_domain,
+                       "time": self.canvas_time_domain,
+                       "magnitude": self.canvas_freq_resp,
+                       "phase": self.canvas_phase_resp}
 
         refresh_visual_filter_frame(filter_frame=self)
 
@@ -244,94 +462,156 @@ class PlottingCanvas(customtkinter.CTkCanvas):
 
 
 
-class ManualPoleNumberFrame(customtkinter.CTkScrollableFrame):
-    # list below stores ctkentry objects which are containers for numbers (real and imaginary part separately).
-    # when we need to clear screen, all members of this list will be destroyed (destroy is how tkinter objects are deleted)
-    poles_2_display = []
+@dataclass
+class ManualEntryRow:
+    """one row of the manual pole/zero panels: what is shown as placeholder (the current root or the plain text
+    "real", "imaginary", "fach" for a blank row) and what the user typed so far"""
+    placeholders: tuple[str, str, str]
+    values: list[str] = field(default_factory=lambda: ["", "", ""])
+
+    @property
+    def is_blank(self) -> bool:
+        return all(placeholder.isalpha() for placeholder in self.placeholders)
 
-    def __init__(self, master, presenter: Presenter) -> None:
-        super().__init__(master, label_text="Poles [Real, Imaginary, Fach]")
-        # self.place(x=0, y=0, relwidth=0.15, relheight=1)
-        self.presenter = presenter
-        self.__init_pole_frame()
 
-    def __init_pole_frame(self) -> None:
-        self.grid(row=0, column=5, sticky="nsew")
+blank_row_placeholders = ("real", "imaginary", "fach")
+
+
+class ManualRootNumberFrame(customtkinter.CTkFrame):
+    """Lists the roots of the model plus a few blank rows for new ones. Entry widgets only exist for the rows that are
+    visible: they are kept in a pool and bound to other rows when scrolling or when the model changes, instead of
+    being destroyed and created again. Whatever was typed is kept in the ManualEntryRow of each row."""
+    visible_rows = 5
+    blank_rows = 3
+
+    def __init__(self, master, presenter: Presenter, label_text: str, grid_row: int,
+                 get_model_roots: Callable[[], dict[complex, int]]) -> None:
+        super().__init__(master)
+        self.presenter = presenter
+        # the poles or the zeros of the presenter's current model
+        self.get_model_roots = get_model_roots
+        # rows_2_display stores the rows (numbers as text, not tkinter objects), entry_slots the pooled ctkentry objects
+        self.rows_2_display: list[ManualEntryRow] = []
+        self.entry_slots: list[list[customtkinter.CTkEntry]] = []
+        self.first_row = 0
+        self.grid(row=grid_row, column=5, sticky="nsew")
         self.grid_columnconfigure((0, 1, 2, 3, 4, 5), weight=1)
+        self.label = customtkinter.CTkLabel(self, text=label_text)
+        self.label.grid(row=0, column=0, columnspan=6, pady=(5, 10))
+        self.scrollbar = customtkinter.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.grid(row=1, column=6, rowspan=self.visible_rows, sticky="ns")
+        self.bind_mouse_wheel(self)
+
+    def bind_mouse_wheel(self, widget) -> None:
+        widget.bind("<MouseWheel>", lambda event: self.scroll_rows(-1 if event.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda event: self.scroll_rows(-1))
+        widget.bind("<Button-5>", lambda event: self.scroll_rows(1))
+
+    def grid_manual_entries(self) -> None:
+        roots = self.get_model_roots()
+        self.rows_2_display = [ManualEntryRow(placeholders=(f"{np.real(root)}", f"{np.imag(root)}", f"{roots[root]}"))
+                               for root in roots.keys()]
+        'below leaving 3 empty place holders for user to enter roots manually'
+        self.rows_2_display += [ManualEntryRow(placeholders=blank_row_placeholders) for _ in range(self.blank_rows)]
+        self.first_row = 0
+        self.__ensure_entry_slots(min(self.visible_rows, len(self.rows_2_display)))
+        self.__bind_visible_rows()
+
+    def wipe_manual_entries(self) -> None:
+        # only the rows are dropped, the pooled entry widgets are reused by the next grid_manual_entries
+        self.rows_2_display = []
+        self.first_row = 0
+
+    def collect_entry_values(self) -> None:
+        # copies what was typed into the visible entries back into their rows
+        for slot_index, slot in enumerate(self.entry_slots):
+            row_index = self.first_row + slot_index
+            if row_index < len(self.rows_2_display):
+                self.rows_2_display[row_index].values = [entry.get() for entry in slot]
+
+    def scroll_rows(self, step: int) -> None:
+        self.scroll_to(self.first_row + step)
+
+    def scroll_to(self, first_row: int) -> None:
+        max_first_row = max(len(self.rows_2_display) - len(self.entry_slots), 0)
+        first_row = min(max(first_row, 0), max_first_row)
+        if first_row == self.first_row:
+            return
+        self.collect_entry_values()
+        self.first_row = first_row
+        self.__bind_visible_rows()
+
+    def on_scrollbar(self, *args) -> None:
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.rows_2_display)))
+        elif args[0] == "scroll":
+            self.scroll_rows(int(args[1]))
+
+    def __ensure_entry_slots(self, n_slots: int) -> None:
+        while len(self.entry_slots) < n_slots:
+            slot = [customtkinter.CTkEntry(self) for _ in range(3)]
+            for entry in slot:
+                self.bind_mouse_wheel(entry)
+            self.entry_slots.append(slot)
+        for slot_index, slot in enumerate(self.entry_slots):
+            for entry, column in zip(slot, (0, 2, 4)):
+                if slot_index < n_slots:
+                    entry.grid(row=slot_index + 1, column=column, padx=10, pady=(0, 20))
+                else:
+                    entry.grid_remove()
+
+    def __bind_visible_rows(self) -> None:
+        for slot_index, slot in enumerate(self.entry_slots):
+            row_index = self.first_row + slot_index
+            if row_index >= len(self.rows_2_display):
+                continue
+            row = self.rows_2_display[row_index]
+            # existing roots are shown in white, blank rows keep the default placeholder color
+            color = customtkinter.ThemeManager.theme["CTkEntry"]["placeholder_text_color"] if row.is_blank else "white"
+            for entry, placeholder, value in zip(slot, row.placeholders, row.values):
+                entry.configure(placeholder_text=placeholder, placeholder_text_color=color)
+                # deleting brings the (new) placeholder back, inserting replaces it with what was typed before
+                entry.delete(0, "end")
+                if value:
+                    entry.insert(0, value)
+        if self.rows_2_display:
+            shown = len(self.entry_slots) / len(self.rows_2_display)
+            start = self.first_row / len(self.rows_2_display)
+            self.scrollbar.set(start, min(start + shown, 1))
+
+
+class ManualPoleNumberFrame(ManualRootNumberFrame):
+    def __init__(self, master, presenter: Presenter) -> None:
+        super().__init__(master, presenter, label_text="Poles [Real, Imaginary, Fach]", grid_row=0,
+                         get_model_roots=lambda: presenter.model.poles)
         self.grid_manual_pole_entries()
 
+    @property
+    def poles_2_display(self) -> list[ManualEntryRow]:
+        return self.rows_2_display
+
     def grid_manual_pole_entries(self) -> None:
-        for i,pole in enumerate(self.presenter.model.poles.keys()):
-            entry_re = customtkinter.CTkEntry(self, placeholder_text=f"{np.real(pole)}",placeholder_text_color='white')
-            entry_re.grid(row=i, column=0, padx=10, pady=(0, 20))
-            entry_im = customtkinter.CTkEntry(self, placeholder_text=f"{np.imag(pole)}",placeholder_text_color='white')
-            entry_im.grid(row=i, column=2, padx=10, pady=(0, 20))
-            entry_fach = customtkinter.CTkEntry(self, placeholder_text=f"{self.presenter.model.poles[pole]}",placeholder_text_color='white')
-            entry_fach.grid(row=i, column=4, padx=10, pady=(0, 20))
-            self.poles_2_display.append([entry_re, entry_im,entry_fach])# members are tkinter objects not numbers
-
-        'below leaving 3 empty place holders for user to enter poles manually'
-        for i in range(
-            len(self.presenter.model.poles.keys()), len(self.presenter.model.poles.keys()) + 3
-        ):
-            entry_re = customtkinter.CTkEntry(self, placeholder_text="real")
-            entry_re.grid(row=i, column=0, padx=10, pady=(0, 20))
-            entry_im = customtkinter.CTkEntry(self, placeholder_text="imaginary")
-            entry_im.grid(row=i, column=2, padx=10, pady=(0, 20))
-            entry_fach = customtkinter.CTkEntry(self, placeholder_text="fach")
-            entry_fach.grid(row=i, column=4, padx=10, pady=(0, 20))
-            self.poles_2_display.append([entry_re, entry_im,entry_fach])# empty placeholders are also objects that are saved for reference
+        self.grid_manual_entries()
 
     def wipe_manual_pole_entries(self) -> None:
-        copy_list = self.poles_2_display.copy()
-        for pole_display_entry in copy_list:
-            for pole_section in pole_display_entry:
-                pole_section.destroy()
-        self.poles_2_display.clear()
+        self.wipe_manual_entries()
 
 
-class ManualZeroNumberFrame(customtkinter.CTkScrollableFrame):
-    # list below stores ctkentry objects which are containers for numbers (real and imaginary part separately).
-    # when we need to clear screen, all members of this list will be destroyed (destroy is how tkinter objects are deleted)
-    zeros_2_display = []
+class ManualZeroNumberFrame(ManualRootNumberFrame):
     def __init__(self, master, presenter: Presenter) -> None:
-        super().__init__(master, label_text="Zeros [Real, Imaginary, Fach]")
-        self.presenter = presenter
-        self.__init_zero_frame()
-
-    def __init_zero_frame(self) -> None:
-        self.grid(row=2, column=5, sticky="nsew")
-        self.grid_columnconfigure((0, 1, 2, 3, 4, 5), weight=1)
+        super().__init__(master, presenter, label_text="Zeros [Real, Imaginary, Fach]", grid_row=2,
+                         get_model_roots=lambda: presenter.model.zeros)
         self.grid_manual_zero_entries()
 
+    @property
+    def zeros_2_display(self) -> list[ManualEntryRow]:
+        return self.rows_2_display
+
     def grid_manual_zero_entries(self) -> None:
-        for i,zero in enumerate(self.presenter.model.zeros.keys()):
-            entry_re = customtkinter.CTkEntry(self, placeholder_text=f"{np.real(zero)}",placeholder_text_color='white')
-            entry_re.grid(row=i, column=0, padx=10, pady=(0, 20))
-            entry_im = customtkinter.CTkEntry(self, placeholder_text=f"{np.imag(zero)}",placeholder_text_color='white')
-            entry_im.grid(row=i, column=2, padx=10, pady=(0, 20))
-            entry_fach = customtkinter.CTkEntry(self, placeholder_text=f"{self.presenter.model.zeros[zero]}",placeholder_text_color='white')
-            entry_fach.grid(row=i, column=4, padx=10, pady=(0, 20))
-            self.zeros_2_display.append([entry_re, entry_im,entry_fach]) # members are tkinter objects not numbers
-        'below leaving 3 empty place holders for user to enter zeros manually'
-        for i in range(
-            len(self.presenter.model.zeros.keys()), len(self.presenter.model.zeros.keys()) + 3
-        ):
-            entry_re = customtkinter.CTkEntry(self, placeholder_text="real")
-            entry_re.grid(row=i, column=0, padx=10, pady=(0, 20))
-            entry_im = customtkinter.CTkEntry(self, placeholder_text="imaginary")
-            entry_im.grid(row=i, column=2, padx=10, pady=(0, 20))
-            entry_fach = customtkinter.CTkEntry(self, placeholder_text="fach")
-            entry_fach.grid(row=i, column=4, padx=10, pady=(0, 20))
-            self.zeros_2_display.append([entry_re, entry_im,entry_fach]) # empty placeholders are also objects that are saved here for reference
+        self.grid_manual_entries()
 
     def wipe_manual_zero_entries(self) -> None:
-        copy_list = self.zeros_2_display.copy()
-        for zero_display_entry in copy_list:
-            for zero_section in zero_display_entry:
-                zero_section.destroy()
-
-        self.zeros_2_display.clear()
+        self.wipe_manual_entries()
 
 
 def display_canvas_plot(plotting_canvas: PlottingCanvas, plotting_func: Callable) -> None:
@@ -339,17 +619,14 @@ def display_canvas_plot(plotting_canvas: PlottingCanvas, plotting_func: Callable
         plotting_canvas.canvas.get_tk_widget().destroy()
     fig, ax = plotting_func()
     plotting_canvas.canvas = FigureCanvasTkAgg(fig, plotting_canvas)
+    plotting_canvas.canvas.mpl_connect("scroll_event", utilities.zoom_on_scroll)
     plotting_canvas.canvas.get_tk_widget().grid(sticky="nsew")
 
 
 def update_canvas_partial_function_plotters(filter_frame: FilterVisualFrame) -> dict[PlottingCanvas,Callable]:
     frame = filter_frame
-    canvas_2_partial_func_plotter_map = {
-        frame.canvas_freq_domain: partial(utilities.create_freq_domain_plot, frame.presenter.model),
-        frame.canvas_time_domain: partial(utilities.create_time_plot, frame.presenter.model),
-        frame.canvas_freq_resp: partial(utilities.create_freq_resp_plot, frame.presenter.model),
-        frame.canvas_phase_resp: partial(utilities.create_phase_resp_plot, frame.presenter.model)
-        }
+    canvas_2_partial_func_plotter_map = {frame.panels[panel]: partial(create_plot, frame.presenter.model)
+                                         for panel, create_plot in utilities.PLOT_PANELS.items()}
 
     return canvas_2_partial_func_plotter_map
 
@@ -357,7 +634,6 @@ def update_canvas_partial_function_plotters(filter_frame: FilterVisualFrame) ->
 def refresh_visual_filter_frame(filter_frame: FilterVisualFrame) -> None:
     # first refresh the partial functions for each canvas, then plot
     canvas_2_partial_func_plotter_map = update_canvas_partial_function_plotters(filter_frame=filter_frame)
-    plt.close("all")
     for canvas,partial_func in canvas_2_partial_func_plotter_map.items():
         display_canvas_plot(plotting_canvas=canvas,plotting_func=partial_func)
     gc.collect()